@@ -0,0 +1 @@
+"""Micro-benchmarks for vrmapi-async, run as scripts (not part of the tests)."""
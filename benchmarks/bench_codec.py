@@ -0,0 +1,112 @@
+"""Benchmark the stats series codec on realistic VRM payloads.
+
+Builds a year of ``15mins`` data shaped like a VRM ``/stats`` response
+(solar, consumption and battery series with ``[ts, mean, min, max]``
+points), then compares memory and time of holding it as parsed
+``StatsRecord`` lists versus :class:`EncodedSeries`.
+
+Run with::
+
+    python -m benchmarks.bench_codec [--days 365]
+"""
+
+import argparse
+import gc
+import math
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from vrmapi_async.client.installations.schema import StatsResponse
+from vrmapi_async.stats.codec import EncodedSeries
+
+QUARTER_MS = 15 * 60 * 1000
+START_MS = 1_704_067_200_000
+
+
+def _solar(i: int, rng: random.Random) -> float:
+    hour = (i % 96) / 4
+    daylight = max(0.0, math.sin((hour - 6) / 12 * math.pi))
+    return daylight * 4200 * rng.uniform(0.6, 1.0)
+
+
+def _consumption(i: int, rng: random.Random) -> float:
+    hour = (i % 96) / 4
+    return 350 + 250 * (7 <= hour <= 9 or 18 <= hour <= 22) + rng.uniform(-40, 40)
+
+
+def _battery_soc(i: int, rng: random.Random) -> float:
+    return 60 + 30 * math.sin(i / 96 * 2 * math.pi) + rng.uniform(-0.5, 0.5)
+
+
+def make_payload(days: int, seed: int = 0) -> dict[str, Any]:
+    """Build a VRM-shaped stats payload with three 15-minute series.
+
+    Values carry the long float tails the API returns (e.g.
+    ``412.33333333333`` from averaging), which is the worst case for
+    XOR compression.
+    """
+    rng = random.Random(seed)
+    records: dict[str, list[list[float]]] = {}
+    for code, gen in (("Pdc", _solar), ("Pc", _consumption), ("bs", _battery_soc)):
+        series = []
+        for i in range(days * 96):
+            mean = gen(i, rng) / 3 * 3.0000000001
+            low = mean * rng.uniform(0.7, 1.0)
+            high = mean * rng.uniform(1.0, 1.3)
+            series.append([START_MS + i * QUARTER_MS, mean, low, high])
+        records[code] = series
+    return {"success": True, "records": records, "totals": {}}
+
+
+def measure(build: Callable[[], Any]) -> tuple[Any, int, float]:
+    """Return ``(result, retained bytes, seconds)`` of calling ``build``."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    payload = make_payload(args.days)
+    response, records_bytes, parse_s = measure(lambda: StatsResponse(**payload))
+    series = {k: v for k, v in response.records.items() if isinstance(v, list)}
+    points = sum(len(v) for v in series.values())
+
+    encoded, encoded_bytes, encode_s = measure(
+        lambda: {k: EncodedSeries.from_records(v) for k, v in series.items()}
+    )
+    started = time.perf_counter()
+    for enc in encoded.values():
+        for _ in enc:
+            pass
+    iterate_s = time.perf_counter() - started
+    started = time.perf_counter()
+    decoded = {k: enc.to_records() for k, enc in encoded.items()}
+    decode_s = time.perf_counter() - started
+    assert decoded == series  # noqa: S101
+
+    print(f"points:              {points:>12,}")
+    print(f"StatsRecord lists:   {records_bytes:>12,} B  (parse {parse_s:.2f}s)")
+    print(f"EncodedSeries:       {encoded_bytes:>12,} B  (encode {encode_s:.2f}s)")
+    print(f"  bytes/point:       {encoded_bytes / points:>12.1f}")
+    print(f"  reduction:         {records_bytes / encoded_bytes:>11.1f}x")
+    print(f"iterate (lazy):      {iterate_s:>12.2f}s")
+    print(f"decode to records:   {decode_s:>12.2f}s")
+
+
+if __name__ == "__main__":
+    main()
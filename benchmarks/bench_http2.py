@@ -0,0 +1,91 @@
+"""Benchmark HTTP/1.1 pooling against HTTP/2 multiplexing.
+
+Runs batches of ``get_stats`` calls through :class:`VRMAsyncAPI`
+against a local stand-in server (see :mod:`benchmarks.standin_server`)
+that answers after a fixed delay, at several concurrency levels, and
+reports throughput and how many connections each mode opened.
+
+Run with::
+
+    python -m benchmarks.bench_http2 [--latency 0.02] [--days 7]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_codec import make_payload
+from benchmarks.standin_server import StandInServer
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.connection import ConnectionSettings
+
+MODES = {
+    "http1 pool=10": ConnectionSettings(
+        max_connections=10, max_keepalive_connections=10
+    ),
+    "http1 pool=100": ConnectionSettings(
+        max_connections=100, max_keepalive_connections=100
+    ),
+    # Cleartext HTTP/2 needs prior knowledge, hence http1=False.
+    "http2 conns=1": ConnectionSettings(
+        http2=True, http1=False, max_connections=1, max_keepalive_connections=1
+    ),
+    "http2 conns=4": ConnectionSettings(
+        http2=True, http1=False, max_connections=4, max_keepalive_connections=4
+    ),
+}
+
+
+async def _run(
+    server: StandInServer, settings: ConnectionSettings, concurrency: int, total: int
+) -> tuple[float, int, float]:
+    client = VRMAsyncAPI(
+        token="bench",  # noqa: S106
+        user_id_for_token=1,
+        base_url=server.base_url,
+        connection=settings,
+        max_retries=0,
+    )
+    await client.connect()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(site_id: int) -> None:
+        async with semaphore:
+            await client.installations.get_stats(site_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    stats = client.connection_stats
+    assert stats is not None  # noqa: S101
+    await client.disconnect()
+    return elapsed, stats.connections_opened, stats.reuse_ratio
+
+
+async def main(latency: float, days: int, levels: list[int]) -> None:
+    """Run the benchmark and print one line per concurrency and mode."""
+    payload = make_payload(days)
+    async with StandInServer(payload, latency) as server:
+        print(
+            f"body {len(server.body) / 1024:.0f} KiB, latency {latency * 1000:.0f} ms"
+        )
+        print(
+            f"{'concurrency':>11} {'mode':<15} {'req/s':>8} {'conns':>6} {'reuse':>6}"
+        )
+        for concurrency in levels:
+            total = max(50, concurrency * 5)
+            for name, settings in MODES.items():
+                elapsed, conns, reuse = await _run(server, settings, concurrency, total)
+                print(
+                    f"{concurrency:>11} {name:<15} {total / elapsed:>8.0f}"
+                    f" {conns:>6} {reuse:>6.0%}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 200])
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.days, args.concurrency))
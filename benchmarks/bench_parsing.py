@@ -0,0 +1,71 @@
+"""Benchmark validating large stats responses inline, in threads and processes.
+
+Validates several year-long ``15mins`` stats payloads concurrently while
+a ticker task measures how late the event loop runs it, and reports per
+parse mode the wall time and the worst and mean loop lag.
+
+Run with::
+
+    python -m benchmarks.bench_parsing [--days 365] [--payloads 4]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+
+from benchmarks.bench_codec import make_payload
+from vrmapi_async.client.installations.schema import StatsResponse
+from vrmapi_async.parsing import ParseExecutor, ParseMode
+
+TICK = 0.005
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _run_mode(
+    mode: ParseMode, payloads: list[dict[str, Any]], workers: int
+) -> tuple[float, float, float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    with ParseExecutor(mode, threshold=0, max_workers=workers) as executor:
+        # Warm the pool up so worker start-up is not measured.
+        await executor.run(
+            StatsResponse, {"success": True, "records": {}, "totals": {}}
+        )
+        ticker = asyncio.create_task(_ticker(lags, stop))
+        await asyncio.sleep(TICK * 2)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(executor.run(StatsResponse, payload) for payload in payloads)
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker
+    return elapsed, max(lags), statistics.fmean(lags)
+
+
+async def main(days: int, count: int, workers: int) -> None:
+    """Run the benchmark and print one line per mode."""
+    payloads = [make_payload(days, seed) for seed in range(count)]
+    points = sum(len(series) for series in payloads[0]["records"].values())
+    print(f"{count} payloads of {days} days ({points} points each)")
+    print(f"{'mode':<12} {'wall s':>8} {'max lag ms':>11} {'mean lag ms':>12}")
+    for mode in ParseMode:
+        elapsed, worst, mean = await _run_mode(mode, payloads, workers)
+        print(f"{mode:<12} {elapsed:>8.2f} {worst * 1000:>11.1f} {mean * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--payloads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.payloads, args.workers))
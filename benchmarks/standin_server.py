@@ -0,0 +1,188 @@
+"""Local stand-in for the VRM API speaking HTTP/1.1 and cleartext HTTP/2.
+
+Answers every request with the same JSON body after a fixed delay,
+which stands in for the network round trip and server time of the real
+API. HTTP/2 is spoken with prior knowledge (h2c), so clients must
+disable HTTP/1.1 to use it; that avoids setting up TLS locally.
+
+Needs the ``h2`` package, like the client's HTTP/2 support.
+"""
+
+import asyncio
+import contextlib
+import json
+from typing import Any, Self
+
+import h2.config
+import h2.connection
+import h2.events
+
+_PREFACE_REST = b"\r\nSM\r\n\r\n"
+
+
+class StandInServer:
+    """Serve a fixed JSON body over HTTP/1.1 and HTTP/2."""
+
+    def __init__(self, payload: dict[str, Any], latency: float = 0.02) -> None:
+        """Initialize the server.
+
+        :param payload: JSON body of every response.
+        :param latency: Seconds to wait before answering each request.
+        """
+        self.body = json.dumps(payload).encode()
+        self.latency = latency
+        self.connections = 0
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task[Any]] = set()
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on."""
+        assert self._server is not None  # noqa: S101
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to the client."""
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening on an ephemeral local port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Stop the server and drop open connections."""
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def __aenter__(self) -> Self:
+        """Start the server."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the server."""
+        await self.stop()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None  # noqa: S101
+        self._handlers.add(task)
+        self._writers.add(writer)
+        self.connections += 1
+        try:
+            first = await reader.readline()
+            if first == b"PRI * HTTP/2.0\r\n":
+                await reader.readexactly(len(_PREFACE_REST))
+                await _H2Handler(self, reader, writer).run(first + _PREFACE_REST)
+            else:
+                await self._serve_http11(first, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _serve_http11(
+        self,
+        first: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        line = first
+        while line:
+            while (await reader.readline()).strip():
+                pass  # Skip headers; requests carry no body.
+            await asyncio.sleep(self.latency)
+            body = b"" if line.startswith(b"HEAD ") else self.body
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(self.body), body)
+            )
+            await writer.drain()
+            line = await reader.readline()
+
+
+class _H2Handler:
+    """One HTTP/2 connection, answering each stream concurrently."""
+
+    def __init__(
+        self,
+        server: StandInServer,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False)
+        )
+        self.window_open = asyncio.Condition()
+        self.streams: set[asyncio.Task[None]] = set()
+
+    def _flush(self) -> None:
+        self.writer.write(self.conn.data_to_send())
+
+    async def run(self, preface: bytes) -> None:
+        self.conn.initiate_connection()
+        data = preface
+        try:
+            while data:
+                for event in self.conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        head = (b":method", b"HEAD") in event.headers
+                        task = asyncio.create_task(
+                            self._respond(event.stream_id, head=head)
+                        )
+                        self.streams.add(task)
+                        task.add_done_callback(self.streams.discard)
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        async with self.window_open:
+                            self.window_open.notify_all()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                self._flush()
+                await self.writer.drain()
+                data = await self.reader.read(65536)
+        finally:
+            for task in self.streams:
+                task.cancel()
+
+    async def _respond(self, stream_id: int, *, head: bool) -> None:
+        await asyncio.sleep(self.server.latency)
+        body = self.server.body
+        self.conn.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(body))),
+            ],
+            end_stream=head,
+        )
+        if head:
+            body = b""
+            self._flush()
+        while body:
+            async with self.window_open:
+                await self.window_open.wait_for(
+                    lambda: self.conn.local_flow_control_window(stream_id) > 0
+                )
+            size = min(
+                len(body),
+                self.conn.local_flow_control_window(stream_id),
+                self.conn.max_outbound_frame_size,
+            )
+            self.conn.send_data(stream_id, body[:size], end_stream=size == len(body))
+            body = body[size:]
+            self._flush()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.drain()
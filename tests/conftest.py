@@ -1,10 +1,96 @@
 """Shared test fixtures for vrmapi-async tests."""
 
+import base64
+import json
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime, timezone, tzinfo
+from typing import Any
+
+import httpx
 import pytest
 import respx
 
 from vrmapi_async.client import VRMAsyncAPI
 
+BASE = "https://vrmapi.victronenergy.com/v2"
+
+
+def make_jwt(exp: float) -> str:
+    """Return an unsigned JWT-shaped token carrying an ``exp`` claim."""
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode())
+    return f"header.{claims.decode().rstrip('=')}.signature"
+
+
+def login_response(token: str) -> httpx.Response:
+    """Return a successful /auth/login response for user 22."""
+    return httpx.Response(
+        200,
+        json={
+            "token": token,
+            "idUser": 22,
+            "verification_mode": "pin",
+            "verification_sent": False,
+            "status": "ok",
+        },
+    )
+
+
+def mock_logins(respx_mock: respx.MockRouter, tokens: list[str]) -> respx.Route:
+    """Mock /auth/login to hand out ``tokens``, one per login."""
+    return respx_mock.post(f"{BASE}/auth/login").mock(
+        side_effect=[login_response(token) for token in tokens]
+    )
+
+
+def ms(value: datetime | int, *args: int, tz: tzinfo = timezone.utc) -> int:
+    """Return epoch milliseconds of a datetime, or of ``datetime(value, *args)``.
+
+    Naive datetimes built from components are taken in ``tz``.
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value, *args, tzinfo=tz)
+    return int(value.timestamp() * 1000)
+
+
+def make_stats_payload(
+    timestamps: Iterable[int],
+    value: float | Sequence[float] = 1.0,
+    *,
+    attribute: str = "Pc",
+    spread: tuple[float, float] | None = None,
+    totals: dict[str, Any] | None = None,
+    missing: str = "Gc",
+) -> dict[str, Any]:
+    """Return a raw /stats payload with one series and one absent attribute.
+
+    :param timestamps: Point timestamps in epoch milliseconds.
+    :param value: Mean of every point, or one mean per point.
+    :param attribute: Attribute code of the series.
+    :param spread: Factors of the mean giving each point's min and max;
+        points carry only a mean when omitted.
+    :param totals: Totals of the payload, defaults to the sum of the means.
+    :param missing: Attribute code reported as ``False`` (no data).
+    """
+    timestamps = list(timestamps)
+    means = list(value) if isinstance(value, Sequence) else [value] * len(timestamps)
+    rows = [
+        [ts, mean] if spread is None else [ts, mean, mean * spread[0], mean * spread[1]]
+        for ts, mean in zip(timestamps, means, strict=True)
+    ]
+    if totals is None:
+        totals = {attribute: float(sum(means)), missing: False}
+    return {
+        "success": True,
+        "records": {attribute: rows, missing: False},
+        "totals": totals,
+    }
+
+
+@pytest.fixture()
+def stats_payload() -> Callable[..., dict[str, Any]]:
+    """Return :func:`make_stats_payload` for building /stats payloads."""
+    return make_stats_payload
+
 
 # Marker registration
 def pytest_configure(config):
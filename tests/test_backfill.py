@@ -0,0 +1,211 @@
+"""Tests for the checkpointed backfill runner."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.client.installations.schema import StatsInterval, StatsType
+from vrmapi_async.stats.backfill import (
+    BackfillProgress,
+    BackfillRunner,
+    FileBackfillCheckpoint,
+    MemoryBackfillCheckpoint,
+    SQLiteBackfillCheckpoint,
+)
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=63)  # 3 chunks at hourly interval
+
+PAYLOAD = {
+    "success": True,
+    "records": {"Pc": [[1, 1.0], [2, 2.0]], "Gc": False},
+    "totals": {},
+}
+
+
+def mock_sites(*site_ids, response=None):
+    return {
+        site_id: respx.get(f"{BASE}/installations/{site_id}/stats").mock(
+            return_value=response or httpx.Response(200, json=PAYLOAD)
+        )
+        for site_id in site_ids
+    }
+
+
+@pytest.fixture(params=["memory", "file", "sqlite"])
+def checkpoint(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackfillCheckpoint()
+    if request.param == "file":
+        return FileBackfillCheckpoint(tmp_path / "done.log")
+    return SQLiteBackfillCheckpoint(tmp_path / "done.db")
+
+
+class TestCheckpoints:
+    def test_roundtrip(self, checkpoint):
+        checkpoint.mark_done("a")
+        checkpoint.mark_done("b")
+        assert checkpoint.completed() == {"a", "b"}
+        checkpoint.close()
+
+    def test_file_ignores_partial_line(self, tmp_path):
+        path = tmp_path / "done.log"
+        path.write_text("a\nb\npart")
+        assert FileBackfillCheckpoint(path).completed() == {"a", "b"}
+
+
+class TestProgress:
+    def test_eta_and_rate(self):
+        progress = BackfillProgress(total_units=10, started_at=0.0)
+        assert progress.eta is None
+        progress.done_units = 5
+        progress.points = 100
+        assert progress.remaining_units == 5
+        assert progress.eta is not None
+        assert progress.points_per_second > 0
+
+
+@pytest.mark.asyncio
+class TestBackfillRunner:
+    async def test_runs_all_units(self, mock_api, checkpoint):
+        routes = mock_sites(1, 2)
+        await mock_api.connect()
+        results = []
+        runner = BackfillRunner(
+            mock_api.installations,
+            checkpoint,
+            on_result=lambda unit, _resp: results.append(unit),
+            max_concurrency=2,
+        )
+        progress = await runner.run(
+            [1, 2], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS
+        )
+        assert progress.total_units == 6
+        assert progress.done_units == 6
+        assert progress.points == 12
+        assert len(results) == 6
+        assert all(route.call_count == 3 for route in routes.values())
+        assert len(checkpoint.completed()) == 6
+
+    async def test_resume_skips_completed_units(self, mock_api, tmp_path):
+        path = tmp_path / "done.db"
+        routes = mock_sites(1)
+        await mock_api.connect()
+        units = BackfillRunner.plan_units(
+            [1], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS
+        )
+        first = SQLiteBackfillCheckpoint(path)
+        first.mark_done(units[0].key)
+        first.close()
+
+        runner = BackfillRunner(mock_api.installations, SQLiteBackfillCheckpoint(path))
+        progress = await runner.run(
+            [1], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS
+        )
+        assert progress.skipped_units == 1
+        assert progress.done_units == 2
+        assert routes[1].call_count == 2
+
+    async def test_other_parameters_are_not_skipped(self, mock_api, checkpoint):
+        routes = mock_sites(1)
+        await mock_api.connect()
+        runner = BackfillRunner(mock_api.installations, checkpoint)
+        await runner.run([1], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS)
+        runs = [
+            (StatsType.KWH, StatsInterval.HOURS, None),
+            (StatsType.CONSUMPTION, StatsInterval.TWO_HOURS, None),
+            (StatsType.CUSTOM, StatsInterval.HOURS, ["Pc"]),
+            (StatsType.CUSTOM, StatsInterval.HOURS, ["bs"]),
+        ]
+        for stats_type, interval, codes in runs:
+            progress = await runner.run(
+                [1], START, END, stats_type, interval, attribute_codes=codes
+            )
+            assert progress.skipped_units == 0
+            assert progress.done_units == progress.total_units
+        progress = await runner.run(
+            [1],
+            START,
+            END,
+            StatsType.CUSTOM,
+            StatsInterval.HOURS,
+            attribute_codes=["bs"],
+        )
+        assert progress.skipped_units == progress.total_units
+        assert routes[1].call_count > progress.total_units
+
+    async def test_failures_are_recorded_not_checkpointed(self, mock_api):
+        mock_sites(1)
+        mock_sites(2, response=httpx.Response(404, text="gone"))
+        await mock_api.connect()
+        checkpoint = MemoryBackfillCheckpoint()
+        runner = BackfillRunner(mock_api.installations, checkpoint)
+        progress = await runner.run(
+            [1, 2], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS
+        )
+        assert progress.done_units == 3
+        assert len(progress.failed) == 3
+        assert all(unit.site_id == 2 for unit, _ in progress.failed)
+        assert len(checkpoint.completed()) == 3
+
+    async def test_async_result_callback_and_progress(self, mock_api):
+        mock_sites(1)
+        await mock_api.connect()
+        seen = []
+        snapshots = []
+
+        async def sink(unit, response):
+            seen.append(unit.key)
+
+        runner = BackfillRunner(
+            mock_api.installations,
+            MemoryBackfillCheckpoint(),
+            on_result=sink,
+            on_progress=lambda p: snapshots.append(p.done_units),
+        )
+        await runner.run([1], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS)
+        assert len(seen) == 3
+        assert snapshots == [1, 2, 3]
+
+    async def test_stop_finishes_in_flight_units(self, mock_api):
+        mock_sites(1, 2)
+        await mock_api.connect()
+        checkpoint = MemoryBackfillCheckpoint()
+        runner = BackfillRunner(
+            mock_api.installations,
+            checkpoint,
+            on_progress=lambda _progress: runner.stop(),
+            max_concurrency=1,
+        )
+        progress = await runner.run(
+            [1, 2], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS
+        )
+        assert progress.done_units == 1
+        assert len(checkpoint.completed()) == 1
+
+    async def test_cancel_keeps_completed_checkpoints(self, mock_api):
+        mock_sites(1)
+        await mock_api.connect()
+        checkpoint = MemoryBackfillCheckpoint()
+        gate = asyncio.Event()
+
+        async def sink(unit, response):
+            if checkpoint.completed():
+                await gate.wait()  # block forever after the first unit
+
+        runner = BackfillRunner(
+            mock_api.installations, checkpoint, on_result=sink, max_concurrency=1
+        )
+        task = asyncio.create_task(
+            runner.run([1], START, END, StatsType.CONSUMPTION, StatsInterval.HOURS)
+        )
+        while not checkpoint.completed():
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(checkpoint.completed()) == 1
@@ -0,0 +1,160 @@
+"""Tests for the per-route circuit breaker."""
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.circuit import CircuitBreaker, CircuitState, attempt_failed
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.exceptions import VRMCircuitOpenError
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def status_error(status):
+    request = httpx.Request("GET", "https://example.com")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+def run(breaker, route, error=None):
+    with breaker.guard(route):
+        if error is not None:
+            raise error
+
+
+def trip(breaker, route="R"):
+    for _ in range(breaker.min_attempts):
+        with pytest.raises((httpx.HTTPStatusError, VRMCircuitOpenError)):
+            run(breaker, route, status_error(503))
+    assert breaker.state(route) is CircuitState.OPEN
+
+
+class TestAttemptFailed:
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            (None, False),
+            (status_error(503), True),
+            (status_error(404), False),
+            (status_error(429), False),
+            (httpx.ConnectTimeout("timeout"), True),
+            (ValueError("bad json"), None),
+        ],
+    )
+    def test_classification(self, error, expected):
+        assert attempt_failed(error) is expected
+
+
+class TestCircuitBreaker:
+    @pytest.fixture()
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture()
+    def breaker(self, clock):
+        return CircuitBreaker(
+            failure_rate=0.5, window=4, min_attempts=4, open_for=10.0, clock=clock
+        )
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError, match="failure_rate"):
+            CircuitBreaker(failure_rate=0.0)
+        with pytest.raises(ValueError, match="min_attempts"):
+            CircuitBreaker(window=5, min_attempts=6)
+
+    def test_opens_at_failure_rate(self, breaker):
+        run(breaker, "R")
+        run(breaker, "R")
+        with pytest.raises(httpx.HTTPStatusError):
+            run(breaker, "R", status_error(500))
+        assert breaker.state("R") is CircuitState.CLOSED
+        # The failure that opens the circuit is reported as such.
+        with pytest.raises(VRMCircuitOpenError) as exc_info:
+            run(breaker, "R", status_error(502))
+        assert exc_info.value.status_code == 502
+        assert breaker.state("R") is CircuitState.OPEN
+        assert breaker.state("OTHER") is CircuitState.CLOSED
+
+    def test_open_circuit_rejects(self, breaker, clock):
+        trip(breaker)
+        clock.now = 4.0
+        with pytest.raises(VRMCircuitOpenError) as exc_info:
+            run(breaker, "R")
+        assert exc_info.value.route == "R"
+        assert exc_info.value.retry_after == pytest.approx(6.0)
+        assert breaker.circuits["R"].rejected == 1
+
+    def test_probe_success_closes(self, breaker, clock):
+        trip(breaker)
+        clock.now = 10.0
+        assert breaker.state("R") is CircuitState.HALF_OPEN
+        # Only one probe at a time.
+        with breaker.guard("R"), pytest.raises(VRMCircuitOpenError):
+            run(breaker, "R")
+        assert breaker.state("R") is CircuitState.CLOSED
+        assert len(breaker.circuits["R"].outcomes) == 0
+
+    def test_probe_failure_reopens(self, breaker, clock):
+        trip(breaker)
+        clock.now = 10.0
+        with pytest.raises(VRMCircuitOpenError):
+            run(breaker, "R", httpx.ConnectError("refused"))
+        assert breaker.state("R") is CircuitState.OPEN
+        assert breaker.circuits["R"].times_opened == 2
+        clock.now = 19.0
+        assert breaker.state("R") is CircuitState.OPEN
+
+    def test_unclassified_errors_are_ignored(self, breaker):
+        for _ in range(5):
+            with pytest.raises(ValueError, match="boom"):
+                run(breaker, "R", ValueError("boom"))
+        assert len(breaker.circuits["R"].outcomes) == 0
+
+
+@pytest.mark.asyncio
+class TestClientCircuit:
+    @respx.mock
+    async def test_outage_fails_fast(self):
+        route = respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(503, text="down")
+        )
+        breaker = CircuitBreaker(window=4, min_attempts=4)
+        async with VRMAsyncAPI(
+            token="t",
+            user_id_for_token=1,
+            max_retries=5,
+            retry_backoff_base=0.0,
+            circuit_breaker=breaker,
+        ) as client:
+            with pytest.raises(VRMCircuitOpenError) as exc_info:
+                await client.installations.get_stats(1)
+            # Retries stop once the circuit opens.
+            assert route.call_count == 4
+            assert exc_info.value.route == "INSTALLATIONS_STATS"
+            with pytest.raises(VRMCircuitOpenError):
+                await client.installations.get_stats(1)
+            assert route.call_count == 4
+
+    @respx.mock
+    async def test_success_keeps_circuit_closed(self):
+        respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        breaker = CircuitBreaker(window=4, min_attempts=4)
+        async with VRMAsyncAPI(
+            token="t", user_id_for_token=1, circuit_breaker=breaker
+        ) as client:
+            for _ in range(5):
+                await client.installations.get_stats(1)
+        assert breaker.state("INSTALLATIONS_STATS") is CircuitState.CLOSED
@@ -1,9 +1,13 @@
 """Test VRMAsyncAPI client: constructor validation, auth, and _request."""
 
+import asyncio
+import time
+
 import httpx
 import pytest
 import respx
 
+from tests.conftest import login_response, make_jwt, mock_logins
 from vrmapi_async.client import VRMAsyncAPI
 from vrmapi_async.exceptions import VRMAPIRequestError, VRMAuthenticationError
 from vrmapi_async.routes import VRMRoutes
@@ -309,3 +313,103 @@ class TestRequestRetries:
             await mock_api_with_retries._request("GET", "/endpoint")
         assert exc_info.value.status_code == 403
         assert route.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# _request — re-authentication
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+class TestReauthentication:
+    async def test_concurrent_401s_share_one_login(self, respx_mock):
+        login = mock_logins(respx_mock, ["old", "new"])
+
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            if request.headers["X-Authorization"] == "Bearer old":
+                return httpx.Response(401, text="Token expired")
+            return httpx.Response(200, json={"ok": True})
+
+        route = respx_mock.get(f"{BASE}/test").mock(side_effect=handler)
+        client = VRMAsyncAPI(username="u", password="p", max_retries=0)
+        await client.connect()
+        results = await asyncio.gather(
+            *(client._request("GET", "/test") for _ in range(5))
+        )
+        assert results == [{"ok": True}] * 5
+        assert login.call_count == 2
+        assert route.call_count == 10
+
+    async def test_second_401_is_raised(self, respx_mock):
+        login = mock_logins(respx_mock, ["old", "new"])
+        respx_mock.get(f"{BASE}/test").mock(return_value=httpx.Response(401))
+        client = VRMAsyncAPI(username="u", password="p", max_retries=0)
+        await client.connect()
+        with pytest.raises(VRMAPIRequestError) as exc_info:
+            await client._request("GET", "/test")
+        assert exc_info.value.status_code == 401
+        assert login.call_count == 2
+
+    async def test_disabled(self, respx_mock):
+        login = mock_logins(respx_mock, ["old"])
+        respx_mock.get(f"{BASE}/test").mock(return_value=httpx.Response(401))
+        client = VRMAsyncAPI(
+            username="u", password="p", max_retries=0, reauthenticate=False
+        )
+        await client.connect()
+        with pytest.raises(VRMAPIRequestError):
+            await client._request("GET", "/test")
+        assert login.call_count == 1
+
+    async def test_token_mode_does_not_log_in(self, mock_api, respx_mock):
+        respx_mock.get(f"{BASE}/test").mock(return_value=httpx.Response(401))
+        await mock_api.connect()
+        with pytest.raises(VRMAPIRequestError):
+            await mock_api._request("GET", "/test")
+        assert respx_mock.calls.call_count == 1
+
+    async def test_token_refreshed_before_expiry(self, respx_mock):
+        fresh = make_jwt(time.time() + 3600)
+        login = mock_logins(respx_mock, [make_jwt(time.time() + 0.1), fresh])
+        respx_mock.post(f"{BASE}/auth/logout").mock(
+            return_value=httpx.Response(200, json={"success": True})
+        )
+        client = VRMAsyncAPI(username="u", password="p")
+        client.MIN_TOKEN_REFRESH_DELAY = 0.01
+        async with client:
+            await asyncio.sleep(0.2)
+            assert login.call_count == 2
+            assert client._auth_token == fresh
+        assert client._refresh_task is None
+
+    async def test_refresh_stops_when_login_is_rejected(self, respx_mock):
+        login = respx_mock.post(f"{BASE}/auth/login").mock(
+            side_effect=[
+                login_response(make_jwt(time.time() + 0.05)),
+                httpx.Response(401, json={"success": False}),
+            ]
+        )
+        client = VRMAsyncAPI(username="u", password="p")
+        client.MIN_TOKEN_REFRESH_DELAY = 0.01
+        await client.connect()
+        await asyncio.sleep(0.3)
+        assert login.call_count == 2
+        assert client._refresh_task is not None
+        assert client._refresh_task.done()
+        await client.disconnect(keep_session=True)
+
+    async def test_refresh_backs_off_after_errors(self, respx_mock):
+        login = respx_mock.post(f"{BASE}/auth/login").mock(
+            side_effect=[
+                login_response(make_jwt(time.time() + 0.05)),
+                *[httpx.Response(503)] * 10,
+            ]
+        )
+        client = VRMAsyncAPI(username="u", password="p")
+        client.MIN_TOKEN_REFRESH_DELAY = 0.01
+        await client.connect()
+        await asyncio.sleep(0.3)
+        # Refreshes wait 0.02, 0.04, 0.08 and 0.16 s after the first failure.
+        assert login.call_count <= 5
+        await client.disconnect(keep_session=True)
@@ -0,0 +1,113 @@
+"""Tests for the compressed stats series codec."""
+
+import itertools
+import math
+import random
+
+import pytest
+
+from vrmapi_async.client.installations.schema import StatsRecord
+from vrmapi_async.stats.codec import EncodedSeries
+
+QUARTER_MS = 15 * 60 * 1000
+START_MS = 1_704_067_200_000
+
+
+def quarter_hour_records(count, seed=0):
+    rng = random.Random(seed)  # noqa: S311
+    records = []
+    for i in range(count):
+        mean = round(rng.uniform(0, 5000), 2)
+        records.append(
+            StatsRecord(
+                timestamp=START_MS + i * QUARTER_MS,
+                mean=mean,
+                min=round(mean * 0.8, 2),
+                max=round(mean * 1.2, 2),
+            )
+        )
+    return records
+
+
+class TestRoundtrip:
+    def test_records(self):
+        records = quarter_hour_records(500)
+        encoded = EncodedSeries.from_records(records)
+        assert len(encoded) == 500
+        assert encoded.to_records() == records
+
+    def test_none_values_and_two_element_records(self):
+        records = [
+            StatsRecord(timestamp=START_MS, mean=1.0),
+            StatsRecord(timestamp=START_MS + QUARTER_MS, mean=None),
+            StatsRecord(timestamp=START_MS + 2 * QUARTER_MS, mean=2.5),
+        ]
+        assert EncodedSeries.from_records(records).to_records() == records
+
+    def test_irregular_timestamps_and_extremes(self):
+        timestamps = [
+            0,
+            1,
+            1000,
+            QUARTER_MS,
+            QUARTER_MS * 2,
+            10**12,
+            10**12 + 3,
+            -5,
+        ]
+        values = [0.0, -0.0, 1e308, -1e-308, math.inf, -math.inf, 123.456, 7.0]
+        encoded = EncodedSeries.from_columns(timestamps, values)
+        ts, mean, low, high = encoded.to_columns()
+        assert ts == timestamps
+        assert [math.copysign(1, v) for v in mean] == [
+            math.copysign(1, v) for v in values
+        ]
+        assert mean == values
+        assert low == [None] * len(values)
+        assert high == [None] * len(values)
+
+    def test_columns(self):
+        records = quarter_hour_records(50)
+        encoded = EncodedSeries.from_columns(
+            [r.timestamp for r in records],
+            [r.mean for r in records],
+            [r.min for r in records],
+            [r.max for r in records],
+        )
+        assert encoded == EncodedSeries.from_records(records)
+
+    def test_empty(self):
+        encoded = EncodedSeries.from_records([])
+        assert len(encoded) == 0
+        assert encoded.to_records() == []
+        assert encoded.to_columns() == ([], [], [], [])
+
+    def test_bytes(self):
+        encoded = EncodedSeries.from_records(quarter_hour_records(100))
+        restored = EncodedSeries.from_bytes(encoded.to_bytes())
+        assert restored == encoded
+        assert restored.to_records() == encoded.to_records()
+
+    def test_bad_header(self):
+        with pytest.raises(ValueError, match="bad header"):
+            EncodedSeries.from_bytes(b"NOPE\x01\x00\x00\x00\x00")
+
+
+class TestCompression:
+    def test_regular_cadence_is_compact(self):
+        records = [
+            StatsRecord(timestamp=START_MS + i * QUARTER_MS, mean=1.0)
+            for i in range(1000)
+        ]
+        encoded = EncodedSeries.from_records(records)
+        # One bit each for timestamp, mean, min and max after the first point.
+        assert encoded.nbytes < 1000 * 4 // 8 + 64
+
+    def test_lazy_iteration(self):
+        encoded = EncodedSeries.from_records(quarter_hour_records(1000))
+        first = list(itertools.islice(encoded, 3))
+        assert [p[0] for p in first] == [
+            START_MS,
+            START_MS + QUARTER_MS,
+            START_MS + 2 * QUARTER_MS,
+        ]
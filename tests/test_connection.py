@@ -0,0 +1,214 @@
+"""Tests for connection settings and reuse statistics."""
+
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+from benchmarks.standin_server import StandInServer
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.connection import ConnectionSettings, ConnectionStats, prewarm
+from vrmapi_async.metrics import MetricsRegistry
+from vrmapi_async.prometheus import render
+from vrmapi_async.tracing import InMemoryTracer
+
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+class TestConnectionSettings:
+    def test_httpx_kwargs(self):
+        kwargs = ConnectionSettings(
+            max_connections=7, keepalive_expiry=1.0
+        ).httpx_kwargs()
+        assert kwargs["http2"] is False
+        assert kwargs["limits"] == httpx.Limits(
+            max_connections=7, max_keepalive_connections=20, keepalive_expiry=1.0
+        )
+
+    def test_fan_out(self):
+        settings = ConnectionSettings.fan_out(max_connections=2)
+        assert settings.http2
+        assert settings.max_keepalive_connections == 2
+
+    def test_no_protocol(self):
+        with pytest.raises(ValueError, match="http1 and http2"):
+            ConnectionSettings(http1=False)
+
+    def test_keep_warm_must_beat_expiry(self):
+        with pytest.raises(ValueError, match="keep_warm_interval"):
+            ConnectionSettings(keepalive_expiry=5.0, keep_warm_interval=5.0)
+
+    def test_explicit_httpx_kwargs_win(self):
+        client = VRMAsyncAPI(
+            token="t",
+            user_id_for_token=1,
+            connection=ConnectionSettings(track_reuse=False),
+            httpx_client_kwargs={"http2": True},
+        )
+        assert client.connection_stats is None
+        assert client._client._transport._pool._http2
+
+
+@pytest.mark.asyncio
+async def test_stats_from_trace_events():
+    stats = ConnectionStats()
+    for event in (
+        "connection.connect_tcp.complete",
+        "connection.start_tls.complete",
+        "http2.send_request_headers.started",
+        "http2.send_request_headers.started",
+        "http2.send_request_headers.started",
+        "connection.connect_tcp.failed",
+    ):
+        await stats.trace(event, {})
+    assert stats.as_dict() == {
+        "connections_opened": 1,
+        "connect_failures": 1,
+        "tls_handshakes": 1,
+        "requests": {"http2": 3},
+        "reused_requests": 2,
+        "reuse_ratio": pytest.approx(2 / 3),
+    }
+    stats.reset()
+    assert stats.total_requests == 0
+    assert stats.reuse_ratio == 0.0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("settings", "protocol", "connections"),
+    [
+        (ConnectionSettings(max_connections=2), "http11", 2),
+        (ConnectionSettings(http2=True, http1=False, max_connections=1), "http2", 1),
+    ],
+)
+async def test_requests_share_connections(settings, protocol, connections):
+    tracer = InMemoryTracer()
+    async with StandInServer(STATS_PAYLOAD, latency=0.01) as server:
+        client = VRMAsyncAPI(
+            token="t",
+            user_id_for_token=1,
+            base_url=server.base_url,
+            connection=settings,
+            tracer=tracer,
+        )
+        await client.connect()
+        await asyncio.gather(*(client.installations.get_stats(i) for i in range(6)))
+        await client.disconnect()
+    stats = client.connection_stats
+    assert stats.connections_opened == connections
+    assert stats.requests == {protocol: 6}
+    assert stats.reused_requests == 6 - connections
+    # Spans still see the connection phases next to the stats.
+    assert len(tracer.find("http.connection.connect_tcp")) == connections
+
+
+@pytest.mark.asyncio
+class TestPrewarm:
+    async def test_connect_opens_warm_connections(self):
+        metrics = MetricsRegistry()
+        tracer = InMemoryTracer()
+        settings = ConnectionSettings(max_connections=5, prewarm=3)
+        async with StandInServer(STATS_PAYLOAD, latency=0.01) as server:
+            client = VRMAsyncAPI(
+                token="t",
+                user_id_for_token=1,
+                base_url=server.base_url,
+                connection=settings,
+                metrics=metrics,
+                tracer=tracer,
+            )
+            await client.connect()
+            assert server.connections == 3
+            await asyncio.gather(*(client.installations.get_stats(i) for i in range(3)))
+            await client.disconnect()
+            assert server.connections == 3
+
+        snap = metrics.snapshot()
+        assert snap.warmup.count == 1
+        assert snap.warmup.seconds > 0
+        assert snap.warmup_connections == 3
+        assert "vrm_client_connection_warmup_connections_total 3" in render(snap)
+        (span,) = tracer.find("vrm.prewarm")
+        assert span.attributes == {"vrm.connections": 3, "vrm.opened": 3}
+        (connect,) = tracer.find("vrm.connect")
+        assert span.parent_id == connect.span_id
+
+    async def test_keep_warm_until_disconnect(self):
+        metrics = MetricsRegistry()
+        settings = ConnectionSettings(
+            prewarm=1, keep_warm_interval=0.02, keepalive_expiry=1.0
+        )
+        async with StandInServer(STATS_PAYLOAD, latency=0.0) as server:
+            client = VRMAsyncAPI(
+                token="t",
+                user_id_for_token=1,
+                base_url=server.base_url,
+                connection=settings,
+                metrics=metrics,
+            )
+            await client.connect()
+            await asyncio.sleep(0.1)
+            await client.disconnect()
+            count = metrics.snapshot().warmup.count
+            await asyncio.sleep(0.05)
+        assert count >= 3
+        assert metrics.snapshot().warmup.count == count
+        # Touching idle connections reuses them instead of opening more.
+        assert server.connections == 1
+
+    async def test_failures_are_logged(self, caplog):
+        async with httpx.AsyncClient(base_url="http://127.0.0.1:1") as client:
+            with caplog.at_level(logging.WARNING):
+                assert await prewarm(client, 2) == 0
+        assert "Warming up a connection failed" in caplog.text
+
+
+@pytest.mark.asyncio
+class TestSharedPool:
+    async def test_shared_transport(self):
+        transport = ConnectionSettings(max_connections=1).transport()
+        async with StandInServer(STATS_PAYLOAD, latency=0.0) as server:
+            clients = [
+                VRMAsyncAPI(
+                    token=f"t{i}",
+                    user_id_for_token=i,
+                    base_url=server.base_url,
+                    transport=transport,
+                )
+                for i in (1, 2)
+            ]
+            for client in clients:
+                await client.connect()
+                await client.installations.get_stats(1)
+            await clients[0].disconnect()
+            await clients[1].installations.get_stats(2)
+            await clients[1].disconnect()
+            assert server.connections == 1
+            await transport.aclose()
+
+    async def test_shared_client_is_not_closed(self):
+        async with (
+            StandInServer(STATS_PAYLOAD, latency=0.0) as server,
+            httpx.AsyncClient(base_url=server.base_url) as shared,
+        ):
+            async with VRMAsyncAPI(
+                token="t", user_id_for_token=1, http_client=shared
+            ) as client:
+                await client.installations.get_stats(1)
+            assert not shared.is_closed
+            assert (await shared.get("/installations/1/stats")).is_success
+
+    @pytest.mark.parametrize(
+        ("kwargs", "match"),
+        [
+            ({"httpx_client_kwargs": {"http2": True}}, "cannot be combined"),
+            ({"transport": httpx.AsyncHTTPTransport()}, "cannot be combined"),
+            ({"http_client": httpx.AsyncClient()}, "needs a base_url"),
+        ],
+    )
+    async def test_invalid_shared_client(self, kwargs, match):
+        kwargs.setdefault("http_client", httpx.AsyncClient(base_url="http://x"))
+        with pytest.raises(ValueError, match=match):
+            VRMAsyncAPI(token="t", user_id_for_token=1, **kwargs)
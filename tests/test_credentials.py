@@ -0,0 +1,240 @@
+"""Tests for per-call credentials on a shared client."""
+
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.credentials import Credential, CredentialPool, token_expiry
+from vrmapi_async.exceptions import VRMAPIRequestError, VRMAuthenticationError
+from vrmapi_async.metrics import MetricsRegistry, RequestKey
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+class TestCredential:
+    def test_header_and_auth_mode(self):
+        token = Credential("abc", 7)
+        bearer = Credential("jwt", 8, scheme="Bearer")
+        assert token.header == "Token abc"
+        assert token.auth_mode == "token"
+        assert bearer.header == "Bearer jwt"
+        assert bearer.auth_mode == "bearer"
+
+    def test_repr_hides_token(self):
+        assert "secret" not in repr(Credential("secret", 7))
+
+
+class TestTokenExpiry:
+    @staticmethod
+    def jwt(claims):
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode()
+        return f"h.{payload.rstrip('=')}.s"
+
+    def test_reads_exp_claim(self):
+        assert token_expiry(self.jwt({"exp": 1700000000, "uid": 1})) == 1700000000
+
+    @pytest.mark.parametrize(
+        "token",
+        ["opaque-token", "a.b.c", "h.!!!.s"],
+    )
+    def test_not_a_jwt(self, token):
+        assert token_expiry(token) is None
+
+    @pytest.mark.parametrize("claims", [{}, {"exp": "soon"}, {"exp": True}, [1]])
+    def test_no_usable_exp(self, claims):
+        assert token_expiry(self.jwt(claims)) is None
+
+
+class TestMultiTenant:
+    def test_requires_auth_unless_multi_tenant(self):
+        with pytest.raises(ValueError, match="authentication"):
+            VRMAsyncAPI()
+        client = VRMAsyncAPI(multi_tenant=True)
+        assert client._auth_mode == "none"
+
+    @pytest.mark.asyncio
+    async def test_plain_calls_need_a_login(self):
+        async with VRMAsyncAPI(multi_tenant=True) as client:
+            with pytest.raises(VRMAuthenticationError):
+                await client.users.about_me()
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_concurrent_sessions_send_their_own_token(self):
+        seen = []
+
+        def handler(request):
+            seen.append(
+                (request.url.path.split("/")[3], request.headers["X-Authorization"])
+            )
+            return httpx.Response(200, json=STATS_PAYLOAD)
+
+        respx.get(url__regex=rf"{BASE}/installations/\d+/stats").mock(
+            side_effect=handler
+        )
+        credentials = [Credential(f"tok{i}", i) for i in range(5)]
+        async with VRMAsyncAPI(multi_tenant=True) as client:
+            sessions = [client.with_credential(c) for c in credentials]
+            await asyncio.gather(
+                *(s.installations.get_stats(100 + s.user_id) for s in sessions)
+            )
+        assert sorted(seen) == [(f"{100 + i}", f"Token tok{i}") for i in range(5)]
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_session_alongside_own_login(self):
+        route = respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        registry = MetricsRegistry()
+        async with VRMAsyncAPI(
+            token="own", user_id_for_token=1, metrics=registry
+        ) as client:
+            await client.installations.get_stats(1)
+            session = client.with_credential(Credential("jwt", 2, scheme="Bearer"))
+            await session.installations.get_stats(1)
+        headers = [call.request.headers["X-Authorization"] for call in route.calls]
+        assert headers == ["Token own", "Bearer jwt"]
+        requests = registry.snapshot().requests
+        for mode in ("token", "bearer"):
+            key = RequestKey("INSTALLATIONS_STATS", "GET", "2xx", mode)
+            assert requests[key].count == 1
+
+
+class TestCredentialPool:
+    def test_needs_credentials(self):
+        with pytest.raises(ValueError, match="at least one"):
+            CredentialPool([])
+
+    @pytest.mark.asyncio
+    async def test_round_robin_takes_turns(self):
+        pool = CredentialPool([("a", 1), ("b", 2), ("c", 3)], "round_robin")
+        picked = []
+        for _ in range(6):
+            async with pool.lease() as credential:
+                picked.append(credential.token)
+        assert sorted(picked) == ["a", "a", "b", "b", "c", "c"]
+
+    @pytest.mark.asyncio
+    async def test_least_loaded_spreads_in_flight(self):
+        pool = CredentialPool([("a", 1), ("b", 2)])
+        first = await pool.acquire()
+        second = await pool.acquire()
+        assert {first.token, second.token} == {"a", "b"}
+        pool.release(first)
+        assert await pool.acquire() == first
+
+    @pytest.mark.asyncio
+    async def test_penalized_credential_is_skipped(self):
+        pool = CredentialPool([("a", 1), ("b", 2)])
+        pool.penalize(Credential("a", 1), 60)
+        assert pool.available() == 1
+        for _ in range(3):
+            async with pool.lease() as credential:
+                assert credential.token == "b"
+
+    @pytest.mark.asyncio
+    async def test_waits_when_all_penalized(self):
+        pool = CredentialPool([("a", 1)])
+        pool.penalize(Credential("a", 1), 0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await pool.acquire()
+        assert loop.time() - started >= 0.04
+
+
+class TestPooledClient:
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_requests_spread_over_tokens(self):
+        route = respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        pool = CredentialPool([("a", 1), ("b", 2)], "round_robin")
+        async with VRMAsyncAPI(credential_pool=pool) as client:
+            await asyncio.gather(*(client.installations.get_stats(1) for _ in range(4)))
+        headers = [call.request.headers["X-Authorization"] for call in route.calls]
+        assert sorted(headers) == ["Token a", "Token a", "Token b", "Token b"]
+        assert [s.requests for s in pool.states] == [2, 2]
+        assert [s.in_flight for s in pool.states] == [0, 0]
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_rate_limited_token_is_rotated_out(self):
+        def handler(request):
+            if request.headers["X-Authorization"] == "Token a":
+                return httpx.Response(429, headers={"Retry-After": "60"})
+            return httpx.Response(200, json=STATS_PAYLOAD)
+
+        route = respx.get(f"{BASE}/installations/1/stats").mock(side_effect=handler)
+        pool = CredentialPool([("a", 1), ("b", 2)], "round_robin")
+        async with VRMAsyncAPI(credential_pool=pool, retry_backoff_base=0.0) as client:
+            for _ in range(3):
+                await client.installations.get_stats(1)
+        # Only the first call hit "a"; it was retried at once with "b".
+        assert len(route.calls) == 4
+        assert pool.states[0].penalties == 1
+        assert pool.available() == 1
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_penalty_is_recorded_as_wait(self):
+        respx.get(f"{BASE}/installations/1/stats").mock(
+            side_effect=[
+                httpx.Response(429, headers={"Retry-After": "60"}),
+                httpx.Response(200, json=STATS_PAYLOAD),
+            ]
+        )
+        pool = CredentialPool([("a", 1), ("b", 2)])
+        metrics = MetricsRegistry()
+        async with VRMAsyncAPI(credential_pool=pool, metrics=metrics) as client:
+            await client.installations.get_stats(1)
+        assert metrics.snapshot().rate_limit_wait == {"INSTALLATIONS_STATS": 60.0}
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_credential_is_released_during_backoff(self, monkeypatch):
+        respx.get(f"{BASE}/installations/1/stats").mock(
+            side_effect=[
+                httpx.Response(503),
+                httpx.Response(200, json=STATS_PAYLOAD),
+            ]
+        )
+        pool = CredentialPool([("a", 1)])
+        in_flight = []
+        sleep = asyncio.sleep
+
+        async def record_sleep(delay):
+            in_flight.append(pool.states[0].in_flight)
+            await sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", record_sleep)
+        async with VRMAsyncAPI(credential_pool=pool) as client:
+            await client.installations.get_stats(1)
+        assert in_flight == [0]
+
+    @respx.mock
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_raise(self):
+        route = respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(429, headers={"Retry-After": "0"})
+        )
+        pool = CredentialPool([("a", 1), ("b", 2)])
+        async with VRMAsyncAPI(
+            credential_pool=pool, max_retries=2, retry_backoff_base=0.0
+        ) as client:
+            with pytest.raises(VRMAPIRequestError):
+                await client.installations.get_stats(1)
+        assert route.call_count == 3
+        assert sum(s.penalties for s in pool.states) == 2
+
+    def test_pool_is_an_exclusive_auth_method(self):
+        pool = CredentialPool([("a", 1)])
+        with pytest.raises(ValueError, match="Multiple"):
+            VRMAsyncAPI(token="t", user_id_for_token=1, credential_pool=pool)
@@ -0,0 +1,121 @@
+"""Tests for fleet-wide stats aggregation."""
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import httpx
+import pytest
+import respx
+
+from tests.conftest import ms
+from vrmapi_async.stats.fleet import aggregate_fleet
+from vrmapi_async.stats.resample import HAS_NUMPY
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=3)
+DAY_MS = 86_400_000
+
+
+def vectorized_params():
+    return [
+        False,
+        pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy")),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("vectorized", vectorized_params())
+class TestAggregateFleet:
+    async def test_sums_series_and_totals(self, mock_api, stats_payload, vectorized):
+        for site_id, value in ((1, 1.0), (2, 2.0), (3, 4.0)):
+            days = [ms(START) + d * DAY_MS for d in range(3)]
+            respx.get(f"{BASE}/installations/{site_id}/stats").mock(
+                return_value=httpx.Response(200, json=stats_payload(days, value))
+            )
+        await mock_api.connect()
+        result = await aggregate_fleet(
+            mock_api.installations,
+            [1, 2, 3],
+            START,
+            END,
+            max_concurrency=2,
+            vectorized=vectorized,
+        )
+
+        assert result.sites == 3
+        assert result.failed == {}
+        pc = result.series["Pc"]
+        assert pc.timestamps == [ms(START) + d * DAY_MS for d in range(3)]
+        assert pc.values == [7.0, 7.0, 7.0]
+        assert pc.sites == [3, 3, 3]
+        assert pc.to_records()[0].mean == 7.0
+        assert len(result.series["Gc"]) == 0
+        assert result.totals == {"Pc": 21.0}
+
+    async def test_aligns_local_midnights_across_timezones(
+        self, mock_api, stats_payload, vectorized
+    ):
+        zones = {1: "Europe/Amsterdam", 2: "America/New_York", 3: "UTC"}
+        for site_id, zone in zones.items():
+            local = START.replace(tzinfo=ZoneInfo(zone))
+            days = [ms(local + timedelta(days=d)) for d in range(3)]
+            respx.get(f"{BASE}/installations/{site_id}/stats").mock(
+                return_value=httpx.Response(200, json=stats_payload(days))
+            )
+        await mock_api.connect()
+        result = await aggregate_fleet(
+            mock_api.installations, zones, START, END, vectorized=vectorized
+        )
+        assert result.series["Pc"].values == [3.0, 3.0, 3.0]
+
+    @pytest.mark.parametrize("known", [False, True])
+    async def test_far_east_midnights_keep_their_date(
+        self, mock_api, stats_payload, vectorized, known
+    ):
+        # Local midnight at UTC+13 is 11:00 UTC on the day before.
+        zones = {1: "Pacific/Auckland", 2: "Pacific/Chatham", 3: "Pacific/Honolulu"}
+        if known:
+            zones[4] = "Pacific/Kiritimati"
+        for site_id, zone in zones.items():
+            local = START.replace(tzinfo=ZoneInfo(zone))
+            days = [ms(local + timedelta(days=d)) for d in range(3)]
+            respx.get(f"{BASE}/installations/{site_id}/stats").mock(
+                return_value=httpx.Response(200, json=stats_payload(days))
+            )
+        await mock_api.connect()
+        result = await aggregate_fleet(
+            mock_api.installations,
+            zones,
+            START,
+            END,
+            site_timezones=zones if known else None,
+            vectorized=vectorized,
+        )
+        pc = result.series["Pc"]
+        assert pc.timestamps == [ms(START) + d * DAY_MS for d in range(3)]
+        assert pc.values == [float(len(zones))] * 3
+
+    async def test_failed_sites_are_excluded(self, mock_api, stats_payload, vectorized):
+        respx.get(f"{BASE}/installations/1/stats").mock(
+            return_value=httpx.Response(
+                200, json=stats_payload([ms(START), ms(END) + DAY_MS], [5.0, 9.0])
+            )
+        )
+        respx.get(f"{BASE}/installations/2/stats").mock(
+            return_value=httpx.Response(500, text="boom")
+        )
+        await mock_api.connect()
+        result = await aggregate_fleet(
+            mock_api.installations, [1, 2], START, END, vectorized=vectorized
+        )
+        assert result.sites == 1
+        assert list(result.failed) == [2]
+        # Points outside the window are dropped.
+        assert result.series["Pc"].values == [5.0]
+
+
+@pytest.mark.asyncio
+async def test_empty_window_is_rejected(mock_api):
+    with pytest.raises(ValueError, match="empty"):
+        await aggregate_fleet(mock_api.installations, [1], END, START)
@@ -0,0 +1,151 @@
+"""Tests for gap detection and targeted backfill."""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsType,
+)
+from vrmapi_async.stats.gaps import Gap, backfill_gaps, find_gaps, plan_gap_requests
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+SITE_ID = 1001
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HOUR_MS = 3600 * 1000
+START_MS = int(START.timestamp() * 1000)
+
+
+def hourly(*hours):
+    return [StatsRecord(timestamp=START_MS + h * HOUR_MS, mean=1.0) for h in hours]
+
+
+class TestFindGaps:
+    def test_no_gaps(self):
+        assert find_gaps(hourly(0, 1, 2, 3), StatsInterval.HOURS) == []
+
+    def test_inner_gaps(self):
+        gaps = find_gaps(hourly(0, 1, 4, 5, 7), StatsInterval.HOURS)
+        assert gaps == [
+            Gap(START_MS + 2 * HOUR_MS, START_MS + 4 * HOUR_MS, 2),
+            Gap(START_MS + 6 * HOUR_MS, START_MS + 7 * HOUR_MS, 1),
+        ]
+        assert gaps[0].start == START + timedelta(hours=2)
+
+    def test_leading_and_trailing_gaps_with_explicit_range(self):
+        gaps = find_gaps(
+            hourly(2, 3),
+            StatsInterval.HOURS,
+            start=START,
+            end=START + timedelta(hours=6),
+        )
+        assert gaps == [
+            Gap(START_MS, START_MS + 2 * HOUR_MS, 2),
+            Gap(START_MS + 4 * HOUR_MS, START_MS + 6 * HOUR_MS, 2),
+        ]
+
+    def test_accepts_raw_timestamps_and_offsets(self):
+        timestamps = [START_MS + 60_000, START_MS + 2 * HOUR_MS + 60_000]
+        gaps = find_gaps(timestamps, StatsInterval.HOURS)
+        assert gaps == [Gap(START_MS + HOUR_MS, START_MS + 2 * HOUR_MS, 1)]
+
+    def test_empty_series_with_range_is_one_gap(self):
+        gaps = find_gaps(
+            [], StatsInterval.DAYS, start=START, end=START + timedelta(days=3)
+        )
+        assert gaps == [Gap(START_MS, START_MS + 3 * 24 * HOUR_MS, 3)]
+
+    def test_empty_series_without_range(self):
+        assert find_gaps([], StatsInterval.DAYS) == []
+
+
+class TestPlanGapRequests:
+    def test_close_gaps_are_combined(self):
+        gaps = find_gaps(hourly(0, 2, 4, 6), StatsInterval.HOURS)
+        assert len(gaps) == 3
+        requests = plan_gap_requests(gaps, StatsInterval.HOURS)
+        assert requests == [
+            (START + timedelta(hours=1), START + timedelta(hours=6)),
+        ]
+
+    def test_far_gaps_stay_separate(self):
+        day = 24 * HOUR_MS
+        gaps = [
+            Gap(START_MS, START_MS + HOUR_MS, 1),
+            Gap(START_MS + 40 * day, START_MS + 40 * day + HOUR_MS, 1),
+        ]
+        assert len(plan_gap_requests(gaps, StatsInterval.HOURS)) == 2
+
+    def test_gaps_with_long_present_stretch_stay_separate(self):
+        day = 24 * HOUR_MS
+        gaps = [
+            Gap(START_MS, START_MS + HOUR_MS, 1),
+            Gap(START_MS + 29 * day, START_MS + 29 * day + HOUR_MS, 1),
+        ]
+        requests = plan_gap_requests(gaps, StatsInterval.HOURS)
+        assert requests == [
+            (START, START + timedelta(hours=1)),
+            (START + timedelta(days=29), START + timedelta(days=29, hours=1)),
+        ]
+
+    def test_present_threshold_is_configurable(self):
+        gaps = find_gaps(hourly(0, 2, 3, 4, 5, 7), StatsInterval.HOURS)
+        assert len(plan_gap_requests(gaps, StatsInterval.HOURS)) == 2
+        combined = plan_gap_requests(gaps, StatsInterval.HOURS, timedelta(hours=5))
+        assert combined == [(START + timedelta(hours=1), START + timedelta(hours=7))]
+
+    def test_long_gap_is_split(self):
+        day = 24 * HOUR_MS
+        gaps = [Gap(START_MS, START_MS + 62 * day, 62 * 24)]
+        requests = plan_gap_requests(gaps, StatsInterval.HOURS)
+        assert len(requests) == 2
+        assert requests[-1][1] == START + timedelta(days=62)
+
+
+@pytest.mark.asyncio
+class TestBackfillGaps:
+    async def test_fetches_only_gap_windows(self, mock_api):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "success": True,
+                    "records": {"Pc": [[START_MS + 2 * HOUR_MS, 1.0]]},
+                    "totals": {},
+                },
+            )
+        )
+        await mock_api.connect()
+        gaps = find_gaps(hourly(0, 1, 3), StatsInterval.HOURS)
+        requests = plan_gap_requests(gaps, StatsInterval.HOURS)
+        resp = await backfill_gaps(
+            mock_api.installations,
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            requests,
+        )
+        assert route.call_count == 1
+        url = str(route.calls.last.request.url)
+        assert f"start={int((START + timedelta(hours=2)).timestamp())}" in url
+        assert f"end={int((START + timedelta(hours=3)).timestamp())}" in url
+        pc = resp.records["Pc"]
+        assert isinstance(pc, list)
+        assert len(pc) == 1
+
+    async def test_no_windows_make_no_requests(self, mock_api):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats")
+        await mock_api.connect()
+        resp = await backfill_gaps(
+            mock_api.installations,
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            [],
+        )
+        assert route.call_count == 0
+        assert resp.records == {}
@@ -0,0 +1,122 @@
+"""Tests for the incremental daily energy ledger."""
+
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import httpx
+import pytest
+import respx
+
+from tests.conftest import ms
+from vrmapi_async.stats.ledger import EnergyLedger
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+SITE_ID = 1001
+ZONE = ZoneInfo("Europe/Amsterdam")
+
+
+def local_midnight(day):
+    return datetime(day.year, day.month, day.day, tzinfo=ZONE)
+
+
+def midnights(*days):
+    return [ms(local_midnight(day)) for day in days]
+
+
+def stats_route(site_id=SITE_ID):
+    return respx.get(f"{BASE}/installations/{site_id}/stats")
+
+
+@pytest.mark.asyncio
+class TestEnergyLedger:
+    async def test_first_sync_fetches_from_since(self, mock_api, stats_payload):
+        days = [date(2024, 3, d) for d in range(1, 6)]
+        route = stats_route().mock(
+            return_value=httpx.Response(200, json=stats_payload(midnights(*days), 10.0))
+        )
+        await mock_api.connect()
+        with EnergyLedger(mock_api.installations) as ledger:
+            ledger.set_timezone(SITE_ID, "Europe/Amsterdam")
+            now = local_midnight(date(2024, 3, 5)) + timedelta(hours=1)
+            assert await ledger.sync_site(SITE_ID, date(2024, 3, 1), now) == 5
+
+            params = route.calls.last.request.url.params
+            assert params["type"] == "kwh"
+            assert params["interval"] == "days"
+            assert int(params["start"]) == int(local_midnight(days[0]).timestamp())
+
+            entries = ledger.days(SITE_ID, date(2024, 3, 1), date(2024, 4, 1))
+            assert [e.day for e in entries] == days
+            # The 4th ended at local midnight but is still within settle time.
+            assert [e.final for e in entries] == [True, True, True, False, False]
+
+    async def test_next_sync_only_fetches_open_days(self, mock_api, stats_payload):
+        route = stats_route()
+        route.side_effect = [
+            httpx.Response(
+                200,
+                json=stats_payload(midnights(date(2024, 3, 1), date(2024, 3, 2)), 10.0),
+            ),
+            httpx.Response(200, json=stats_payload(midnights(date(2024, 3, 2)), 12.0)),
+        ]
+        await mock_api.connect()
+        with EnergyLedger(mock_api.installations) as ledger:
+            ledger.set_timezone(SITE_ID, "Europe/Amsterdam")
+            noon = local_midnight(date(2024, 3, 2)) + timedelta(hours=12)
+            await ledger.sync_site(SITE_ID, date(2024, 3, 1), noon)
+            await ledger.sync_site(SITE_ID, date(2024, 3, 1), noon + timedelta(hours=6))
+
+            start = int(route.calls.last.request.url.params["start"])
+            assert start == int(local_midnight(date(2024, 3, 2)).timestamp())
+            assert ledger.month_totals(SITE_ID, 2024, 3) == {"Pc": 22.0}
+
+    async def test_open_days_are_refetched_until_frozen(self, mock_api, stats_payload):
+        route = stats_route().mock(
+            return_value=httpx.Response(
+                200, json=stats_payload(midnights(date(2024, 3, 1)), 10.0)
+            )
+        )
+        await mock_api.connect()
+        with EnergyLedger(mock_api.installations) as ledger:
+            ledger.set_timezone(SITE_ID, "Europe/Amsterdam")
+            now = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+            assert await ledger.sync_site(SITE_ID, date(2024, 3, 1), now) == 1
+            assert await ledger.sync_site(SITE_ID, date(2024, 3, 1), now) == 1
+            assert (
+                await ledger.sync_site(
+                    SITE_ID, date(2024, 3, 1), now - timedelta(days=2)
+                )
+                == 0
+            )
+        assert route.call_count == 2
+
+    async def test_unknown_site_timezone(self, mock_api):
+        with (
+            EnergyLedger(mock_api.installations) as ledger,
+            pytest.raises(ValueError, match="Unknown timezone"),
+        ):
+            await ledger.sync_site(SITE_ID, date(2024, 3, 1))
+
+    async def test_fleet_sync_and_totals(self, mock_api, stats_payload):
+        for site_id in (1, 2):
+            stats_route(site_id).mock(
+                return_value=httpx.Response(
+                    200,
+                    json=stats_payload(
+                        midnights(date(2024, 2, 29), date(2024, 3, 1)), 10.0
+                    ),
+                )
+            )
+        await mock_api.connect()
+        with EnergyLedger(mock_api.installations) as ledger:
+            for site_id in (1, 2):
+                ledger.set_timezone(site_id, "Europe/Amsterdam")
+            now = datetime(2024, 3, 3, tzinfo=timezone.utc)
+            written = await ledger.sync([1, 2], date(2024, 2, 29), now)
+            assert written == {1: 2, 2: 2}
+            assert ledger.fleet_month_totals(2024, 3) == {
+                1: {"Pc": 10.0},
+                2: {"Pc": 10.0},
+            }
+            assert ledger.month_totals(1, 2024, 2) == {"Pc": 10.0}
+            assert ledger.month_totals(1, 2024, 12) == {}
@@ -0,0 +1,163 @@
+"""Tests for request instrumentation and the metrics registry."""
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.metrics import (
+    Histogram,
+    MetricsRegistry,
+    RequestEvent,
+    RequestKey,
+    RetryEvent,
+    RetryKey,
+    ValidationEvent,
+    status_class,
+)
+from vrmapi_async.routes import UNMATCHED_ROUTE, VRMRoutes, resolve_route
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+def make_client(metrics, **kwargs):
+    return VRMAsyncAPI(
+        token="t",
+        user_id_for_token=1,
+        retry_backoff_base=0.0,
+        metrics=metrics,
+        **kwargs,
+    )
+
+
+class TestResolveRoute:
+    @pytest.mark.parametrize(
+        ("url", "name"),
+        [
+            ("/installations/123/stats", "INSTALLATIONS_STATS"),
+            ("/users/me", "USERS_ABOUTME"),
+            ("/users/5/accesstokens/list", "USERS_ACCESSTOKENS_LIST"),
+            ("/users/5/accesstokens/77", "USERS_ACCESSTOKENS_REVOKE"),
+        ],
+    )
+    def test_known_routes(self, url, name):
+        match = resolve_route(VRMRoutes(), url)
+        assert match.name == name
+        assert match.template == getattr(VRMRoutes(), name)
+
+    def test_unknown_route(self):
+        assert resolve_route(VRMRoutes(), "/installations/1/nope") == UNMATCHED_ROUTE
+
+
+class TestHistogram:
+    def test_observe_and_cumulative(self):
+        hist = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value)
+        assert hist.count == 4
+        assert hist.sum == pytest.approx(3.65)
+        assert hist.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+
+    def test_status_class(self):
+        assert status_class(204) == "2xx"
+        assert status_class(429) == "4xx"
+        assert status_class(None) == "error"
+
+
+class TestMetricsRegistry:
+    def test_records_and_snapshots(self):
+        registry = MetricsRegistry()
+        registry.record_request(
+            RequestEvent("R", "GET", 200, "token", 0, 0.2, 100, 0.01)
+        )
+        registry.record_retry(RetryEvent("R", "GET", 429, "token", 0, 1.5))
+        registry.record_validation(ValidationEvent("R", "Model", 0.3))
+        snap = registry.snapshot()
+
+        stats = snap.requests[RequestKey("R", "GET", "2xx", "token")]
+        assert stats.count == 1
+        assert stats.response_bytes == 100
+        assert stats.decode_seconds == pytest.approx(0.01)
+        assert snap.retries == {RetryKey("R", "GET", 429, "token"): 1}
+        assert snap.rate_limit_wait == {"R": 1.5}
+        assert snap.validation["R"].seconds == pytest.approx(0.3)
+
+        # Snapshots are copies.
+        registry.record_request(RequestEvent("R", "GET", 200, "token", 0, 0.2))
+        assert stats.count == 1
+        registry.reset()
+        assert registry.snapshot().requests == {}
+
+    def test_callbacks_and_failing_callback(self):
+        registry = MetricsRegistry()
+        events = []
+
+        def broken(_event):
+            raise RuntimeError
+
+        registry.add_callback(broken)
+        registry.add_callback(events.append)
+        registry.record_validation(ValidationEvent("R", "Model", 0.1))
+        assert len(events) == 1
+        registry.remove_callback(events.append)
+        registry.record_validation(ValidationEvent("R", "Model", 0.1))
+        assert len(events) == 1
+
+
+@pytest.mark.asyncio
+class TestClientInstrumentation:
+    async def test_request_and_validation_metrics(self, respx_mock):
+        registry = MetricsRegistry()
+        respx_mock.get(f"{BASE}/installations/42/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        client = make_client(registry)
+        await client.connect()
+        await client.installations.get_stats(42)
+
+        snap = registry.snapshot()
+        key = RequestKey("INSTALLATIONS_STATS", "GET", "2xx", "token")
+        assert snap.requests[key].count == 1
+        assert snap.requests[key].response_bytes > 0
+        assert snap.requests[key].decode_count == 1
+        assert snap.validation["INSTALLATIONS_STATS"].count == 1
+
+    async def test_retries_and_rate_limit_wait(self, respx_mock):
+        registry = MetricsRegistry()
+        respx_mock.get(f"{BASE}/users/me").side_effect = [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"success": True}),
+        ]
+        client = make_client(registry, max_retries=3)
+        await client.connect()
+        await client._request("GET", "/users/me")
+
+        snap = registry.snapshot()
+        assert snap.retries == {
+            RetryKey("USERS_ABOUTME", "GET", 429, "token"): 1,
+            RetryKey("USERS_ABOUTME", "GET", 503, "token"): 1,
+        }
+        assert snap.rate_limit_wait == {"USERS_ABOUTME": 0.0}
+        counts = {key.status_class: s.count for key, s in snap.requests.items()}
+        assert counts == {"2xx": 1, "4xx": 1, "5xx": 1}
+
+    async def test_transport_errors_are_counted(self, respx_mock):
+        registry = MetricsRegistry()
+        respx_mock.get(f"{BASE}/users/me").mock(side_effect=httpx.ConnectError("x"))
+        client = make_client(registry)
+        await client.connect()
+        with pytest.raises(Exception, match="x"):
+            await client._request("GET", "/users/me")
+        (key,) = registry.snapshot().requests
+        assert key.status_class == "error"
+
+    async def test_disabled_by_default(self, mock_api):
+        respx.get(f"{BASE}/installations/42/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        await mock_api.connect()
+        assert mock_api.metrics is None
+        response = await mock_api.installations.get_stats(42)
+        assert response.records["Pc"][0].mean == 2.0
@@ -0,0 +1,84 @@
+"""Tests for event-loop stall detection."""
+
+import asyncio
+import logging
+import time
+
+import httpx
+import pytest
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.metrics import MetricsRegistry, StallEvent, StallKey
+from vrmapi_async.monitoring import LoopStallMonitor
+from vrmapi_async.prometheus import render
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+class TestLoopStallMonitor:
+    def test_section_below_threshold_is_ignored(self):
+        monitor = LoopStallMonitor(threshold=10.0)
+        with monitor.section("R", "decode"):
+            pass
+        assert not monitor.stalls
+
+    def test_long_section_is_reported(self, caplog):
+        metrics = MetricsRegistry()
+        monitor = LoopStallMonitor(threshold=0.01, metrics=metrics)
+        with caplog.at_level(logging.WARNING), monitor.section("R", "validate"):
+            time.sleep(0.02)
+        (event,) = monitor.stalls
+        assert (event.route, event.phase) == ("R", "validate")
+        assert event.seconds >= 0.02
+        assert "by validate of R" in caplog.text
+        assert metrics.snapshot().stalls[StallKey("R", "validate")].count == 1
+
+    def test_lag_explained_by_section_is_not_reported_twice(self):
+        monitor = LoopStallMonitor(threshold=0.01)
+        expected = time.monotonic()
+        with monitor.section("R", "decode"):
+            time.sleep(0.02)
+        assert monitor.observe_lag(expected, time.monotonic()) >= 0.02
+        assert [event.route for event in monitor.stalls] == ["R"]
+
+    def test_unexplained_lag(self):
+        monitor = LoopStallMonitor(threshold=0.01)
+        assert monitor.observe_lag(10.0, 10.5) == 0.5
+        assert monitor.observe_lag(10.0, 9.0) == 0.0
+        assert list(monitor.stalls) == [StallEvent("OTHER", "unknown", 0.5)]
+        assert monitor.max_lag == 0.5
+        assert monitor.lag.count == 2
+
+    @pytest.mark.asyncio
+    async def test_sampler_detects_blocking(self):
+        async with LoopStallMonitor(threshold=0.02, interval=0.005) as monitor:
+            await asyncio.sleep(0.01)
+            time.sleep(0.05)
+            await asyncio.sleep(0.01)
+        assert monitor.max_lag >= 0.02
+        assert any(event.route == "OTHER" for event in monitor.stalls)
+
+
+@pytest.mark.asyncio
+async def test_client_attributes_sections_to_routes(respx_mock):
+    metrics = MetricsRegistry()
+    monitor = LoopStallMonitor(threshold=0.0, metrics=metrics)
+    client = VRMAsyncAPI(
+        token="t", user_id_for_token=1, metrics=metrics, stall_monitor=monitor
+    )
+    respx_mock.get(f"{BASE}/installations/42/stats").mock(
+        return_value=httpx.Response(200, json=STATS_PAYLOAD)
+    )
+    await client.connect()
+    await client.installations.get_stats(42)
+
+    assert set(metrics.snapshot().stalls) == {
+        StallKey("INSTALLATIONS_STATS", "decode"),
+        StallKey("INSTALLATIONS_STATS", "validate"),
+    }
+    text = render(metrics)
+    assert (
+        'vrm_client_event_loop_stalls_total{route="INSTALLATIONS_STATS",'
+        'phase="validate"} 1'
+    ) in text
@@ -0,0 +1,120 @@
+"""Tests for offloading response validation to executors."""
+
+import asyncio
+import concurrent.futures
+
+import httpx
+import pydantic
+import pytest
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.client.installations.schema import StatsResponse
+from vrmapi_async.client.users.schema import UserSitesExtendedResponse
+from vrmapi_async.parsing import (
+    ParseExecutor,
+    ParseMode,
+    cooperative_validate,
+    note_payload_size,
+    payload_size,
+)
+from vrmapi_async.tracing import InMemoryTracer
+
+from .test_users import SITE_EXTENDED_RECORD
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {
+    "success": True,
+    "records": {"Pc": [[i * 1000, float(i)] for i in range(50)]},
+    "totals": {"Pc": 1.0},
+}
+
+
+class TestParseExecutor:
+    def test_payload_size(self):
+        payload = {"a": 1}
+        assert payload_size(payload) is None
+        note_payload_size(payload, 1234)
+        assert payload_size(payload) == 1234
+        assert payload_size({"a": 1}) is None
+
+    def test_should_offload(self):
+        payload = {"a": 1}
+        note_payload_size(payload, 100)
+        assert ParseExecutor(threshold=100).should_offload(payload)
+        assert not ParseExecutor(threshold=101).should_offload(payload)
+        assert not ParseExecutor("inline", threshold=0).should_offload(payload)
+        assert ParseExecutor(threshold=0).should_offload({"b": 2})
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="fork"):
+            ParseExecutor("fork")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", list(ParseMode))
+    async def test_run_returns_same_model(self, mode):
+        with ParseExecutor(mode, max_workers=1) as executor:
+            result = await executor.run(StatsResponse, STATS_PAYLOAD)
+        assert isinstance(result, StatsResponse)
+        assert result == StatsResponse(**STATS_PAYLOAD)
+        assert result._raw == STATS_PAYLOAD
+
+    @pytest.mark.asyncio
+    async def test_external_pool_is_not_shut_down(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as pool:
+            with ParseExecutor(executor=pool) as executor:
+                await executor.run(StatsResponse, STATS_PAYLOAD)
+            assert pool.submit(int, "3").result() == 3
+
+
+@pytest.mark.asyncio
+class TestCooperativeValidate:
+    async def test_list_records(self):
+        payload = {"success": True, "records": [SITE_EXTENDED_RECORD] * 5}
+        result = await cooperative_validate(UserSitesExtendedResponse, payload)
+        assert result == UserSitesExtendedResponse(**payload)
+        assert result._raw is payload
+
+    async def test_stats_with_false_attribute(self):
+        payload = {**STATS_PAYLOAD, "records": {**STATS_PAYLOAD["records"], "X": False}}
+        result = await cooperative_validate(StatsResponse, payload)
+        assert result == StatsResponse(**payload)
+
+    async def test_yields_between_slices(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        before = ticks
+        await cooperative_validate(StatsResponse, STATS_PAYLOAD, time_slice=0.0)
+        task.cancel()
+        assert ticks - before >= len(STATS_PAYLOAD["records"]["Pc"])
+
+    async def test_invalid_item(self):
+        payload = {"success": True, "records": [{"idSite": "nope"}]}
+        with pytest.raises(pydantic.ValidationError):
+            await cooperative_validate(UserSitesExtendedResponse, payload)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("threshold", "offloaded"), [(0, True), (10**9, False)])
+async def test_client_offloads_above_threshold(respx_mock, threshold, offloaded):
+    tracer = InMemoryTracer()
+    with ParseExecutor("thread", threshold=threshold) as executor:
+        client = VRMAsyncAPI(
+            token="t", user_id_for_token=1, tracer=tracer, parse_executor=executor
+        )
+        respx_mock.get(f"{BASE}/installations/42/stats").mock(
+            return_value=httpx.Response(200, json=STATS_PAYLOAD)
+        )
+        await client.connect()
+        response = await client.installations.get_stats(42)
+    assert isinstance(response, StatsResponse)
+    assert len(response.records["Pc"]) == 50
+    (span,) = tracer.find("vrm.validate")
+    assert span.attributes["vrm.offloaded"] is offloaded
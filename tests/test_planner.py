@@ -0,0 +1,167 @@
+"""Tests for the stats query planner."""
+
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from vrmapi_async.client.installations.planner import (
+    MAX_PERIODS,
+    build_stats_plan,
+    choose_interval,
+    merge_stats_responses,
+    split_range,
+)
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsResponse,
+    StatsType,
+)
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+SITE_ID = 1001
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class TestChooseInterval:
+    def test_year_with_500_points_picks_two_hours(self):
+        # 366 days < 500 points, so days is too coarse
+        assert (
+            choose_interval(START, START + timedelta(days=366), target_points=500)
+            == StatsInterval.TWO_HOURS
+        )
+
+    def test_year_with_300_points_picks_days(self):
+        end = START + timedelta(days=366)
+        assert choose_interval(START, end, target_points=300) == StatsInterval.DAYS
+
+    def test_min_resolution(self):
+        end = START + timedelta(days=30)
+        assert (
+            choose_interval(START, end, min_resolution=timedelta(hours=1))
+            == StatsInterval.HOURS
+        )
+        assert (
+            choose_interval(START, end, min_resolution=timedelta(days=10))
+            == StatsInterval.WEEKS
+        )
+
+    def test_both_constraints_apply(self):
+        end = START + timedelta(days=366)
+        interval = choose_interval(
+            START, end, target_points=10, min_resolution=timedelta(days=1)
+        )
+        assert interval == StatsInterval.DAYS
+
+    def test_too_fine_falls_back_to_finest(self):
+        end = START + timedelta(hours=1)
+        assert (
+            choose_interval(START, end, target_points=1000)
+            == StatsInterval.FIFTEEN_MINS
+        )
+
+    def test_no_constraint_raises(self):
+        with pytest.raises(ValueError, match="target_points"):
+            choose_interval(START, START + timedelta(days=1))
+
+    def test_empty_range_raises(self):
+        with pytest.raises(ValueError, match="Invalid range"):
+            choose_interval(START, START, target_points=10)
+
+
+class TestSplitRange:
+    def test_single_chunk(self):
+        end = START + timedelta(days=10)
+        assert split_range(START, end, StatsInterval.HOURS) == [(START, end)]
+
+    def test_chunks_respect_max_period(self):
+        end = START + timedelta(days=100)
+        chunks = split_range(START, end, StatsInterval.FIFTEEN_MINS)
+        assert len(chunks) == 4
+        assert chunks[0][0] == START
+        assert chunks[-1][1] == end
+        for (s, e), (next_s, _) in itertools.pairwise(chunks):
+            assert e == next_s
+            assert e - s <= MAX_PERIODS[StatsInterval.FIFTEEN_MINS]
+
+    def test_naive_treated_as_utc(self):
+        chunks = split_range(
+            datetime(2024, 1, 1), datetime(2024, 1, 2), StatsInterval.HOURS
+        )
+        assert chunks[0][0].tzinfo is timezone.utc
+
+
+class TestBuildPlan:
+    def test_plan_fields(self):
+        plan = build_stats_plan(
+            SITE_ID,
+            START,
+            START + timedelta(days=366),
+            stats_type=StatsType.CUSTOM,
+            target_points=500,
+            attribute_codes=["Pdc"],
+        )
+        assert plan.interval == StatsInterval.TWO_HOURS
+        assert plan.num_requests == 12
+        assert plan.estimated_points == 366 * 12
+        assert plan.attribute_codes == ("Pdc",)
+
+
+class TestMergeResponses:
+    def test_concatenates_and_dedupes(self):
+        a = StatsResponse(
+            success=True,
+            records={"Pc": [[1, 1.0], [2, 2.0]], "Bc": False},
+            totals={"Pc": 3.0, "Bc": False},
+        )
+        b = StatsResponse(
+            success=True,
+            records={"Pc": [[2, 2.0], [3, 3.0]], "Bc": [[3, 1.0]]},
+            totals={"Pc": 5.0, "Bc": 1.0},
+        )
+        merged = merge_stats_responses([a, b])
+        pc = merged.records["Pc"]
+        assert isinstance(pc, list)
+        assert [r.timestamp for r in pc] == [1, 2, 3]
+        assert merged.totals["Pc"] == 8.0
+        assert merged.totals["Bc"] == 1.0
+        assert isinstance(merged.records["Bc"], list)
+
+    def test_all_false_stays_false(self):
+        a = StatsResponse(success=True, records={"Gc": False}, totals={"Gc": False})
+        merged = merge_stats_responses([a, a])
+        assert merged.records["Gc"] is False
+        assert merged.totals["Gc"] is False
+
+
+@pytest.mark.asyncio
+class TestNamespacePlanner:
+    async def test_plan_and_execute(self, mock_api):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats")
+        route.side_effect = [
+            httpx.Response(
+                200,
+                json={"success": True, "records": {"Pc": [[i, 1.0]]}, "totals": {}},
+            )
+            for i in range(4)
+        ]
+        await mock_api.connect()
+        plan = mock_api.installations.plan_stats(
+            SITE_ID,
+            START,
+            START + timedelta(days=100),
+            stats_type=StatsType.CONSUMPTION,
+            min_resolution=timedelta(minutes=15),
+        )
+        assert plan.num_requests == 4
+
+        resp = await mock_api.installations.execute_stats_plan(plan, max_concurrency=1)
+
+        assert route.call_count == 4
+        assert "interval=15mins" in str(route.calls.last.request.url)
+        pc = resp.records["Pc"]
+        assert isinstance(pc, list)
+        assert len(pc) == 4
@@ -0,0 +1,80 @@
+"""Tests for parse-cost profiling."""
+
+import tracemalloc
+
+import httpx
+import pytest
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.client.installations.schema import StatsResponse
+from vrmapi_async.profiling import ParseKey, ParseProfiler, count_objects
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {
+    "success": True,
+    "records": {"Pc": [[i * 1000, float(i)] for i in range(200)]},
+    "totals": {"Pc": 1.0},
+}
+
+
+class TestParseProfiler:
+    def test_count_objects(self):
+        response = StatsResponse(**STATS_PAYLOAD)
+        # Response, records dict, list, 200 records, totals dict.
+        assert count_objects(response) == 204
+
+    def test_validate_without_decode(self):
+        profiler = ParseProfiler()
+        profiler.validate("R", StatsResponse, STATS_PAYLOAD)
+        stats = profiler.stats[ParseKey("R", "StatsResponse")]
+        assert stats.count == 1
+        assert stats.validate_seconds > 0
+        assert stats.payload_bytes == 0
+        assert stats.retained_bytes == 0
+
+    def test_start_stop_tracemalloc(self):
+        assert not tracemalloc.is_tracing()
+        with ParseProfiler():
+            assert tracemalloc.is_tracing()
+        assert not tracemalloc.is_tracing()
+
+    def test_report_sorting(self):
+        profiler = ParseProfiler()
+        profiler.validate(
+            "SMALL", StatsResponse, {"success": True, "records": {}, "totals": {}}
+        )
+        for _ in range(3):
+            profiler.validate("BIG", StatsResponse, STATS_PAYLOAD)
+        assert [key.route for key, _ in profiler.report("objects")] == [
+            "BIG",
+            "SMALL",
+        ]
+        assert profiler.report("count")[0][0].route == "BIG"
+        with pytest.raises(ValueError, match="Cannot sort"):
+            profiler.report("nope")
+        table = profiler.format_report()
+        assert table.splitlines()[2].startswith("BIG")
+        profiler.reset()
+        assert profiler.report() == []
+
+
+@pytest.mark.asyncio
+async def test_client_profiles_decode_and_validation(respx_mock):
+    profiler = ParseProfiler()
+    client = VRMAsyncAPI(token="t", user_id_for_token=1, profiler=profiler)
+    route = respx_mock.get(f"{BASE}/installations/42/stats").mock(
+        return_value=httpx.Response(200, json=STATS_PAYLOAD)
+    )
+    await client.connect()
+    with profiler:
+        await client.installations.get_stats(42)
+        await client.installations.get_stats(42)
+
+    stats = profiler.stats[ParseKey("INSTALLATIONS_STATS", "StatsResponse")]
+    assert stats.count == 2
+    assert stats.payload_bytes == 2 * len(route.calls[0].response.content)
+    assert stats.decode_seconds > 0
+    assert stats.objects == 2 * 204
+    assert stats.retained_bytes > 0
+    assert stats.decode_retained_bytes > 0
+    assert stats.peak_bytes > 0
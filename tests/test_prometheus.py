@@ -0,0 +1,122 @@
+"""Tests for the Prometheus text-format exporter."""
+
+import asyncio
+
+import pytest
+
+from vrmapi_async.metrics import (
+    MetricsRegistry,
+    RequestEvent,
+    RetryEvent,
+    ValidationEvent,
+)
+from vrmapi_async.prometheus import (
+    CONTENT_TYPE,
+    PrometheusASGIApp,
+    render,
+    start_http_server,
+)
+
+LABELS = 'route="INSTALLATIONS_STATS",method="GET",status_class="2xx",auth_mode="token"'
+
+
+@pytest.fixture()
+def registry():
+    registry = MetricsRegistry(latency_buckets=(0.1, 1.0))
+    registry.record_request(
+        RequestEvent("INSTALLATIONS_STATS", "GET", 200, "token", 0, 0.5, 120, 0.25)
+    )
+    registry.record_retry(
+        RetryEvent("INSTALLATIONS_STATS", "GET", 429, "token", 0, 2.0)
+    )
+    registry.record_validation(ValidationEvent("INSTALLATIONS_STATS", "Stats", 0.125))
+    return registry
+
+
+class TestRender:
+    def test_counters_and_histogram(self, registry):
+        text = render(registry)
+        lines = text.splitlines()
+        assert "# TYPE vrm_client_requests_total counter" in lines
+        assert f"vrm_client_requests_total{{{LABELS}}} 1" in lines
+        assert (
+            f'vrm_client_request_duration_seconds_bucket{{{LABELS},le="0.1"}} 0'
+            in lines
+        )
+        assert (
+            f'vrm_client_request_duration_seconds_bucket{{{LABELS},le="1"}} 1' in lines
+        )
+        assert (
+            f'vrm_client_request_duration_seconds_bucket{{{LABELS},le="+Inf"}} 1'
+            in lines
+        )
+        assert f"vrm_client_request_duration_seconds_sum{{{LABELS}}} 0.5" in lines
+        assert f"vrm_client_response_bytes_total{{{LABELS}}} 120" in lines
+        assert f"vrm_client_json_decode_seconds_total{{{LABELS}}} 0.25" in lines
+        assert (
+            'vrm_client_retries_total{route="INSTALLATIONS_STATS",method="GET",'
+            'status="429",auth_mode="token"} 1'
+        ) in lines
+        assert (
+            'vrm_client_rate_limit_wait_seconds_total{route="INSTALLATIONS_STATS"} 2'
+            in lines
+        )
+        assert (
+            'vrm_client_validation_seconds_total{route="INSTALLATIONS_STATS"} 0.125'
+            in lines
+        )
+        assert text.endswith("\n")
+
+    def test_empty_registry_and_prefix(self):
+        text = render(MetricsRegistry().snapshot(), prefix="app")
+        assert "# TYPE app_requests_total counter" in text
+        assert "{" not in text
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.record_validation(ValidationEvent('a"b\\c', "M", 1.0))
+        assert 'route="a\\"b\\\\c"' in render(registry)
+
+
+@pytest.mark.asyncio
+class TestServing:
+    async def asgi_get(self, app, method="GET"):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await app({"type": "http", "method": method}, None, send)
+        return messages
+
+    async def test_asgi_app(self, registry):
+        start, body = await self.asgi_get(PrometheusASGIApp(registry))
+        assert start["status"] == 200
+        assert (b"content-type", CONTENT_TYPE.encode()) in start["headers"]
+        assert b"vrm_client_requests_total" in body["body"]
+
+    async def test_asgi_rejects_post(self, registry):
+        start, _ = await self.asgi_get(PrometheusASGIApp(registry), "POST")
+        assert start["status"] == 405
+
+    async def test_http_server(self, registry):
+        server = await start_http_server(registry, port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch(path):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await writer.drain()
+            data = await reader.read()
+            writer.close()
+            return data
+
+        try:
+            ok = await fetch("/metrics")
+            missing = await fetch("/other")
+        finally:
+            server.close()
+            await server.wait_closed()
+        assert ok.startswith(b"HTTP/1.0 200 OK")
+        assert b"vrm_client_requests_total" in ok
+        assert missing.startswith(b"HTTP/1.0 404")
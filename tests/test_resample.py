@@ -0,0 +1,165 @@
+"""Tests for local stats resampling."""
+
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from tests.conftest import ms
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+)
+from vrmapi_async.stats.resample import (
+    HAS_NUMPY,
+    bucket_edges,
+    floor_timestamp,
+    resample,
+    resample_response,
+)
+
+PRAGUE = ZoneInfo("Europe/Prague")
+QUARTER_MS = 15 * 60 * 1000
+
+
+def quarter_hours(start_ms, count, value=float):
+    return [
+        StatsRecord(timestamp=start_ms + i * QUARTER_MS, mean=value(i))
+        for i in range(count)
+    ]
+
+
+VECTORIZED = [
+    False,
+    pytest.param(
+        True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed")
+    ),
+]
+
+
+class TestFloorTimestamp:
+    def test_hours_utc(self):
+        assert floor_timestamp(
+            ms(2024, 1, 1, 10, 37), StatsInterval.HOURS, timezone.utc
+        ) == ms(2024, 1, 1, 10)
+
+    def test_day_respects_local_midnight(self):
+        # 23:30 UTC on Jan 1 is already Jan 2 in Prague (UTC+1)
+        ts = ms(2024, 1, 1, 23, 30)
+        assert floor_timestamp(ts, StatsInterval.DAYS, PRAGUE) == ms(
+            2024, 1, 2, tz=PRAGUE
+        )
+
+    def test_week_starts_monday(self):
+        ts = ms(2024, 1, 4, 12)  # Thursday
+        assert floor_timestamp(ts, StatsInterval.WEEKS, timezone.utc) == ms(2024, 1, 1)
+
+    def test_month_and_year(self):
+        ts = ms(2024, 5, 17, 8, tz=PRAGUE)
+        assert floor_timestamp(ts, StatsInterval.MONTHS, PRAGUE) == ms(
+            2024, 5, 1, tz=PRAGUE
+        )
+        assert floor_timestamp(ts, StatsInterval.YEARS, PRAGUE) == ms(
+            2024, 1, 1, tz=PRAGUE
+        )
+
+
+class TestBucketEdges:
+    def test_days_across_dst_change(self):
+        # DST starts in Prague on 2024-03-31, that day has 23 hours
+        edges = bucket_edges(
+            ms(2024, 3, 30, 12, tz=PRAGUE),
+            ms(2024, 4, 1, 12, tz=PRAGUE),
+            StatsInterval.DAYS,
+            PRAGUE,
+        )
+        assert edges == [
+            ms(2024, 3, 30, tz=PRAGUE),
+            ms(2024, 3, 31, tz=PRAGUE),
+            ms(2024, 4, 1, tz=PRAGUE),
+        ]
+        assert edges[2] - edges[1] == 23 * 3600 * 1000
+
+    def test_months_wrap_year(self):
+        edges = bucket_edges(
+            ms(2023, 12, 5), ms(2024, 2, 5), StatsInterval.MONTHS, timezone.utc
+        )
+        assert edges == [ms(2023, 12, 1), ms(2024, 1, 1), ms(2024, 2, 1)]
+
+
+class TestResample:
+    @pytest.mark.parametrize("vectorized", VECTORIZED)
+    def test_quarter_hours_to_hours(self, vectorized):
+        records = quarter_hours(ms(2024, 1, 1), 8)
+        out = resample(records, StatsInterval.HOURS, vectorized=vectorized)
+        assert [r.timestamp for r in out] == [ms(2024, 1, 1, 0), ms(2024, 1, 1, 1)]
+        assert out[0].mean == pytest.approx(1.5)
+        assert out[0].min == 0.0
+        assert out[0].max == 3.0
+        assert out[1].mean == pytest.approx(5.5)
+
+    @pytest.mark.parametrize("vectorized", VECTORIZED)
+    def test_uses_min_max_when_present(self, vectorized):
+        records = [
+            StatsRecord(timestamp=ms(2024, 1, 1, 0), mean=2.0, min=1.0, max=3.0),
+            StatsRecord(timestamp=ms(2024, 1, 1, 1), mean=4.0, min=0.5, max=9.0),
+        ]
+        (day,) = resample(records, StatsInterval.DAYS, vectorized=vectorized)
+        assert day.mean == 3.0
+        assert day.min == 0.5
+        assert day.max == 9.0
+
+    @pytest.mark.parametrize("vectorized", VECTORIZED)
+    def test_empty_buckets_omitted_and_none_means(self, vectorized):
+        records = [
+            StatsRecord(timestamp=ms(2024, 1, 1, 0), mean=None),
+            StatsRecord(timestamp=ms(2024, 1, 1, 5), mean=1.0),
+        ]
+        out = resample(records, StatsInterval.HOURS, vectorized=vectorized)
+        assert [r.timestamp for r in out] == [ms(2024, 1, 1, 0), ms(2024, 1, 1, 5)]
+        assert out[0].mean is None
+        assert out[0].min is None
+
+    @pytest.mark.parametrize("vectorized", VECTORIZED)
+    def test_local_days(self, vectorized):
+        records = quarter_hours(ms(2024, 1, 1, 22), 12, value=lambda _: 1.0)
+        out = resample(records, StatsInterval.DAYS, "Europe/Prague", vectorized)
+        assert [r.timestamp for r in out] == [
+            ms(2024, 1, 1, tz=PRAGUE),
+            ms(2024, 1, 2, tz=PRAGUE),
+        ]
+
+    @pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed")
+    def test_paths_agree(self):
+        records = quarter_hours(ms(2024, 1, 1), 2000, value=lambda i: (i * 7) % 13)
+        a = resample(records, StatsInterval.DAYS, PRAGUE, vectorized=False)
+        b = resample(records, StatsInterval.DAYS, PRAGUE, vectorized=True)
+        assert a == b
+
+    def test_unsorted_input(self):
+        records = list(reversed(quarter_hours(ms(2024, 1, 1), 4)))
+        (hour,) = resample(records, StatsInterval.HOURS, vectorized=False)
+        assert hour.mean == pytest.approx(1.5)
+
+    def test_empty(self):
+        assert resample([], StatsInterval.DAYS) == []
+
+
+class TestResampleResponse:
+    def test_keeps_false_and_totals(self):
+        response = StatsResponse(
+            success=True,
+            records={
+                "Pc": [[ms(2024, 1, 1, 0), 1.0], [ms(2024, 1, 1, 0, 15), 3.0]],
+                "Gc": False,
+            },
+            totals={"Pc": 4.0, "Gc": False},
+        )
+        out = resample_response(response, StatsInterval.HOURS)
+        assert out.records["Gc"] is False
+        assert out.totals == response.totals
+        pc = out.records["Pc"]
+        assert isinstance(pc, list)
+        assert len(pc) == 1
+        assert pc[0].mean == 2.0
@@ -0,0 +1,138 @@
+"""Tests for incrementally maintained rollups."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tests.conftest import ms
+from vrmapi_async.client.installations.schema import StatsInterval, StatsResponse
+from vrmapi_async.stats.rollup import RollupMaintainer
+
+SITE_ID = 1001
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+START_MS = ms(START)
+QUARTER_MS = 15 * 60 * 1000
+
+
+@pytest.fixture()
+def quarter_payload(stats_payload):
+    def make(quarters, value=1.0):
+        timestamps = [START_MS + q * QUARTER_MS for q in quarters]
+        payload = stats_payload(timestamps, value, attribute="kwh", spread=(0.5, 2.0))
+        return StatsResponse(**payload)
+
+    return make
+
+
+@pytest.fixture()
+def rollups():
+    with RollupMaintainer() as r:
+        yield r
+
+
+class TestRollupMaintainer:
+    def test_hourly_and_daily_aggregates(self, quarter_payload, rollups):
+        assert rollups.ingest(SITE_ID, quarter_payload(range(8))) == 8
+
+        hours = rollups.query(SITE_ID, "kwh", StatsInterval.HOURS)
+        assert [h.bucket_ms for h in hours] == [START_MS, START_MS + 4 * QUARTER_MS]
+        assert hours[0].points == 4
+        assert hours[0].sum == 4.0
+        assert hours[0].mean == 1.0
+        assert (hours[0].min, hours[0].max) == (0.5, 2.0)
+
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert day.bucket == START
+        assert day.points == 8
+        assert day.sum == 8.0
+        assert not day.final
+
+    def test_overlapping_fetches_are_not_double_counted(self, quarter_payload, rollups):
+        rollups.ingest(SITE_ID, quarter_payload(range(4)))
+        rollups.ingest(SITE_ID, quarter_payload(range(2, 6), value=3.0))
+
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert day.points == 6
+        assert day.sum == 2 * 1.0 + 4 * 3.0
+
+    def test_closed_buckets_become_final(self, quarter_payload, rollups):
+        rollups.ingest(SITE_ID, quarter_payload(range(8)))
+        assert rollups.finalize(now=START + timedelta(minutes=90)) == 0
+        assert rollups.finalize(now=START + timedelta(hours=2)) == 1
+
+        hours = rollups.query(SITE_ID, "kwh", StatsInterval.HOURS)
+        assert [h.final for h in hours] == [True, False]
+
+        assert rollups.finalize(now=START + timedelta(days=1, hours=1)) == 2
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert day.final
+
+    def test_late_points_in_final_buckets_are_dropped(self, quarter_payload, rollups):
+        rollups.ingest(SITE_ID, quarter_payload(range(4)))
+        rollups.finalize(now=START + timedelta(days=2))
+        assert rollups.ingest(SITE_ID, quarter_payload(range(4), 9.0)) == 0
+
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert day.sum == 4.0
+        assert day.final
+
+    def test_late_point_in_new_hour_of_final_day_is_dropped(
+        self, quarter_payload, rollups
+    ):
+        hourly = quarter_payload(range(0, 48, 4), 10.0)
+        assert rollups.ingest(SITE_ID, hourly) == 12
+        rollups.finalize(now=START + timedelta(days=4))
+        late = quarter_payload([20 * 4], 1.0)
+        assert rollups.ingest(SITE_ID, late) == 0
+
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert (day.points, day.sum, day.final) == (12, 120.0, True)
+        assert len(rollups.query(SITE_ID, "kwh", StatsInterval.HOURS)) == 12
+
+    def test_past_day_in_two_chunks_is_complete(self, quarter_payload, rollups):
+        assert rollups.ingest(SITE_ID, quarter_payload(range(48))) == 48
+        assert rollups.ingest(SITE_ID, quarter_payload(range(48, 96))) == 48
+
+        (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert (day.points, day.sum, day.final) == (96, 96.0, False)
+
+    def test_later_data_finalizes_earlier_buckets(self, quarter_payload, rollups):
+        rollups.ingest(SITE_ID, quarter_payload(range(96)))
+        # Jan 2 02:00 is past the end of Jan 1 plus the settle time.
+        rollups.ingest(SITE_ID, quarter_payload([104]))
+
+        first, second = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert (first.points, first.final) == (96, True)
+        assert (second.points, second.final) == (1, False)
+
+    def test_day_boundaries_follow_timezone(self, quarter_payload):
+        with RollupMaintainer(tz="Europe/Amsterdam") as rollups:
+            # 22:00 and 23:00 UTC on Jan 1 fall on Jan 1 and Jan 2 locally.
+            rollups.ingest(SITE_ID, quarter_payload([88, 92]))
+            days = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert [d.bucket for d in days] == [
+            START - timedelta(hours=1),
+            START + timedelta(hours=23),
+        ]
+
+    def test_query_range_and_invalid_interval(self, quarter_payload, rollups):
+        rollups.ingest(SITE_ID, quarter_payload(range(12)))
+        hours = rollups.query(
+            SITE_ID,
+            "kwh",
+            StatsInterval.HOURS,
+            start=START + timedelta(hours=1),
+            end=START + timedelta(hours=2),
+        )
+        assert len(hours) == 1
+        with pytest.raises(ValueError, match="No rollups"):
+            rollups.query(SITE_ID, "kwh", StatsInterval.WEEKS)
+
+    def test_persists_to_file(self, quarter_payload, tmp_path):
+        path = tmp_path / "rollups.db"
+        with RollupMaintainer(path) as rollups:
+            rollups.ingest(SITE_ID, quarter_payload(range(4)))
+        with RollupMaintainer(path) as rollups:
+            rollups.ingest(SITE_ID, quarter_payload(range(4, 8)))
+            (day,) = rollups.query(SITE_ID, "kwh", StatsInterval.DAYS)
+        assert day.points == 8
@@ -0,0 +1,234 @@
+"""Tests for the local stats store and read-through source."""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from tests.conftest import ms
+from vrmapi_async.client.installations.schema import (
+    InstancedStatsResponse,
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+    StatsType,
+)
+from vrmapi_async.stats.gaps import find_gaps
+from vrmapi_async.stats.store import ReadThroughStats, SeriesKey, StatsStore
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+SITE_ID = 1001
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+START_MS = ms(START)
+HOUR_MS = 3600 * 1000
+CONSUMPTION = str(StatsType.CONSUMPTION)
+
+
+def hours(indices):
+    return [START_MS + h * HOUR_MS for h in indices]
+
+
+@pytest.fixture()
+def store():
+    with StatsStore() as s:
+        yield s
+
+
+class TestStatsStore:
+    def test_append_and_query_range(self, stats_payload, store):
+        response = StatsResponse(**stats_payload(hours(range(10)), spread=(1.0, 1.0)))
+        assert (
+            store.append(SITE_ID, StatsType.CONSUMPTION, StatsInterval.HOURS, response)
+            == 10
+        )
+
+        key = SeriesKey(SITE_ID, CONSUMPTION, "Pc", "hours")
+        part = store.query(key, START + timedelta(hours=2), START + timedelta(hours=5))
+        assert part.timestamps == [START_MS + h * HOUR_MS for h in (2, 3, 4)]
+        assert part.mean == [1.0, 1.0, 1.0]
+        assert len(part) == 3
+        assert part.to_records()[0] == StatsRecord(
+            timestamp=START_MS + 2 * HOUR_MS, mean=1.0, min=1.0, max=1.0
+        )
+
+    def test_upsert_replaces_points(self, stats_payload, store):
+        store.append(
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            StatsResponse(**stats_payload(hours([0]), spread=(1.0, 1.0))),
+        )
+        store.append(
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            StatsResponse(**stats_payload(hours([0]), 5.0, spread=(1.0, 1.0))),
+        )
+        assert store.query(SeriesKey(SITE_ID, CONSUMPTION, "Pc", "hours")).mean == [5.0]
+
+    def test_unknown_series_is_empty(self, store):
+        assert len(store.query(SeriesKey(SITE_ID, CONSUMPTION, "Nope", "hours"))) == 0
+
+    def test_instanced_response(self, store):
+        response = InstancedStatsResponse(
+            success=True,
+            records=[
+                {"instance": 0, "stats": {"Pv": [[START_MS, 1.0]]}},
+                {"instance": 1, "stats": {"Pv": [[START_MS, 2.0]], "Bc": False}},
+            ],
+            totals=[],
+        )
+        store.append(SITE_ID, StatsType.CONSUMPTION, StatsInterval.DAYS, response)
+        assert sorted(store.series(SITE_ID)) == [
+            SeriesKey(SITE_ID, CONSUMPTION, "Pv", "days", 0),
+            SeriesKey(SITE_ID, CONSUMPTION, "Pv", "days", 1),
+        ]
+        assert store.query(SeriesKey(SITE_ID, CONSUMPTION, "Pv", "days", 1)).mean == [
+            2.0
+        ]
+        assert len(store.query(SeriesKey(SITE_ID, CONSUMPTION, "Pv", "days"))) == 0
+
+    def test_persists_to_file(self, stats_payload, tmp_path):
+        path = tmp_path / "stats.db"
+        with StatsStore(path) as s:
+            s.append(
+                SITE_ID,
+                StatsType.CONSUMPTION,
+                StatsInterval.HOURS,
+                StatsResponse(**stats_payload(hours([0]), spread=(1.0, 1.0))),
+            )
+        with StatsStore(path) as s:
+            assert len(s.query(SeriesKey(SITE_ID, CONSUMPTION, "Pc", "hours"))) == 1
+
+    def test_coverage_merges_and_reports_missing(self, store):
+        args = (SITE_ID, StatsType.CONSUMPTION, StatsInterval.HOURS)
+        store.mark_covered(*args, 0, 10)
+        store.mark_covered(*args, 20, 30)
+        assert store.missing_ranges(*args, 0, 40) == [(10, 20), (30, 40)]
+        store.mark_covered(*args, 5, 25)
+        assert store.missing_ranges(*args, 0, 40) == [(30, 40)]
+
+    def test_coverage_is_per_attribute_set(self, store):
+        args = (SITE_ID, StatsType.CUSTOM, StatsInterval.HOURS)
+        store.mark_covered(*args, 0, 10, attribute_codes=["bs", "Pdc"])
+        assert store.missing_ranges(*args, 0, 10, attribute_codes=["Pdc", "bs"]) == []
+        assert store.missing_ranges(*args, 0, 10, attribute_codes=["Pdc"]) == [(0, 10)]
+        assert store.missing_ranges(*args, 0, 10) == [(0, 10)]
+
+    def test_series_are_per_stats_type(self, stats_payload, store):
+        for stats_type, value in ((StatsType.CONSUMPTION, 1.0), (StatsType.KWH, 2.0)):
+            store.append(
+                SITE_ID,
+                stats_type,
+                StatsInterval.HOURS,
+                StatsResponse(**stats_payload(hours([0]), value, spread=(1.0, 1.0))),
+            )
+        assert store.query(SeriesKey(SITE_ID, CONSUMPTION, "Pc", "hours")).mean == [1.0]
+        assert store.query(
+            SeriesKey(SITE_ID, str(StatsType.KWH), "Pc", "hours")
+        ).mean == [2.0]
+
+    def test_feeds_gap_detection(self, stats_payload, store):
+        store.append(
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            StatsResponse(**stats_payload(hours([0, 1, 4]), spread=(1.0, 1.0))),
+        )
+        part = store.query(SeriesKey(SITE_ID, CONSUMPTION, "Pc", "hours"))
+        (gap,) = find_gaps(part.timestamps, StatsInterval.HOURS)
+        assert gap.missing == 2
+
+
+@pytest.mark.asyncio
+class TestReadThroughStats:
+    async def test_second_read_served_locally(self, mock_api, stats_payload, store):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(
+                200, json=stats_payload(hours(range(24)), spread=(1.0, 1.0))
+            )
+        )
+        await mock_api.connect()
+        source = ReadThroughStats(mock_api.installations, store)
+        kwargs = {
+            "stats_type": StatsType.CONSUMPTION,
+            "interval": StatsInterval.HOURS,
+            "start": START,
+            "end": START + timedelta(days=1),
+        }
+        first = await source.get_stats(SITE_ID, **kwargs)
+        second = await source.get_stats(SITE_ID, **kwargs)
+
+        assert route.call_count == 1
+        assert first.records == second.records
+        pc = second.records["Pc"]
+        assert isinstance(pc, list)
+        assert len(pc) == 24
+        assert second.records["Gc"] is False
+
+    async def test_only_missing_range_is_fetched(self, mock_api, stats_payload, store):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(
+                200, json=stats_payload(hours(range(48)), spread=(1.0, 1.0))
+            )
+        )
+        await mock_api.connect()
+        source = ReadThroughStats(mock_api.installations, store)
+        common = {
+            "stats_type": StatsType.CONSUMPTION,
+            "interval": StatsInterval.HOURS,
+            "start": START,
+        }
+        await source.get_stats(SITE_ID, **common, end=START + timedelta(days=1))
+        await source.get_stats(SITE_ID, **common, end=START + timedelta(days=2))
+
+        assert route.call_count == 2
+        url = str(route.calls.last.request.url)
+        assert f"start={int((START + timedelta(days=1)).timestamp())}" in url
+
+    async def test_recent_data_is_refetched(self, mock_api, stats_payload, store):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(
+                200, json=stats_payload(hours([]), spread=(1.0, 1.0))
+            )
+        )
+        await mock_api.connect()
+        source = ReadThroughStats(mock_api.installations, store)
+        now = datetime.now(timezone.utc)
+        kwargs = {
+            "stats_type": StatsType.CONSUMPTION,
+            "interval": StatsInterval.HOURS,
+            "start": now - timedelta(minutes=30),
+            "end": now,
+        }
+        await source.get_stats(SITE_ID, **kwargs)
+        await source.get_stats(SITE_ID, **kwargs)
+        assert route.call_count == 2
+
+    async def test_other_attribute_codes_are_fetched(
+        self, mock_api, stats_payload, store
+    ):
+        payload = stats_payload(hours(range(24)), spread=(1.0, 1.0))
+        payload["records"] = {
+            "bs": payload["records"]["Pc"],
+            "Pdc": [[START_MS, 7.0, 7.0, 7.0]],
+        }
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(200, json=payload)
+        )
+        await mock_api.connect()
+        source = ReadThroughStats(mock_api.installations, store)
+        kwargs = {
+            "stats_type": StatsType.CUSTOM,
+            "interval": StatsInterval.HOURS,
+            "start": START,
+            "end": START + timedelta(days=1),
+        }
+        await source.get_stats(SITE_ID, **kwargs, attribute_codes=["bs"])
+        response = await source.get_stats(SITE_ID, **kwargs, attribute_codes=["Pdc"])
+
+        assert route.call_count == 2
+        assert response.records["Pdc"] == [
+            StatsRecord(timestamp=START_MS, mean=7.0, min=7.0, max=7.0)
+        ]
@@ -0,0 +1,182 @@
+"""Tests for incremental stats sync and watermark stores."""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import respx
+
+from tests.conftest import ms
+from vrmapi_async.client.installations.schema import StatsInterval, StatsType
+from vrmapi_async.stats.sync import (
+    JSONFileWatermarkStore,
+    MemoryWatermarkStore,
+    SQLiteWatermarkStore,
+    StatsSyncer,
+    WatermarkKey,
+)
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+SITE_ID = 1001
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["memory", "json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryWatermarkStore()
+    if request.param == "json":
+        return JSONFileWatermarkStore(tmp_path / "marks.json")
+    return SQLiteWatermarkStore(tmp_path / "marks.db")
+
+
+class TestStores:
+    def test_roundtrip(self, store):
+        key = WatermarkKey(SITE_ID, "kwh", "hours", "Pc")
+        store.save({key: 123})
+        store.save({key: 456, WatermarkKey(SITE_ID, "kwh", "days", "Pc"): 1})
+        assert store.load(SITE_ID, "kwh", "hours") == {"Pc": 456}
+        assert store.load(SITE_ID, "kwh", "days") == {"Pc": 1}
+        assert store.load(2, "kwh", "hours") == {}
+        store.close()
+
+    def test_watermark_never_moves_back(self, store):
+        key = WatermarkKey(SITE_ID, "kwh", "hours", "Pc")
+        store.save({key: 456})
+        store.save({key: 123, WatermarkKey(SITE_ID, "kwh", "hours", "Gc"): 7})
+        assert store.load(SITE_ID, "kwh", "hours") == {"Pc": 456, "Gc": 7}
+        store.close()
+
+    @pytest.mark.parametrize(
+        "cls, name",
+        [(JSONFileWatermarkStore, "marks.json"), (SQLiteWatermarkStore, "marks.db")],
+    )
+    def test_persists_across_instances(self, tmp_path, cls, name):
+        key = WatermarkKey(SITE_ID, "kwh", "hours", "Pc")
+        first = cls(tmp_path / name)
+        first.save({key: 789})
+        first.close()
+        assert cls(tmp_path / name).load(SITE_ID, "kwh", "hours") == {"Pc": 789}
+
+
+@pytest.mark.asyncio
+class TestStatsSyncer:
+    async def test_first_sync_uses_initial_start(self, mock_api, stats_payload, store):
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(
+                200, json=stats_payload([ms(START + timedelta(hours=5))])
+            )
+        )
+        await mock_api.connect()
+        syncer = StatsSyncer(mock_api.installations, store)
+        end = START + timedelta(days=1)
+        await syncer.sync(
+            SITE_ID, StatsType.CONSUMPTION, StatsInterval.HOURS, START, end=end
+        )
+
+        assert f"start={int(START.timestamp())}" in str(route.calls.last.request.url)
+        assert store.load(SITE_ID, "consumption", "hours") == {
+            "Pc": ms(START + timedelta(hours=5))
+        }
+
+    async def test_next_sync_starts_at_watermark_minus_overlap(
+        self, mock_api, stats_payload, store
+    ):
+        store.save(
+            {
+                WatermarkKey(SITE_ID, "consumption", "hours", "Pc"): ms(
+                    START + timedelta(days=10)
+                )
+            }
+        )
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats").mock(
+            return_value=httpx.Response(200, json=stats_payload([]))
+        )
+        await mock_api.connect()
+        syncer = StatsSyncer(mock_api.installations, store, overlap=timedelta(hours=2))
+        await syncer.sync(
+            SITE_ID,
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            START,
+            end=START + timedelta(days=11),
+        )
+
+        expected = START + timedelta(days=10) - timedelta(hours=2)
+        assert f"start={int(expected.timestamp())}" in str(route.calls.last.request.url)
+        assert route.call_count == 1
+
+    async def test_unknown_attribute_code_restarts_from_initial(self, mock_api):
+        store = MemoryWatermarkStore()
+        store.save({WatermarkKey(SITE_ID, "custom", "hours", "Pc"): ms(START) + 1})
+        syncer = StatsSyncer(mock_api.installations, store)
+        start = syncer.sync_start(
+            SITE_ID, StatsType.CUSTOM, StatsInterval.HOURS, START, ["Pc", "Bc"]
+        )
+        assert start == START
+
+    async def test_resume_after_crash(self, mock_api, stats_payload):
+        store = MemoryWatermarkStore()
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats")
+        route.side_effect = [
+            httpx.Response(200, json=stats_payload([ms(START + timedelta(days=30))])),
+            httpx.Response(500, text="boom"),
+        ]
+        await mock_api.connect()
+        syncer = StatsSyncer(mock_api.installations, store, overlap=timedelta(0))
+        end = START + timedelta(days=60)
+        with pytest.raises(Exception, match="boom"):
+            await syncer.sync(
+                SITE_ID, StatsType.CONSUMPTION, StatsInterval.HOURS, START, end=end
+            )
+
+        # The first chunk was committed, so the next run resumes from it.
+        resumed = syncer.sync_start(
+            SITE_ID, StatsType.CONSUMPTION, StatsInterval.HOURS, START
+        )
+        assert resumed == START + timedelta(days=30)
+
+    async def test_watermark_ahead_is_kept_across_chunks(
+        self, mock_api, stats_payload, store
+    ):
+        ahead = ms(START + timedelta(days=50))
+        store.save(
+            {
+                WatermarkKey(SITE_ID, "consumption", "hours", "Pc"): ahead,
+                WatermarkKey(SITE_ID, "consumption", "hours", "Gc"): ms(START),
+            }
+        )
+        route = respx.get(f"{BASE}/installations/{SITE_ID}/stats")
+        route.side_effect = [
+            httpx.Response(200, json=stats_payload([ms(START + timedelta(days=20))])),
+            httpx.Response(500, text="boom"),
+        ]
+        await mock_api.connect()
+        syncer = StatsSyncer(mock_api.installations, store, overlap=timedelta(0))
+        with pytest.raises(Exception, match="boom"):
+            await syncer.sync(
+                SITE_ID,
+                StatsType.CONSUMPTION,
+                StatsInterval.HOURS,
+                START,
+                end=START + timedelta(days=60),
+            )
+        marks = store.load(SITE_ID, "consumption", "hours")
+        assert marks["Pc"] == ahead
+
+    async def test_sync_many(self, mock_api, stats_payload):
+        for site_id in (1, 2, 3):
+            respx.get(f"{BASE}/installations/{site_id}/stats").mock(
+                return_value=httpx.Response(200, json=stats_payload([ms(START)]))
+            )
+        await mock_api.connect()
+        syncer = StatsSyncer(mock_api.installations, MemoryWatermarkStore())
+        results = await syncer.sync_many(
+            [1, 2, 3],
+            StatsType.CONSUMPTION,
+            StatsInterval.HOURS,
+            START,
+            end=START + timedelta(days=1),
+            max_concurrency=2,
+        )
+        assert sorted(results) == [1, 2, 3]
@@ -0,0 +1,158 @@
+"""Tests for session token persistence."""
+
+import stat
+import time
+import types
+
+import httpx
+import pytest
+
+from tests.conftest import make_jwt, mock_logins
+from vrmapi_async import token_store
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.token_store import (
+    JSONFileTokenStore,
+    KeyringTokenStore,
+    MemoryTokenStore,
+    StoredToken,
+    keyring,
+)
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+KEY = f"user@{BASE}"
+
+
+class FakePasswordDeleteError(Exception):
+    pass
+
+
+@pytest.fixture()
+def fake_keyring(monkeypatch):
+    passwords = {}
+
+    def delete_password(service, key):
+        if (service, key) not in passwords:
+            raise FakePasswordDeleteError(key)
+        del passwords[service, key]
+
+    module = types.ModuleType("keyring")
+    module.get_password = lambda service, key: passwords.get((service, key))
+    module.set_password = lambda service, key, value: passwords.update(
+        {(service, key): value}
+    )
+    module.delete_password = delete_password
+    monkeypatch.setattr(token_store, "keyring", module)
+    monkeypatch.setattr(
+        token_store, "PasswordDeleteError", FakePasswordDeleteError, raising=False
+    )
+    return passwords
+
+
+class TestStoredToken:
+    def test_validity(self):
+        token = StoredToken("t", 1, expires_at=1000.0)
+        assert token.is_valid(now=900.0)
+        assert not token.is_valid(margin=200.0, now=900.0)
+        assert not token.is_valid(now=1000.0)
+
+    def test_unknown_expiry_is_valid(self):
+        assert StoredToken("t", 1).is_valid(margin=1e9)
+
+    def test_repr_hides_token(self):
+        assert "secret" not in repr(StoredToken("secret", 1))
+
+
+class TestStores:
+    def test_memory_store(self):
+        store = MemoryTokenStore()
+        assert store.load("k") is None
+        store.save("k", StoredToken("t", 1))
+        assert store.load("k") == StoredToken("t", 1)
+        store.delete("k")
+        store.delete("k")
+        assert store.load("k") is None
+
+    def test_json_file_store_round_trip(self, tmp_path):
+        path = tmp_path / "tokens.json"
+        store = JSONFileTokenStore(path)
+        store.save("a", StoredToken("t1", 1, 123.0))
+        store.save("b", StoredToken("t2", 2))
+        store.delete("b")
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        reopened = JSONFileTokenStore(path)
+        assert reopened.tokens == {"a": StoredToken("t1", 1, 123.0)}
+
+    @pytest.mark.skipif(keyring is not None, reason="keyring is installed")
+    def test_keyring_store_needs_keyring(self):
+        with pytest.raises(ImportError, match="keyring"):
+            KeyringTokenStore()
+
+    def test_keyring_store_round_trip(self, fake_keyring):
+        store = KeyringTokenStore("svc")
+        store.save("k", StoredToken("t", 1, 123.0))
+        assert list(fake_keyring) == [("svc", "k")]
+        assert store.load("k") == StoredToken("t", 1, 123.0)
+        assert KeyringTokenStore("other").load("k") is None
+
+    def test_keyring_store_missing_key(self, fake_keyring):
+        assert KeyringTokenStore().load("missing") is None
+
+    def test_keyring_store_delete(self, fake_keyring):
+        store = KeyringTokenStore()
+        store.save("k", StoredToken("t", 1))
+        store.delete("k")
+        store.delete("k")
+        assert store.load("k") is None
+        assert fake_keyring == {}
+
+
+@pytest.mark.asyncio
+class TestClientSessions:
+    async def test_connect_reuses_valid_token(self, respx_mock):
+        login = mock_logins(respx_mock, ["fresh"])
+        store = MemoryTokenStore()
+        stored = make_jwt(time.time() + 3600)
+        store.save(KEY, StoredToken(stored, 22, time.time() + 3600))
+        client = VRMAsyncAPI(username="user", password="p", token_store=store)
+        await client.connect()
+        assert client._auth_token == stored
+        assert client.user_id == 22
+        assert login.call_count == 0
+        await client.disconnect()
+
+    async def test_connect_logs_in_when_token_expires(self, respx_mock):
+        token = make_jwt(time.time() + 3600)
+        login = mock_logins(respx_mock, [token])
+        store = MemoryTokenStore()
+        store.save(KEY, StoredToken("old", 22, time.time() + 30))
+        client = VRMAsyncAPI(username="user", password="p", token_store=store)
+        await client.connect()
+        assert login.call_count == 1
+        saved = store.load(KEY)
+        assert saved.token == token
+        assert saved.user_id == 22
+        assert saved.expires_at == pytest.approx(time.time() + 3600, abs=5)
+        await client.disconnect()
+
+    async def test_disconnect_keeps_stored_session(self, respx_mock):
+        mock_logins(respx_mock, ["opaque"])
+        logout = respx_mock.post(f"{BASE}/auth/logout").mock(
+            return_value=httpx.Response(200, json={"success": True})
+        )
+        store = MemoryTokenStore()
+        async with VRMAsyncAPI(username="user", password="p", token_store=store):
+            pass
+        assert logout.call_count == 0
+        assert store.load(KEY) == StoredToken("opaque", 22)
+
+    async def test_disconnect_can_end_stored_session(self, respx_mock):
+        mock_logins(respx_mock, ["opaque"])
+        logout = respx_mock.post(f"{BASE}/auth/logout").mock(
+            return_value=httpx.Response(200, json={"success": True})
+        )
+        store = MemoryTokenStore()
+        client = VRMAsyncAPI(username="user", password="p", token_store=store)
+        await client.connect()
+        await client.disconnect(keep_session=False)
+        assert logout.call_count == 1
+        assert store.load(KEY) is None
@@ -0,0 +1,135 @@
+"""Tests for tracing spans."""
+
+import httpx
+import pytest
+
+from vrmapi_async.client import VRMAsyncAPI
+from vrmapi_async.exceptions import VRMAPIRequestError
+from vrmapi_async.tracing import (
+    HAS_OPENTELEMETRY,
+    NOOP_TRACER,
+    InMemoryTracer,
+    OpenTelemetryTracer,
+    auto_tracer,
+)
+
+BASE = "https://vrmapi.victronenergy.com/v2"
+STATS_PAYLOAD = {"success": True, "records": {"Pc": [[1, 2.0]]}, "totals": {}}
+
+
+class TestInMemoryTracer:
+    def test_nesting_and_errors(self):
+        tracer = InMemoryTracer()
+        with tracer.span("outer", {"a": 1}) as outer:
+            outer.set_attribute("b", 2)
+            with pytest.raises(ValueError), tracer.span("inner"):
+                raise ValueError
+        inner, outer = tracer.spans
+        assert inner.parent_id == outer.span_id
+        assert isinstance(inner.error, ValueError)
+        assert outer.attributes == {"a": 1, "b": 2}
+        assert outer.parent_id is None
+        assert outer.duration >= inner.duration
+        assert tracer.children(outer) == [inner]
+
+    @pytest.mark.asyncio
+    async def test_httpcore_trace_callback(self):
+        tracer = InMemoryTracer()
+        trace = tracer.httpcore_trace()
+        with tracer.span("vrm.attempt"):
+            await trace("connection.connect_tcp.started", {"host": "x"})
+            await trace("connection.connect_tcp.complete", {"return_value": None})
+            await trace("connection.start_tls.started", {})
+            await trace("connection.start_tls.failed", {"exception": OSError("tls")})
+            await trace("http11.response_closed.complete", {})
+        tcp, tls, attempt = tracer.spans
+        assert tcp.name == "http.connection.connect_tcp"
+        assert tls.name == "http.connection.start_tls"
+        assert isinstance(tls.error, OSError)
+        assert {tcp.parent_id, tls.parent_id} == {attempt.span_id}
+
+    def test_noop_tracer(self):
+        with NOOP_TRACER.span("anything") as span:
+            span.set_attribute("a", 1)
+        assert not NOOP_TRACER.enabled
+
+    def test_auto_tracer(self):
+        if HAS_OPENTELEMETRY:
+            assert isinstance(auto_tracer(), OpenTelemetryTracer)
+        else:
+            assert auto_tracer() is NOOP_TRACER
+
+    @pytest.mark.skipif(HAS_OPENTELEMETRY, reason="opentelemetry is installed")
+    def test_opentelemetry_missing(self):
+        with pytest.raises(ImportError, match="otel"):
+            OpenTelemetryTracer()
+
+
+@pytest.mark.skipif(not HAS_OPENTELEMETRY, reason="opentelemetry not installed")
+def test_opentelemetry_adapter():
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider.get_tracer("test"))
+    with tracer.span("outer"), tracer.span("inner"):
+        pass
+    inner, outer = exporter.get_finished_spans()
+    assert inner.parent.span_id == outer.context.span_id
+
+
+@pytest.mark.asyncio
+class TestClientSpans:
+    async def test_request_spans(self, respx_mock):
+        tracer = InMemoryTracer()
+        client = VRMAsyncAPI(
+            token="t",
+            user_id_for_token=1,
+            max_retries=2,
+            retry_backoff_base=0.0,
+            tracer=tracer,
+        )
+        respx_mock.get(f"{BASE}/installations/42/stats").side_effect = [
+            httpx.Response(503),
+            httpx.Response(200, json=STATS_PAYLOAD),
+        ]
+        await client.connect()
+        await client.installations.get_stats(42)
+
+        (connect,) = tracer.find("vrm.connect")
+        assert connect.attributes == {"vrm.auth_mode": "token"}
+        (request,) = tracer.find("vrm.request")
+        assert request.attributes["vrm.route"] == "INSTALLATIONS_STATS"
+        children = [span.name for span in tracer.children(request)]
+        assert children == ["vrm.attempt", "vrm.retry_sleep", "vrm.attempt"]
+        first, second = tracer.find("vrm.attempt")
+        assert first.attributes["http.status_code"] == 503
+        assert second.attributes == {"vrm.attempt": 1, "http.status_code": 200}
+        (validate,) = tracer.find("vrm.validate")
+        assert validate.attributes["vrm.model"] == "StatsResponse"
+
+    async def test_failed_request_marks_span(self, respx_mock):
+        tracer = InMemoryTracer()
+        client = VRMAsyncAPI(token="t", user_id_for_token=1, tracer=tracer)
+        respx_mock.get(f"{BASE}/users/me").mock(return_value=httpx.Response(404))
+        await client.connect()
+        with pytest.raises(VRMAPIRequestError):
+            await client.users.about_me()
+        (request,) = tracer.find("vrm.request")
+        assert isinstance(request.error, VRMAPIRequestError)
+
+    async def test_demo_login_is_nested_in_connect(self, respx_mock):
+        tracer = InMemoryTracer()
+        client = VRMAsyncAPI(demo=True, tracer=tracer)
+        respx_mock.get(f"{BASE}/auth/loginAsDemo").mock(
+            return_value=httpx.Response(200, json={"token": "demo-token"})
+        )
+        await client.connect()
+        login, connect = tracer.spans
+        assert login.name == "vrm.login_as_demo"
+        assert login.parent_id == connect.span_id
@@ -4,7 +4,9 @@ from datetime import datetime, timedelta, timezone
 import pytest
 
 from vrmapi_async.utils import (
+    as_utc,
     datetime_to_epoch,
+    datetime_to_epoch_ms,
     snake_case_to_camel_case,
     to_snake_case,
 )
@@ -132,6 +134,22 @@ class TestDateTimeToEpoch:
         assert datetime_to_epoch(naive_dt_input) == expected_epoch
 
 
+class TestDateTimeToEpochMs:
+    def test_naive_is_utc(self):
+        assert datetime_to_epoch_ms(datetime(2024, 1, 1, 0, 0, 0, 1500)) == (
+            1704067200001
+        )
+
+    def test_aware_keeps_its_offset(self):
+        dt = datetime(2024, 1, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+        assert datetime_to_epoch_ms(dt) == 1704067200000
+
+    def test_as_utc(self):
+        assert as_utc(datetime(2024, 1, 1)).tzinfo is timezone.utc
+        aware = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=2)))
+        assert as_utc(aware) is aware
+
+
 class TestToSnakeCase:
     @pytest.mark.parametrize(
         "input_str, expected_output",
@@ -1,6 +1,12 @@
 """Async Python client for the Victron Energy VRM API."""
 
 from vrmapi_async.client import DEMO_SITE_ID, DEMO_USER_ID, VRMAPIRequestError
-from vrmapi_async.exceptions import VRMRateLimitError
+from vrmapi_async.exceptions import VRMCircuitOpenError, VRMRateLimitError
 
-__all__ = ["DEMO_SITE_ID", "DEMO_USER_ID", "VRMAPIRequestError", "VRMRateLimitError"]
+__all__ = [
+    "DEMO_SITE_ID",
+    "DEMO_USER_ID",
+    "VRMAPIRequestError",
+    "VRMCircuitOpenError",
+    "VRMRateLimitError",
+]
@@ -0,0 +1,212 @@
+"""Per-route circuit breaker failing fast during VRM outages.
+
+Without a breaker, every call during an outage goes through the full
+retry loop with exponential backoff, so a fleet sweep spends minutes
+sleeping on requests that are bound to fail. Pass a
+:class:`CircuitBreaker` as ``circuit_breaker=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI` to track the outcome of the
+HTTP attempts of each route:
+
+* **closed**: attempts go through. Once at least ``min_attempts`` of
+  the last ``window`` attempts were made and ``failure_rate`` of them
+  failed, the circuit opens.
+* **open**: attempts fail at once with
+  :class:`~vrmapi_async.exceptions.VRMCircuitOpenError`, without
+  retrying, for ``open_for`` seconds.
+* **half open**: up to ``probes`` attempts go through. The circuit
+  closes when one succeeds and opens again when one fails.
+
+Failures are transport errors and 5xx responses. Other responses,
+including 4xx and 429, show that the API is up and count as successes.
+"""
+
+import contextlib
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from enum import StrEnum
+
+import httpx
+
+from vrmapi_async.exceptions import VRMCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    """State of the circuit of one route."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class Circuit:
+    """Recent outcomes and state of one route."""
+
+    outcomes: deque[bool]
+    state: CircuitState = CircuitState.CLOSED
+    opened_at: float = 0.0
+    probes: int = 0
+    rejected: int = 0
+    times_opened: int = 0
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of failed attempts in the window."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+def attempt_failed(error: BaseException | None) -> bool | None:
+    """Classify the outcome of an attempt ending with ``error``.
+
+    :returns: True for an outage symptom (transport error or 5xx
+        response), False if the API answered, None if the attempt did
+        not get that far (e.g. it was cancelled).
+    """
+    if error is None:
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, httpx.TransportError):
+        return True
+    return None
+
+
+class CircuitBreaker:
+    """Open a route's circuit when too many of its attempts fail."""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_attempts: int = 10,
+        open_for: float = 30.0,
+        probes: int = 1,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the breaker.
+
+        :param failure_rate: Fraction of failed attempts in the window
+            from which the circuit opens.
+        :param window: Number of recent attempts per route considered.
+        :param min_attempts: Attempts in the window before the failure
+            rate is acted upon.
+        :param open_for: Seconds an open circuit rejects attempts before
+            letting probes through.
+        :param probes: Concurrent attempts allowed while half open.
+        :param clock: Monotonic time source, in seconds.
+        :raises ValueError: If the thresholds are out of range.
+        """
+        if not 0.0 < failure_rate <= 1.0:
+            msg = "failure_rate must be in (0, 1]."
+            raise ValueError(msg)
+        if not 1 <= min_attempts <= window:
+            msg = "min_attempts must be between 1 and window."
+            raise ValueError(msg)
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_attempts = min_attempts
+        self.open_for = open_for
+        self.probes = probes
+        self.clock = clock
+        self.circuits: dict[str, Circuit] = {}
+
+    def _circuit(self, route: str) -> Circuit:
+        circuit = self.circuits.get(route)
+        if circuit is None:
+            circuit = self.circuits[route] = Circuit(deque(maxlen=self.window))
+        return circuit
+
+    def state(self, route: str) -> CircuitState:
+        """Return the current state of ``route``'s circuit."""
+        circuit = self._circuit(route)
+        if (
+            circuit.state is CircuitState.OPEN
+            and self.clock() - circuit.opened_at >= self.open_for
+        ):
+            circuit.state = CircuitState.HALF_OPEN
+        return circuit.state
+
+    def _open_error(
+        self, route: str, circuit: Circuit, cause: BaseException | None = None
+    ) -> VRMCircuitOpenError:
+        retry_after = max(0.0, circuit.opened_at + self.open_for - self.clock())
+        response = cause.response if isinstance(cause, httpx.HTTPStatusError) else None
+        return VRMCircuitOpenError(
+            f"Circuit open for route {route}, next probe in {retry_after:.1f}s",
+            route,
+            retry_after,
+            None if response is None else response.status_code,
+            None if response is None else response.text,
+        )
+
+    def _open(self, route: str, circuit: Circuit) -> None:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = self.clock()
+        circuit.times_opened += 1
+        logger.warning(
+            "Opening circuit for route %s (failure rate %.0f%%)",
+            route,
+            circuit.failure_rate * 100,
+        )
+
+    def _close(self, route: str, circuit: Circuit) -> None:
+        circuit.state = CircuitState.CLOSED
+        circuit.outcomes.clear()
+        logger.info("Closing circuit for route %s", route)
+
+    @contextlib.contextmanager
+    def guard(self, route: str) -> Iterator[None]:
+        """Run one attempt of ``route`` through the breaker.
+
+        :param route: Route name of the attempt.
+        :raises VRMCircuitOpenError: If the circuit is open or all
+            probes are taken, or if this attempt failed and opened the
+            circuit; the caller should then not retry.
+        """
+        circuit = self._circuit(route)
+        state = self.state(route)
+        probe = state is CircuitState.HALF_OPEN
+        if state is CircuitState.OPEN or (probe and circuit.probes >= self.probes):
+            circuit.rejected += 1
+            raise self._open_error(route, circuit)
+        circuit.probes += probe
+        try:
+            yield
+        except BaseException as e:
+            circuit.probes -= probe
+            failed = attempt_failed(e)
+            self._record(route, circuit, probe=probe, failed=failed)
+            if failed and circuit.state is CircuitState.OPEN:
+                raise self._open_error(route, circuit, e) from e
+            raise
+        circuit.probes -= probe
+        self._record(route, circuit, probe=probe, failed=False)
+
+    def _record(
+        self, route: str, circuit: Circuit, *, probe: bool, failed: bool | None
+    ) -> None:
+        if failed is None:
+            return
+        if probe:
+            if failed:
+                self._open(route, circuit)
+            else:
+                self._close(route, circuit)
+            return
+        if circuit.state is not CircuitState.CLOSED:
+            # A straggler started before the circuit opened.
+            return
+        circuit.outcomes.append(not failed)
+        if (
+            len(circuit.outcomes) >= self.min_attempts
+            and circuit.failure_rate >= self.failure_rate
+        ):
+            self._open(route, circuit)
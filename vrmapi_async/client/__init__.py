@@ -1,32 +1,58 @@
 """Main asynchronous client for the Victron VRM API."""
 
 import asyncio
+import contextlib
+import functools
 import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import AbstractContextManager
 from types import TracebackType
-from typing import Any, Self
+from typing import Any, Self, TypeVar
 
 import httpx
+from pydantic import BaseModel
 
+from vrmapi_async.circuit import CircuitBreaker
 from vrmapi_async.client.installations.api import InstallationsNamespace
 from vrmapi_async.client.schema import DemoLoginResponse, LoginResponse
 from vrmapi_async.client.users.api import UsersNamespace
+from vrmapi_async.connection import ConnectionSettings, ConnectionStats, prewarm
+from vrmapi_async.credentials import Credential, CredentialPool, token_expiry
 from vrmapi_async.exceptions import (
+    VRMAPIError,
     VRMAPIRequestError,
     VRMAuthenticationError,
     VRMRateLimitError,
 )
-from vrmapi_async.routes import VRMRoutes
+from vrmapi_async.metrics import (
+    MetricsRegistry,
+    RequestEvent,
+    RetryEvent,
+    ValidationEvent,
+    WarmupEvent,
+)
+from vrmapi_async.monitoring import LoopStallMonitor
+from vrmapi_async.parsing import ParseExecutor, note_payload_size
+from vrmapi_async.profiling import ParseProfiler
+from vrmapi_async.routes import VRMRoutes, resolve_route
+from vrmapi_async.token_store import StoredToken, TokenStore
+from vrmapi_async.tracing import NOOP_TRACER, Tracer
 
 logger = logging.getLogger(__name__)
 
 DEMO_USER_ID = 22
 DEMO_SITE_ID = 151734
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
 
 class VRMAsyncAPI:
     """Asynchronous Python client for the Victron VRM API."""
 
     RETRYABLE_STATUS_CODES = frozenset({500, 502, 503, 504})
+    MIN_TOKEN_REFRESH_DELAY = 1.0
+    MAX_TOKEN_REFRESH_BACKOFF = 300.0
 
     def __init__(
         self,
@@ -43,14 +69,33 @@ class VRMAsyncAPI:
         max_retries: int = 3,
         retry_backoff_base: float = 1.0,
         retry_on_5xx: bool = True,
+        *,
+        metrics: MetricsRegistry | None = None,
+        tracer: Tracer | None = None,
+        profiler: ParseProfiler | None = None,
+        stall_monitor: LoopStallMonitor | None = None,
+        parse_executor: ParseExecutor | None = None,
+        connection: ConnectionSettings | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        multi_tenant: bool = False,
+        credential_pool: CredentialPool | None = None,
+        reauthenticate: bool = True,
+        refresh_margin: float | None = 60.0,
+        token_store: TokenStore | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
     ) -> None:
         """Initialize the VRM API client.
 
-        Authenticate via one of 3 mutually exclusive methods:
+        Authenticate via one of 4 mutually exclusive methods:
 
         1. Credentials: pass ``username`` and ``password``.
         2. Demo: set ``demo=True`` to use the demo account.
         3. Token: pass ``token`` and ``user_id_for_token``.
+        4. Pool: pass a ``credential_pool`` of several tokens.
+
+        With ``multi_tenant=True`` none of them is required: calls are
+        then made through :meth:`with_credential`.
 
         :param username: VRM portal username for credentials auth.
         :param password: VRM portal password for credentials auth.
@@ -68,31 +113,160 @@ class VRMAsyncAPI:
         :param retry_backoff_base: Base delay in seconds for exponential
             backoff (delay = base * 2^attempt).
         :param retry_on_5xx: Whether to retry on transient 5xx errors.
-        :raises ValueError: If auth method is missing or ambiguous.
+        :param metrics: Registry recording per-route request metrics.
+            Disabled (and free) when None.
+        :param tracer: Tracer receiving spans for connecting, logging in,
+            requests, retries and validation. Disabled when None.
+        :param profiler: Profiler recording decode and validation costs
+            per response model. Disabled when None.
+        :param stall_monitor: Monitor reporting JSON decoding and
+            validation that block the event loop. Disabled when None.
+        :param parse_executor: Executor validating large responses off
+            the event loop. Everything is validated inline when None.
+        :param connection: HTTP/2 and connection pool settings of the
+            HTTP client and connections to pre-warm on :meth:`connect`;
+            ``httpx_client_kwargs`` take precedence. With a shared
+            client or transport only pre-warming and reuse tracking apply.
+        :param http_client: Shared HTTP client, used as-is (with its own
+            base URL, timeout and pool) and never closed by this client.
+        :param transport: Shared transport, e.g. from
+            :meth:`ConnectionSettings.transport`, whose connection pool is
+            used by this client and never closed by it.
+        :param multi_tenant: Allow creating the client without its own
+            credentials, for use with :meth:`with_credential` only.
+        :param credential_pool: Credentials to spread requests over; a
+            credential answered with 429 is skipped for its
+            ``Retry-After`` period while the others carry on.
+        :param reauthenticate: In login and demo mode, log in again
+            when the API rejects the session token with 401 and retry
+            the request once. Concurrent requests share one login.
+        :param refresh_margin: In login and demo mode, log in again this
+            many seconds before the session token expires, if the token
+            carries its expiry. Disabled when None.
+        :param token_store: Store the session token is saved to after
+            each login in login and demo mode; :meth:`connect` reuses a
+            stored token that is still valid instead of logging in.
+        :param circuit_breaker: Breaker failing attempts of a route at
+            once, without retries, while the route's circuit is open.
+            Disabled when None.
+        :raises ValueError: If auth method is missing or ambiguous, or
+            ``http_client`` is combined with ``httpx_client_kwargs`` or
+            ``transport``.
         """
         if httpx_client_kwargs is None:
             httpx_client_kwargs = {}
 
+        self._check_auth_methods(
+            username=username,
+            password=password,
+            demo=demo,
+            token=token,
+            user_id_for_token=user_id_for_token,
+            credential_pool=credential_pool,
+            multi_tenant=multi_tenant,
+        )
+
+        self.username = username
+        self.password = password
+        self.is_demo = demo
+        self._pre_auth_token = token
+        self._pre_auth_user_id = user_id_for_token
+        self.credential_pool = credential_pool
+
+        self.user_id: int | None = None
+        self._auth_token: str | None = None
+
+        self._max_retries = max_retries
+        self._retry_backoff_base = retry_backoff_base
+        self._retry_on_5xx = retry_on_5xx
+        self.metrics = metrics
+        self.tracer = tracer if tracer is not None else NOOP_TRACER
+        self.profiler = profiler
+        self.stall_monitor = stall_monitor
+        self.parse_executor = parse_executor
+        self.circuit_breaker = circuit_breaker
+
+        self.global_headers = {"Content-Type": "application/json"}
+        self.routes = routes_cls()
+
+        self.connection = connection
+        self.connection_stats = (
+            ConnectionStats()
+            if connection is not None and connection.track_reuse
+            else None
+        )
+        self._keep_warm_task: asyncio.Task[None] | None = None
+        self._reauthenticate = reauthenticate
+        self._refresh_margin = refresh_margin
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._auth_lock = asyncio.Lock()
+        self.token_store = token_store
+        # A shared client or transport belongs to the caller: never close it.
+        self._owns_http_client = http_client is None and transport is None
+        self._client = self._build_http_client(
+            base_url,
+            timeout,
+            httpx_client_kwargs,
+            http_client=http_client,
+            transport=transport,
+        )
+
+        if headers:
+            self.global_headers.update(headers)
+
+        if self._pre_auth_token:
+            self._auth_mode = "token"
+        elif self.is_demo:
+            self._auth_mode = "demo"
+        elif self.username:
+            self._auth_mode = "login"
+        elif credential_pool is not None:
+            self._auth_mode = "pool"
+        else:
+            self._auth_mode = "none"
+
+        self.users = UsersNamespace(self._request, self.routes, self._parse)
+        self.installations = InstallationsNamespace(
+            self._request, self.routes, self._parse
+        )
+
+    @staticmethod
+    def _check_auth_methods(
+        *,
+        username: str | None,
+        password: str | None,
+        demo: bool,
+        token: str | None,
+        user_id_for_token: int | None,
+        credential_pool: CredentialPool | None,
+        multi_tenant: bool,
+    ) -> None:
+        """Check that exactly one complete auth method is given.
+
+        :raises ValueError: If auth method is missing, ambiguous or
+            incomplete.
+        """
         auth_methods = sum(
             [
                 1 if (username and password) else 0,
                 1 if demo else 0,
                 1 if (token and user_id_for_token is not None) else 0,
+                1 if credential_pool is not None else 0,
             ]
         )
 
-        if auth_methods == 0:
+        if auth_methods == 0 and not multi_tenant:
             msg = (
                 "No authentication method provided. "
                 "Please provide (username/password), demo=True, "
-                "or (token/user_id_for_token)."
+                "(token/user_id_for_token) or credential_pool."
             )
             raise ValueError(msg)
         if auth_methods > 1:
             msg = (
                 "Multiple authentication methods provided. "
                 "Please provide only one: (username/password), "
-                "demo=True, or (token/user_id_for_token)."
+                "demo=True, (token/user_id_for_token) or credential_pool."
             )
             raise ValueError(msg)
 
@@ -110,50 +284,59 @@ class VRMAsyncAPI:
             )
             raise ValueError(msg)
 
-        self.username = username
-        self.password = password
-        self.is_demo = demo
-        self._pre_auth_token = token
-        self._pre_auth_user_id = user_id_for_token
-
-        self.user_id: int | None = None
-        self._auth_token: str | None = None
-
-        self._max_retries = max_retries
-        self._retry_backoff_base = retry_backoff_base
-        self._retry_on_5xx = retry_on_5xx
-
-        self.global_headers = {"Content-Type": "application/json"}
-        self.routes = routes_cls()
-
-        self._client: httpx.AsyncClient = httpx.AsyncClient(
-            base_url=base_url, timeout=timeout, **httpx_client_kwargs
-        )
-
-        if headers:
-            self.global_headers.update(headers)
-
-        if self._pre_auth_token:
-            self._auth_mode = "token"
-        elif self.is_demo:
-            self._auth_mode = "demo"
-        else:
-            self._auth_mode = "login"
+    def _build_http_client(
+        self,
+        base_url: str,
+        timeout: float | httpx.Timeout | None,
+        httpx_client_kwargs: dict[str, Any],
+        *,
+        http_client: httpx.AsyncClient | None,
+        transport: httpx.AsyncBaseTransport | None,
+    ) -> httpx.AsyncClient:
+        """Return the HTTP client to use, creating it unless shared.
 
-        self.users = UsersNamespace(self._request, self.routes)
-        self.installations = InstallationsNamespace(self._request, self.routes)
+        :param base_url: The base URL for the VRM API.
+        :param timeout: Request timeout of a created client.
+        :param httpx_client_kwargs: Extra kwargs of a created client;
+            they take precedence over the connection settings.
+        :param http_client: Shared client to use as-is.
+        :param transport: Shared transport for a created client.
+        :returns: The HTTP client.
+        :raises ValueError: If a shared client is combined with options
+            that only apply to a created client, or has no base URL.
+        """
+        if http_client is not None:
+            if httpx_client_kwargs or transport is not None:
+                msg = (
+                    "httpx_client_kwargs and transport cannot be combined "
+                    "with a shared http_client."
+                )
+                raise ValueError(msg)
+            if not str(http_client.base_url):
+                msg = "A shared http_client needs a base_url."
+                raise ValueError(msg)
+            return http_client
+        kwargs: dict[str, Any] = {}
+        if self.connection is not None and transport is None:
+            kwargs.update(self.connection.httpx_kwargs())
+        if transport is not None:
+            kwargs["transport"] = transport
+        kwargs.update(httpx_client_kwargs)
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout, **kwargs)
 
     async def _login(self) -> None:
         """Log in using username and password."""
         logger.info("Attempting to log in with username %s", self.username)
         try:
-            response = await self._client.post(
-                self.routes.AUTH_LOGIN,
-                json={
-                    "username": self.username,
-                    "password": self.password,
-                },
-            )
+            with self.tracer.span("vrm.login"):
+                response = await self._client.post(
+                    self.routes.AUTH_LOGIN,
+                    json={
+                        "username": self.username,
+                        "password": self.password,
+                    },
+                    extensions=self._trace_extensions(),
+                )
             response.raise_for_status()
             data = response.json()
             login_data = LoginResponse(**data)
@@ -214,7 +397,10 @@ class VRMAsyncAPI:
         """Log in using the demo account."""
         logger.debug("Attempting to log in as demo.")
         try:
-            response = await self._client.get(self.routes.AUTH_DEMO)
+            with self.tracer.span("vrm.login_as_demo"):
+                response = await self._client.get(
+                    self.routes.AUTH_DEMO, extensions=self._trace_extensions()
+                )
             response.raise_for_status()
             data = response.json()
             data["idUser"] = DEMO_USER_ID
@@ -239,29 +425,184 @@ class VRMAsyncAPI:
             "Connecting to VRM API with auth mode: %s",
             self._auth_mode,
         )
-        if self._auth_mode == "token":
-            self._auth_token = self._pre_auth_token
-            self.user_id = self._pre_auth_user_id
-            logger.info(
-                "Using pre-configured API token for user %s",
-                self.user_id,
-            )
-        elif self._auth_mode == "demo":
-            await self._login_as_demo()
-        else:
-            await self._login()
+        with self.tracer.span("vrm.connect", {"vrm.auth_mode": self._auth_mode}):
+            if self._auth_mode == "token":
+                self._auth_token = self._pre_auth_token
+                self.user_id = self._pre_auth_user_id
+                logger.info(
+                    "Using pre-configured API token for user %s",
+                    self.user_id,
+                )
+            elif self._auth_mode in {"login", "demo"}:
+                if not self._restore_session():
+                    await self._authenticate()
+                self._start_token_refresh()
+            if self.connection is not None and self.connection.prewarm:
+                await self._prewarm()
+                self._start_keep_warm()
+
+    async def disconnect(self, keep_session: bool | None = None) -> None:
+        """Log out (if applicable) and close the HTTP client session.
 
-    async def disconnect(self) -> None:
-        """Log out (if applicable) and close the HTTP client session."""
+        :param keep_session: Do not log out, so that a stored session
+            token stays valid for the next process. Defaults to True
+            when a token store is configured.
+        """
         logger.debug("Attempting to disconnect from VRM API")
+        if keep_session is None:
+            keep_session = self.token_store is not None
+        for task in (self._keep_warm_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._keep_warm_task = self._refresh_task = None
         if (self._auth_mode in {"login", "demo"}) and self._auth_token:
-            await self._logout()
+            if keep_session:
+                logger.debug("Keeping the session of user %s", self.user_id)
+            else:
+                if self.token_store is not None:
+                    self.token_store.delete(self._session_key)
+                await self._logout()
 
         self._auth_token = None
         self.user_id = None
-        if not self._client.is_closed:
+        if self._owns_http_client and not self._client.is_closed:
             await self._client.aclose()
 
+    async def _authenticate(self) -> None:
+        """Log in with the client's credentials or as the demo user."""
+        if self._auth_mode == "demo":
+            await self._login_as_demo()
+        else:
+            await self._login()
+        if (
+            self.token_store is not None
+            and self._auth_token
+            and self.user_id is not None
+        ):
+            self.token_store.save(
+                self._session_key,
+                StoredToken(
+                    self._auth_token, self.user_id, token_expiry(self._auth_token)
+                ),
+            )
+
+    @property
+    def _session_key(self) -> str:
+        """Key of this client's session in the token store."""
+        account = "demo" if self._auth_mode == "demo" else self.username
+        return f"{account}@{str(self._client.base_url).rstrip('/')}"
+
+    def _restore_session(self) -> bool:
+        """Use a still valid stored session token, if there is one.
+
+        :returns: Whether a stored token was restored.
+        """
+        if self.token_store is None:
+            return False
+        stored = self.token_store.load(self._session_key)
+        if stored is None or not stored.is_valid(self._refresh_margin or 0.0):
+            return False
+        self._auth_token = stored.token
+        self.user_id = stored.user_id
+        logger.info("Reusing the stored session of user %s", self.user_id)
+        return True
+
+    async def _reauthenticate_once(self, stale_token: str | None) -> None:
+        """Log in again unless another task already replaced ``stale_token``.
+
+        Only one task logs in at a time; tasks that were rejected with
+        the same token wait for it and then use the new token.
+
+        :param stale_token: The token the API rejected or that expires.
+        """
+        async with self._auth_lock:
+            if self._auth_token != stale_token:
+                return
+            logger.info("Session token expired, logging in again")
+            with self.tracer.span("vrm.reauthenticate"):
+                await self._authenticate()
+
+    def _start_token_refresh(self) -> None:
+        """Refresh the session token before it expires, if configured.
+
+        Failed refreshes are retried with exponential backoff up to
+        ``MAX_TOKEN_REFRESH_BACKOFF`` seconds. Rejected credentials stop
+        the refresh; a later 401 then goes through the re-login path.
+        """
+        margin = self._refresh_margin
+        if margin is None or self._refresh_task is not None:
+            return
+
+        async def refresh() -> None:
+            failures = 0
+            while self._auth_token and (expiry := token_expiry(self._auth_token)):
+                left = expiry - time.time()
+                # Halfway through for tokens shorter-lived than the margin.
+                delay = max(left - margin, left / 2, self.MIN_TOKEN_REFRESH_DELAY)
+                if failures:
+                    backoff = self.MIN_TOKEN_REFRESH_DELAY * 2**failures
+                    delay = max(delay, min(backoff, self.MAX_TOKEN_REFRESH_BACKOFF))
+                await asyncio.sleep(delay)
+                try:
+                    await self._reauthenticate_once(self._auth_token)
+                except VRMAuthenticationError as e:
+                    logger.warning("Stopping session token refresh: %s", e)
+                    return
+                except VRMAPIError as e:
+                    failures += 1
+                    logger.warning("Refreshing the session token failed: %s", e)
+                else:
+                    failures = 0
+
+        self._refresh_task = asyncio.get_running_loop().create_task(refresh())
+
+    async def _prewarm(self) -> None:
+        """Open the configured number of warm connections."""
+        assert self.connection is not None  # noqa: S101
+        started = time.perf_counter()
+        with self.tracer.span(
+            "vrm.prewarm", {"vrm.connections": self.connection.prewarm}
+        ) as span:
+            opened = await prewarm(
+                self._client,
+                self.connection.prewarm,
+                extensions=self._trace_extensions,
+            )
+            span.set_attribute("vrm.opened", opened)
+        seconds = time.perf_counter() - started
+        logger.debug("Opened %d warm connections in %.3fs", opened, seconds)
+        if self.metrics is not None:
+            self.metrics.record_warmup(WarmupEvent(opened, seconds))
+
+    def _start_keep_warm(self) -> None:
+        """Start re-warming the pool periodically, if configured."""
+        assert self.connection is not None  # noqa: S101
+        interval = self.connection.keep_warm_interval
+        if interval is None or self._keep_warm_task is not None:
+            return
+
+        async def keep_warm() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                await self._prewarm()
+
+        self._keep_warm_task = asyncio.get_running_loop().create_task(keep_warm())
+
+    def with_credential(self, credential: Credential) -> "CredentialSession":
+        """Return namespaces making calls as another user through this client.
+
+        The calls share this client's connection pool, retry handling,
+        metrics and tracing; only the ``X-Authorization`` header differs.
+        Sessions are cheap and independent, so any number of them can
+        be used concurrently.
+
+        :param credential: The token and user ID to call with.
+        :returns: A session with ``users`` and ``installations``.
+        """
+        return CredentialSession(self, credential)
+
     async def __aenter__(self) -> Self:
         """Async context manager entry: connect and return self."""
         await self.connect()
@@ -283,6 +624,8 @@ class VRMAsyncAPI:
         params: dict[str, Any] | None = None,
         json_data: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
+        *,
+        credential: Credential | None = None,
     ) -> dict[str, Any]:
         """Make an authenticated API request with retry and rate-limit handling.
 
@@ -290,23 +633,51 @@ class VRMAsyncAPI:
         header. Optionally retries on transient 5xx errors. Uses exponential
         backoff: ``max(retry_after, base * 2^attempt)`` seconds.
 
+        In login and demo mode a 401 response makes the client log in
+        again (see ``reauthenticate``) and the request is sent once more.
+
         :param method: HTTP method (GET, POST, etc.)
         :param url: The endpoint URL to request.
         :param params: Optional query parameters.
         :param json_data: Optional JSON body.
         :param headers: Optional additional headers.
+        :param credential: Credential to call with instead of the
+            client's own session.
         :returns: Parsed JSON response as a dictionary.
         :raises VRMRateLimitError: If rate limit retries are exhausted.
+        :raises VRMCircuitOpenError: If the route's circuit is open.
+        :raises VRMAuthenticationError: If the credentials are rejected when
+            logging in again after a 401.
         :raises VRMAPIRequestError: If the request fails.
         """
-        if not self._auth_token:
-            raise VRMAuthenticationError("Not logged in. Call connect() first.")
+        token = self._auth_token
+        kwargs = {"params": params, "json_data": json_data, "headers": headers}
+        try:
+            return await self._send(method, url, credential=credential, **kwargs)
+        except VRMAPIRequestError as e:
+            if not (
+                e.status_code == 401
+                and credential is None
+                and self._reauthenticate
+                and self._auth_mode in {"login", "demo"}
+            ):
+                raise
+        logger.warning("401 on %s %s, re-authenticating", method, url)
+        await self._reauthenticate_once(token)
+        return await self._send(method, url, credential=credential, **kwargs)
 
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None,
+        json_data: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        credential: Credential | None,
+    ) -> dict[str, Any]:
+        """Send a request with retries; see :meth:`_request`."""
         request_headers = self.global_headers.copy()
-        request_headers["X-Authorization"] = (
-            "Token " if self._auth_mode == "token" else "Bearer "
-        ) + self._auth_token
-
         if headers:
             request_headers.update(headers)
 
@@ -318,74 +689,355 @@ class VRMAsyncAPI:
         )
 
         last_exception: httpx.HTTPStatusError | None = None
+        instrumented = (
+            self.metrics is not None
+            or self.stall_monitor is not None
+            or self.circuit_breaker is not None
+            or self.tracer.enabled
+        )
+        route = resolve_route(self.routes, url).name if instrumented else ""
+        request_kwargs = {
+            "headers": request_headers,
+            "params": params,
+            "json": json_data,
+        }
 
-        for attempt in range(self._max_retries + 1):
-            try:
-                response = await self._client.request(
+        with self.tracer.span(
+            "vrm.request", {"http.method": method, "vrm.route": route}
+        ):
+            for attempt in range(self._max_retries + 1):
+                async with self._lease(credential) as leased:
+                    auth_header, auth_mode = self._authorization(leased)
+                    request_headers["X-Authorization"] = auth_header
+                    try:
+                        response, json_response = await self._attempt(
+                            method,
+                            url,
+                            route,
+                            attempt,
+                            request_kwargs,
+                            auth_mode=auth_mode,
+                        )
+                        if isinstance(json_response, dict) and not json_response.get(
+                            "success", True
+                        ):
+                            raise VRMAPIRequestError(
+                                "API indicated failure: "
+                                f"{json_response.get('errors', 'Unknown error')}",
+                                response.status_code,
+                                response.text,
+                            )
+                        return json_response
+
+                    except httpx.HTTPStatusError as e:
+                        last_exception = e
+                        wait = self._get_retry_delay(e, attempt)
+                        if wait is None:
+                            raise VRMAPIRequestError(
+                                f"API request failed: {e.response.text}",
+                                e.response.status_code,
+                                e.response.text,
+                            ) from e
+                        self._record_retry(
+                            route,
+                            method,
+                            attempt,
+                            e.response,
+                            wait,
+                            auth_mode=auth_mode,
+                        )
+                        if leased is not None and leased is not credential:
+                            wait = self._penalize(leased, e.response, wait)
+
+                    except VRMAPIRequestError:
+                        raise
+
+                    except Exception as e:
+                        raise VRMAPIRequestError(
+                            f"An unexpected error occurred during request: {e}"
+                        ) from e
+
+                # Back off after the lease is released, so a sleeping
+                # attempt does not count as in flight on its credential.
+                status = last_exception.response.status_code
+                logger.warning(
+                    "%d on %s %s, retry %d/%d in %.1fs",
+                    status,
                     method,
                     url,
-                    headers=request_headers,
-                    params=params,
-                    json=json_data,
+                    attempt + 1,
+                    self._max_retries,
+                    wait,
                 )
-                response.raise_for_status()
-                json_response = response.json()
-
-                if isinstance(json_response, dict) and not json_response.get(
-                    "success", True
+                with self.tracer.span(
+                    "vrm.retry_sleep", {"vrm.wait": wait, "http.status_code": status}
                 ):
-                    raise VRMAPIRequestError(
-                        "API indicated failure: "
-                        f"{json_response.get('errors', 'Unknown error')}",
-                        response.status_code,
-                        response.text,
-                    )
-                return json_response
-
-            except httpx.HTTPStatusError as e:
-                last_exception = e
-                wait = self._get_retry_delay(e, attempt)
-                if wait is not None:
-                    logger.warning(
-                        "%d on %s %s, retry %d/%d in %.1fs",
-                        e.response.status_code,
-                        method,
-                        url,
-                        attempt + 1,
-                        self._max_retries,
-                        wait,
-                    )
                     await asyncio.sleep(wait)
-                    continue
-                raise VRMAPIRequestError(
-                    f"API request failed: {e.response.text}",
-                    e.response.status_code,
-                    e.response.text,
-                ) from e
-
-            except VRMAPIRequestError:
-                raise
-
-            except Exception as e:
-                raise VRMAPIRequestError(
-                    f"An unexpected error occurred during request: {e}"
-                ) from e
 
         # All retries exhausted — raise the appropriate error
         assert last_exception is not None  # noqa: S101
+        raise self._retries_exhausted(last_exception) from last_exception
+
+    def _retries_exhausted(self, last_exception: httpx.HTTPStatusError) -> Exception:
+        """Return the error to raise once all retries failed."""
         status = last_exception.response.status_code
         text = last_exception.response.text
         if status == 429:
-            raise VRMRateLimitError(
+            return VRMRateLimitError(
                 f"Rate limit exceeded after {self._max_retries} retries: {text}",
                 status,
                 text,
-            ) from last_exception
-        raise VRMAPIRequestError(
+            )
+        return VRMAPIRequestError(
             f"Server error {status} after {self._max_retries} retries: {text}",
             status,
             text,
-        ) from last_exception
+        )
+
+    @contextlib.asynccontextmanager
+    async def _lease(
+        self, credential: Credential | None
+    ) -> AsyncIterator[Credential | None]:
+        """Yield the credential of one attempt, taken from the pool if any.
+
+        :param credential: Per-call credential; when None and the client
+            has a credential pool, a pooled credential is leased instead.
+        """
+        if credential is not None or self.credential_pool is None:
+            yield credential
+            return
+        async with self.credential_pool.lease() as leased:
+            yield leased
+
+    def _penalize(
+        self, credential: Credential, response: httpx.Response, wait: float
+    ) -> float:
+        """Rotate a rate-limited pooled credential out; return the wait left.
+
+        The request is retried at once with another credential; the pool
+        itself waits if every credential is under a penalty.
+        """
+        if response.status_code != 429:
+            return wait
+        assert self.credential_pool is not None  # noqa: S101
+        self.credential_pool.penalize(credential, wait)
+        return 0.0
+
+    def _authorization(self, credential: Credential | None) -> tuple[str, str]:
+        """Return the ``X-Authorization`` header value and auth mode label.
+
+        :param credential: Per-call credential, or None to use the
+            client's own session.
+        :raises VRMAuthenticationError: If there is no credential and the
+            client is not logged in.
+        """
+        if credential is not None:
+            return credential.header, credential.auth_mode
+        if not self._auth_token:
+            raise VRMAuthenticationError("Not logged in. Call connect() first.")
+        scheme = "Token" if self._auth_mode == "token" else "Bearer"
+        return f"{scheme} {self._auth_token}", self._auth_mode
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        route: str,
+        attempt: int,
+        request_kwargs: dict[str, Any],
+        *,
+        auth_mode: str,
+    ) -> tuple[httpx.Response, Any]:
+        """Perform a single HTTP attempt and decode its JSON body.
+
+        :param method: HTTP method.
+        :param url: The endpoint URL to request.
+        :param route: Route name of the request, for metrics and spans.
+        :param attempt: Zero-based attempt index.
+        :param request_kwargs: Headers, params and body of the request.
+        :param auth_mode: Auth mode of the request, for metrics.
+        :returns: The response and its decoded JSON body.
+        :raises httpx.HTTPStatusError: If the response is not a success.
+        """
+        started = time.perf_counter()
+        with (
+            self._circuit(route),
+            self.tracer.span("vrm.attempt", {"vrm.attempt": attempt}) as span,
+        ):
+            try:
+                response = await self._client.request(
+                    method, url, extensions=self._trace_extensions(), **request_kwargs
+                )
+            except Exception:
+                self._record_attempt(
+                    route, method, attempt, started, None, auth_mode=auth_mode
+                )
+                raise
+            span.set_attribute("http.status_code", response.status_code)
+            if not response.is_success:
+                self._record_attempt(
+                    route, method, attempt, started, response, auth_mode=auth_mode
+                )
+                response.raise_for_status()
+            decode_started = time.perf_counter()
+            try:
+                with self._blocking_section(route, "decode"):
+                    if self.profiler is None:
+                        payload = response.json()
+                    else:
+                        payload = self.profiler.decode(response)
+                if self.parse_executor is not None:
+                    note_payload_size(payload, len(response.content))
+                return response, payload
+            finally:
+                self._record_attempt(
+                    route,
+                    method,
+                    attempt,
+                    started,
+                    response,
+                    auth_mode=auth_mode,
+                    decode_started=decode_started,
+                )
+
+    def _blocking_section(self, route: str, phase: str) -> AbstractContextManager[None]:
+        """Return a context manager reporting event-loop stalls, if enabled."""
+        if self.stall_monitor is None:
+            return contextlib.nullcontext()
+        return self.stall_monitor.section(route, phase)
+
+    def _circuit(self, route: str) -> AbstractContextManager[None]:
+        """Return a context manager guarding an attempt, if enabled."""
+        if self.circuit_breaker is None:
+            return contextlib.nullcontext()
+        return self.circuit_breaker.guard(route)
+
+    def _trace_extensions(self) -> dict[str, Any] | None:
+        """Return httpx request extensions reporting connection phases."""
+        stats = self.connection_stats
+        if not self.tracer.enabled:
+            return None if stats is None else {"trace": stats.trace}
+        span_trace = self.tracer.httpcore_trace()
+        if stats is None:
+            return {"trace": span_trace}
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            await stats.trace(event, info)
+            await span_trace(event, info)
+
+        return {"trace": trace}
+
+    def _record_attempt(
+        self,
+        route: str,
+        method: str,
+        attempt: int,
+        started: float,
+        response: httpx.Response | None,
+        *,
+        auth_mode: str,
+        decode_started: float | None = None,
+    ) -> None:
+        """Record a finished HTTP attempt if metrics are enabled.
+
+        :param route: Route name of the request.
+        :param method: HTTP method.
+        :param attempt: Zero-based attempt index.
+        :param started: ``perf_counter`` value when the attempt started.
+        :param response: The response, or None if the attempt failed
+            without one.
+        :param auth_mode: Auth mode of the request.
+        :param decode_started: ``perf_counter`` value when JSON decoding
+            started, if the body was decoded.
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return
+        now = time.perf_counter()
+        metrics.record_request(
+            RequestEvent(
+                route=route,
+                method=method,
+                status=None if response is None else response.status_code,
+                auth_mode=auth_mode,
+                attempt=attempt,
+                seconds=(decode_started or now) - started,
+                response_bytes=0 if response is None else len(response.content),
+                decode_seconds=None if decode_started is None else now - decode_started,
+            )
+        )
+
+    def _record_retry(
+        self,
+        route: str,
+        method: str,
+        attempt: int,
+        response: httpx.Response,
+        wait: float,
+        *,
+        auth_mode: str,
+    ) -> None:
+        """Record a scheduled retry if metrics are enabled."""
+        if self.metrics is not None:
+            self.metrics.record_retry(
+                RetryEvent(
+                    route=route,
+                    method=method,
+                    status=response.status_code,
+                    auth_mode=auth_mode,
+                    attempt=attempt,
+                    wait=wait,
+                )
+            )
+
+    async def _parse(
+        self, model: type[ModelT], data: dict[str, Any], url: str
+    ) -> ModelT:
+        """Validate a response payload into ``model``, timing it if enabled.
+
+        Payloads that the parse executor accepts are validated in its
+        pool; the profiler and the stall monitor only see inline ones.
+
+        :param model: The response model class.
+        :param data: The decoded JSON payload.
+        :param url: The request path, used to label metrics and spans.
+        :returns: The validated model instance.
+        """
+        metrics = self.metrics
+        profiler = self.profiler
+        executor = self.parse_executor
+        offload = executor is not None and executor.should_offload(data)
+        if not offload and (
+            metrics is None
+            and profiler is None
+            and self.stall_monitor is None
+            and not self.tracer.enabled
+        ):
+            return model(**data)
+        route = resolve_route(self.routes, url).name
+        with self.tracer.span(
+            "vrm.validate",
+            {"vrm.route": route, "vrm.model": model.__name__, "vrm.offloaded": offload},
+        ):
+            started = time.perf_counter()
+            if offload:
+                assert executor is not None  # noqa: S101
+                result = await executor.run(model, data)
+            else:
+                with self._blocking_section(route, "validate"):
+                    if profiler is None:
+                        result = model(**data)
+                    else:
+                        result = profiler.validate(route, model, data)
+        if metrics is not None:
+            metrics.record_validation(
+                ValidationEvent(
+                    route=route,
+                    model=model.__name__,
+                    seconds=time.perf_counter() - started,
+                )
+            )
+        return result
 
     def _get_retry_delay(
         self,
@@ -429,3 +1081,28 @@ class VRMAsyncAPI:
         except ValueError:
             logger.warning("Could not parse Retry-After header: %s", raw)
             return 0.0
+
+
+class CredentialSession:
+    """API namespaces making calls as one credential through a shared client."""
+
+    def __init__(self, client: VRMAsyncAPI, credential: Credential) -> None:
+        """Initialize the session.
+
+        :param client: The client whose connections and settings are used.
+        :param credential: The token and user ID to call with.
+        """
+        self.client = client
+        self.credential = credential
+        request = functools.partial(client._request, credential=credential)  # noqa: SLF001
+        self.users = UsersNamespace(request, client.routes, client._parse)  # noqa: SLF001
+        self.installations = InstallationsNamespace(
+            request,
+            client.routes,
+            client._parse,  # noqa: SLF001
+        )
+
+    @property
+    def user_id(self) -> int:
+        """ID of the user the credential belongs to."""
+        return self.credential.user_id
@@ -1,15 +1,40 @@
 """Base API namespace for VRM API client."""
 
 from collections.abc import Callable
-from typing import Any
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
 
 from vrmapi_async.routes import VRMRoutes
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+async def default_parse(
+    model: type[ModelT],
+    data: dict[str, Any],
+    url: str,  # noqa: ARG001
+) -> ModelT:
+    """Validate ``data`` into ``model``; ``url`` is unused here."""
+    return model(**data)
+
 
 class BaseNamespace:
     """Base class for API namespaces."""
 
-    def __init__(self, request_method: Callable[..., Any], routes: VRMRoutes) -> None:
-        """Initialize namespace with request method and routes."""
+    def __init__(
+        self,
+        request_method: Callable[..., Any],
+        routes: VRMRoutes,
+        parse_method: Callable[..., Any] = default_parse,
+    ) -> None:
+        """Initialize namespace with request method, routes and parser.
+
+        :param request_method: Coroutine performing an API request.
+        :param routes: The routes used to build request paths.
+        :param parse_method: Coroutine function ``(model, data, url)``
+            validating a response payload into a model.
+        """
         self._request = request_method
+        self._parse = parse_method
         self.routes = routes
@@ -1,11 +1,14 @@
 """Installations API namespace for VRM API client."""
 
-from datetime import datetime
+import asyncio
+import logging
+from datetime import datetime, timedelta
 from typing import Any
 
 from vrmapi_async.client.base.api import BaseNamespace
 from vrmapi_async.utils import datetime_to_epoch
 
+from .planner import StatsPlan, build_stats_plan, merge_stats_responses
 from .schema import (
     InstancedStatsResponse,
     ListUsersResponse,
@@ -14,6 +17,8 @@ from .schema import (
     StatsType,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class InstallationsNamespace(BaseNamespace):
     """Namespace for installation-related API operations."""
@@ -49,7 +54,7 @@ class InstallationsNamespace(BaseNamespace):
 
         url = self.routes.INSTALLATIONS_STATS.format(site_id=site_id)
         response_data = await self._request("GET", url, params=params)
-        return StatsResponse(**response_data)
+        return await self._parse(StatsResponse, response_data, url)
 
     async def get_stats_by_instance(
         self,
@@ -86,7 +91,7 @@ class InstallationsNamespace(BaseNamespace):
 
         url = self.routes.INSTALLATIONS_STATS.format(site_id=site_id)
         response_data = await self._request("GET", url, params=params)
-        return InstancedStatsResponse(**response_data)
+        return await self._parse(InstancedStatsResponse, response_data, url)
 
     async def get_consumption_stats(
         self,
@@ -111,6 +116,86 @@ class InstallationsNamespace(BaseNamespace):
             end=end,
         )
 
+    def plan_stats(
+        self,
+        site_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        stats_type: StatsType = StatsType.LIVE_FEED,
+        target_points: int | None = None,
+        min_resolution: timedelta | None = None,
+        attribute_codes: list[str] | None = None,
+    ) -> StatsPlan:
+        """Plan the cheapest set of stats requests for a resolution.
+
+        Picks the coarsest :class:`StatsInterval` that still yields
+        ``target_points`` points over the range and/or does not exceed
+        ``min_resolution`` per point, then splits the range into chunks
+        that respect the per-interval maximum period. No request is
+        made; inspect :attr:`StatsPlan.num_requests` and pass the plan
+        to :meth:`execute_stats_plan`.
+
+        :param site_id: The installation ID.
+        :param start: Start datetime (UTC if naive).
+        :param end: End datetime (UTC if naive).
+        :param stats_type: Type of stats to fetch (default: live_feed).
+        :param target_points: Minimum number of points wanted.
+        :param min_resolution: Longest acceptable duration of one point.
+        :param attribute_codes: Attribute codes for custom type.
+        :returns: A StatsPlan describing the chunked requests.
+        :raises ValueError: If no resolution constraint is given or the
+            range is empty.
+        """
+        plan = build_stats_plan(
+            site_id,
+            start,
+            end,
+            stats_type=stats_type,
+            target_points=target_points,
+            min_resolution=min_resolution,
+            attribute_codes=attribute_codes,
+        )
+        logger.debug(
+            "Planned %d request(s) at interval %s for site %s",
+            plan.num_requests,
+            plan.interval,
+            site_id,
+        )
+        return plan
+
+    async def execute_stats_plan(
+        self, plan: StatsPlan, max_concurrency: int = 4
+    ) -> StatsResponse:
+        """Execute a plan from :meth:`plan_stats` and merge the results.
+
+        :param plan: The plan to execute.
+        :param max_concurrency: Maximum number of chunks in flight.
+        :returns: A single StatsResponse covering the whole range.
+        """
+        logger.info(
+            "Executing stats plan for site %s: %d request(s) at interval %s",
+            plan.site_id,
+            plan.num_requests,
+            plan.interval,
+        )
+        semaphore = asyncio.Semaphore(max_concurrency)
+        attribute_codes = list(plan.attribute_codes) if plan.attribute_codes else None
+
+        async def fetch(chunk_start: datetime, chunk_end: datetime) -> StatsResponse:
+            async with semaphore:
+                return await self.get_stats(
+                    plan.site_id,
+                    stats_type=plan.stats_type,
+                    interval=plan.interval,
+                    start=chunk_start,
+                    end=chunk_end,
+                    attribute_codes=attribute_codes,
+                )
+
+        responses = await asyncio.gather(*(fetch(s, e) for s, e in plan.chunks))
+        return merge_stats_responses(responses)
+
     async def list_users(self, site_id: int) -> ListUsersResponse:
         """List users for a given installation.
 
@@ -123,4 +208,4 @@ class InstallationsNamespace(BaseNamespace):
         """
         url = self.routes.INSTALLATIONS_USERS_LIST.format(site_id=site_id)
         response_data = await self._request("GET", url)
-        return ListUsersResponse(**response_data)
+        return await self._parse(ListUsersResponse, response_data, url)
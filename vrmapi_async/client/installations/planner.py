@@ -0,0 +1,209 @@
+"""Query planning for the /installations/{id}/stats endpoint.
+
+The VRM API caps the time range a single stats request may cover,
+depending on the requested :class:`StatsInterval`. The helpers here
+pick the cheapest interval for a desired resolution, split a range
+into valid request chunks and merge the chunked responses back into
+a single :class:`StatsResponse`.
+"""
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from vrmapi_async.utils import as_utc
+
+from .schema import StatsInterval, StatsRecord, StatsResponse, StatsType
+
+# Nominal length of one data point for each interval. Calendar based
+# intervals (months, years) use their average length, which is only
+# used for point count estimates.
+INTERVAL_DURATIONS: dict[StatsInterval, timedelta] = {
+    StatsInterval.FIFTEEN_MINS: timedelta(minutes=15),
+    StatsInterval.HOURS: timedelta(hours=1),
+    StatsInterval.TWO_HOURS: timedelta(hours=2),
+    StatsInterval.DAYS: timedelta(days=1),
+    StatsInterval.WEEKS: timedelta(weeks=1),
+    StatsInterval.MONTHS: timedelta(days=30.436875),
+    StatsInterval.YEARS: timedelta(days=365.2425),
+}
+
+# Maximum range a single request may cover, as documented on
+# :class:`StatsInterval`. Calendar based limits are rounded down so
+# that a chunk never exceeds the limit regardless of leap years.
+# NOTE: 2hours is undocumented, assume the same limit as hours.
+MAX_PERIODS: dict[StatsInterval, timedelta] = {
+    StatsInterval.FIFTEEN_MINS: timedelta(days=31),
+    StatsInterval.HOURS: timedelta(days=31),
+    StatsInterval.TWO_HOURS: timedelta(days=31),
+    StatsInterval.DAYS: timedelta(days=180),
+    StatsInterval.WEEKS: timedelta(days=140),
+    StatsInterval.MONTHS: timedelta(days=730),
+    StatsInterval.YEARS: timedelta(days=1825),
+}
+
+# Intervals ordered from the coarsest to the finest resolution.
+INTERVALS_COARSE_TO_FINE: tuple[StatsInterval, ...] = tuple(
+    sorted(INTERVAL_DURATIONS, key=lambda i: INTERVAL_DURATIONS[i], reverse=True)
+)
+
+
+def choose_interval(
+    start: datetime,
+    end: datetime,
+    target_points: int | None = None,
+    min_resolution: timedelta | None = None,
+) -> StatsInterval:
+    """Pick the coarsest interval satisfying the requested resolution.
+
+    With ``target_points``, the interval must yield at least that many
+    points over ``[start, end)``. With ``min_resolution``, a single
+    point must not span more than the given duration. When both are
+    given, both constraints apply. If no interval is fine enough, the
+    finest available interval is returned.
+
+    :param start: Start of the requested range (UTC if naive).
+    :param end: End of the requested range (UTC if naive).
+    :param target_points: Minimum number of points wanted.
+    :param min_resolution: Longest acceptable duration of one point.
+    :returns: The chosen StatsInterval.
+    :raises ValueError: If no constraint is given or the range is empty.
+    """
+    if target_points is None and min_resolution is None:
+        msg = "Either 'target_points' or 'min_resolution' must be provided."
+        raise ValueError(msg)
+    span = as_utc(end) - as_utc(start)
+    if span <= timedelta(0):
+        msg = f"Invalid range: start ({start}) must be before end ({end})."
+        raise ValueError(msg)
+
+    for interval in INTERVALS_COARSE_TO_FINE:
+        duration = INTERVAL_DURATIONS[interval]
+        if min_resolution is not None and duration > min_resolution:
+            continue
+        if target_points is not None and span / duration < target_points:
+            continue
+        return interval
+    return INTERVALS_COARSE_TO_FINE[-1]
+
+
+def split_range(
+    start: datetime,
+    end: datetime,
+    interval: StatsInterval,
+) -> list[tuple[datetime, datetime]]:
+    """Split ``[start, end)`` into chunks valid for a single request.
+
+    :param start: Start of the range (UTC if naive).
+    :param end: End of the range (UTC if naive).
+    :param interval: The interval the chunks will be requested with.
+    :returns: Consecutive ``(chunk_start, chunk_end)`` pairs.
+    """
+    start, end = as_utc(start), as_utc(end)
+    max_period = MAX_PERIODS[interval]
+    chunks: list[tuple[datetime, datetime]] = []
+    cursor = start
+    while cursor < end:
+        chunk_end = min(cursor + max_period, end)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end
+    return chunks
+
+
+@dataclass(frozen=True)
+class StatsPlan:
+    """An executable plan of chunked stats requests for one site."""
+
+    site_id: int
+    stats_type: StatsType
+    interval: StatsInterval
+    start: datetime
+    end: datetime
+    chunks: tuple[tuple[datetime, datetime], ...]
+    attribute_codes: tuple[str, ...] | None = None
+
+    @property
+    def num_requests(self) -> int:
+        """Number of API requests needed to execute the plan."""
+        return len(self.chunks)
+
+    @property
+    def estimated_points(self) -> int:
+        """Estimated number of points per attribute in the result."""
+        return math.ceil((self.end - self.start) / INTERVAL_DURATIONS[self.interval])
+
+
+def build_stats_plan(
+    site_id: int,
+    start: datetime,
+    end: datetime,
+    *,
+    stats_type: StatsType = StatsType.LIVE_FEED,
+    target_points: int | None = None,
+    min_resolution: timedelta | None = None,
+    attribute_codes: list[str] | None = None,
+) -> StatsPlan:
+    """Build a :class:`StatsPlan` for the given range and resolution.
+
+    See :func:`choose_interval` for how the interval is picked.
+
+    :param site_id: The installation ID.
+    :param start: Start of the range (UTC if naive).
+    :param end: End of the range (UTC if naive).
+    :param stats_type: Type of stats to fetch.
+    :param target_points: Minimum number of points wanted.
+    :param min_resolution: Longest acceptable duration of one point.
+    :param attribute_codes: Attribute codes for custom type.
+    :returns: The resulting plan.
+    """
+    start, end = as_utc(start), as_utc(end)
+    interval = choose_interval(start, end, target_points, min_resolution)
+    return StatsPlan(
+        site_id=site_id,
+        stats_type=stats_type,
+        interval=interval,
+        start=start,
+        end=end,
+        chunks=tuple(split_range(start, end, interval)),
+        attribute_codes=tuple(attribute_codes) if attribute_codes else None,
+    )
+
+
+def merge_stats_responses(responses: Iterable[StatsResponse]) -> StatsResponse:
+    """Merge chunked stats responses into a single response.
+
+    Records are concatenated per attribute, sorted by timestamp and
+    de-duplicated (chunk boundaries may return the same point twice).
+    Numeric totals are summed; a total stays ``False`` only if it was
+    ``False`` in every chunk.
+
+    :param responses: Responses of consecutive chunks.
+    :returns: A single merged StatsResponse.
+    """
+    series: dict[str, dict[int, StatsRecord]] = {}
+    empty: set[str] = set()
+    totals: dict[str, float | bool] = {}
+
+    for response in responses:
+        for key, val in response.records.items():
+            if isinstance(val, list):
+                bucket = series.setdefault(key, {})
+                for record in val:
+                    bucket[record.timestamp] = record
+            else:
+                empty.add(key)
+        for key, total in response.totals.items():
+            if isinstance(total, bool):
+                totals.setdefault(key, total)
+            else:
+                prev = totals.get(key)
+                base = prev if not isinstance(prev, bool) and prev is not None else 0.0
+                totals[key] = base + total
+
+    records: dict[str, list[StatsRecord] | bool] = dict.fromkeys(
+        empty - series.keys(), False
+    )
+    for key, bucket in series.items():
+        records[key] = [bucket[ts] for ts in sorted(bucket)]
+    return StatsResponse(success=True, records=records, totals=totals)
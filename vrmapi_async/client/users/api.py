@@ -32,7 +32,7 @@ class UsersNamespace(BaseNamespace):
         """
         url = self.routes.USERS_ABOUTME
         response_data = await self._request("GET", url)
-        return AboutMeResponse(**response_data)
+        return await self._parse(AboutMeResponse, response_data, url)
 
     async def create_installation(
         self, user_id: int, identifier: str
@@ -42,7 +42,7 @@ class UsersNamespace(BaseNamespace):
         url = self.routes.USERS_INSTALLATIONS_CREATE.format(user_id=user_id)
         json_data = {"installation_identifier": identifier}
         response_data = await self._request("POST", url, json_data=json_data)
-        return CreateInstallationResponse(**response_data)
+        return await self._parse(CreateInstallationResponse, response_data, url)
 
     async def search_installations_by_query(
         self, user_id: int, query: str
@@ -59,7 +59,7 @@ class UsersNamespace(BaseNamespace):
         url = self.routes.USERS_INSTALLATIONS_SEARCH.format(user_id=user_id)
         params = {"query": query}
         response_data = await self._request("GET", url, params=params)
-        return InstallationSearchResponse(**response_data)
+        return await self._parse(InstallationSearchResponse, response_data, url)
 
     async def get_site_id_by_identifier(
         self, user_id: int, identifier: str
@@ -73,7 +73,7 @@ class UsersNamespace(BaseNamespace):
         url = self.routes.USERS_INSTALLATIONS_ID_BY_IDENTIFIER.format(user_id=user_id)
         json_data = {"installation_identifier": identifier}
         response_data = await self._request("POST", url, json_data=json_data)
-        return SiteIdByIdentifierResponse(**response_data)
+        return await self._parse(SiteIdByIdentifierResponse, response_data, url)
 
     async def list_installations(self, user_id: int) -> UserSitesResponse:
         """Fetch the non-extended list of sites for the user.
@@ -83,7 +83,7 @@ class UsersNamespace(BaseNamespace):
         """
         url = self.routes.USERS_INSTALLATIONS_LIST.format(user_id=user_id)
         response_data = await self._request("GET", url)
-        return UserSitesResponse(**response_data)
+        return await self._parse(UserSitesResponse, response_data, url)
 
     async def list_installations_extended(
         self, user_id: int
@@ -96,7 +96,7 @@ class UsersNamespace(BaseNamespace):
         url = self.routes.USERS_INSTALLATIONS_LIST.format(user_id=user_id)
         params = {"extended": "1"}
         response_data = await self._request("GET", url, params=params)
-        return UserSitesExtendedResponse(**response_data)
+        return await self._parse(UserSitesExtendedResponse, response_data, url)
 
     async def list_access_tokens(self, user_id: int) -> UsersListAccessTokensResponse:
         """List all access tokens for the user.
@@ -106,7 +106,7 @@ class UsersNamespace(BaseNamespace):
         """
         url = self.routes.USERS_ACCESSTOKENS_LIST.format(user_id=user_id)
         response_data = await self._request("GET", url)
-        return UsersListAccessTokensResponse(**response_data)
+        return await self._parse(UsersListAccessTokensResponse, response_data, url)
 
     async def create_access_token(
         self,
@@ -129,7 +129,7 @@ class UsersNamespace(BaseNamespace):
             )
 
         response_data = await self._request("POST", url, json_data=json_data)
-        return CreateAccessTokenResponse(**response_data)
+        return await self._parse(CreateAccessTokenResponse, response_data, url)
 
     async def revoke_access_token(
         self, user_id: int, access_token_id: int
@@ -144,4 +144,4 @@ class UsersNamespace(BaseNamespace):
             user_id=user_id, access_token_id=access_token_id
         )
         response_data = await self._request("DELETE", url)
-        return RevokeAccessTokenResponse(**response_data)
+        return await self._parse(RevokeAccessTokenResponse, response_data, url)
@@ -0,0 +1,221 @@
+"""Connection pool settings and connection reuse statistics.
+
+:class:`ConnectionSettings` configures the HTTP client that
+:class:`~vrmapi_async.client.VRMAsyncAPI` builds: HTTP/2, pool limits
+and keep-alive. For fan-out workloads (many concurrent requests to the
+one VRM host) HTTP/2 multiplexes all of them over a few connections
+instead of opening one HTTP/1.1 connection per in-flight request::
+
+    client = VRMAsyncAPI(token="...", connection=ConnectionSettings.fan_out())
+
+HTTP/2 needs the ``h2`` package (``pip install vrmapi-async[http2]``).
+
+With ``prewarm`` set, :meth:`~vrmapi_async.client.VRMAsyncAPI.connect`
+opens that many connections up front (see :func:`prewarm`), so the
+first burst of requests does not pay for DNS, TCP and TLS handshakes;
+``keep_warm_interval`` keeps them open across idle periods.
+
+:class:`ConnectionStats` counts opened connections and requests from
+httpcore's ``trace`` events, which shows how well connections are
+reused.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Self
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - exercised without h2 installed
+    HAS_H2 = False
+else:
+    HAS_H2 = True
+
+
+@dataclass(frozen=True)
+class ConnectionSettings:
+    """HTTP protocol and connection pool settings of the client."""
+
+    http2: bool = False
+    http1: bool = True
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 5.0
+    track_reuse: bool = True
+    prewarm: int = 0
+    keep_warm_interval: float | None = None
+
+    def __post_init__(self) -> None:
+        """Check that the settings can be used.
+
+        :raises ImportError: If HTTP/2 is requested but h2 is missing.
+        :raises ValueError: If both protocols are disabled, or warm
+            connections would expire between keep-warm rounds.
+        """
+        if self.http2 and not HAS_H2:
+            msg = "HTTP/2 requires the h2 package; install vrmapi-async[http2]."
+            raise ImportError(msg)
+        if not (self.http1 or self.http2):
+            msg = "At least one of http1 and http2 must be enabled."
+            raise ValueError(msg)
+        if (
+            self.keep_warm_interval is not None
+            and self.keepalive_expiry is not None
+            and self.keep_warm_interval >= self.keepalive_expiry
+        ):
+            msg = "keep_warm_interval must be shorter than keepalive_expiry."
+            raise ValueError(msg)
+
+    @classmethod
+    def fan_out(
+        cls,
+        max_connections: int = 4,
+        keepalive_expiry: float = 30.0,
+    ) -> Self:
+        """Return settings for many concurrent requests to the API.
+
+        Enables HTTP/2, so each connection carries many concurrent
+        streams, and keeps the few connections alive between bursts.
+
+        :param max_connections: Maximum number of open connections.
+        :param keepalive_expiry: Seconds an idle connection is kept.
+        """
+        return cls(
+            http2=True,
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        """Return a transport with these settings, to share between clients.
+
+        Pass it as ``transport=`` to several
+        :class:`~vrmapi_async.client.VRMAsyncAPI` instances so that they
+        share one connection pool; close it with ``await transport.aclose()``.
+        """
+        kwargs = self.httpx_kwargs()
+        return httpx.AsyncHTTPTransport(
+            http1=kwargs["http1"], http2=kwargs["http2"], limits=kwargs["limits"]
+        )
+
+    def httpx_kwargs(self) -> dict[str, Any]:
+        """Return the matching ``httpx.AsyncClient`` keyword arguments."""
+        return {
+            "http1": self.http1,
+            "http2": self.http2,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+
+async def prewarm(
+    client: httpx.AsyncClient,
+    connections: int,
+    url: str = "",
+    extensions: Callable[[], dict[str, Any] | None] | None = None,
+) -> int:
+    """Open up to ``connections`` pooled connections to the client's host.
+
+    Sends that many concurrent ``HEAD`` requests, so the pool has to
+    open a connection for each one that finds no idle connection; the
+    status of the responses does not matter. Idle connections are only
+    touched, which also restarts their keep-alive timer. Over HTTP/2 a
+    single connection serves all of them. Failures are logged, as
+    warming up is only an optimization.
+
+    :param client: The HTTP client whose pool is warmed up.
+    :param connections: Number of concurrent requests.
+    :param url: URL to request, relative to the client's base URL.
+    :param extensions: Factory of per-request extensions, e.g. to
+        trace the warm-up requests.
+    :returns: Number of connections opened.
+    """
+    opened = ConnectionStats()
+
+    async def touch() -> None:
+        extra = (extensions() if extensions is not None else None) or {}
+        outer = extra.get("trace")
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            await opened.trace(event, info)
+            if outer is not None:
+                await outer(event, info)
+
+        try:
+            response = await client.request(
+                "HEAD", url, extensions={**extra, "trace": trace}
+            )
+            await response.aclose()
+        except httpx.HTTPError as e:
+            logger.warning("Warming up a connection failed: %s", e)
+
+    await asyncio.gather(*(touch() for _ in range(connections)))
+    return opened.connections_opened
+
+
+class ConnectionStats:
+    """Count connections and requests from httpcore ``trace`` events."""
+
+    def __init__(self) -> None:
+        """Initialize all counters to zero."""
+        self.connections_opened = 0
+        self.connect_failures = 0
+        self.tls_handshakes = 0
+        self.requests: Counter[str] = Counter()
+
+    @property
+    def total_requests(self) -> int:
+        """Number of requests sent, over all protocols."""
+        return self.requests.total()
+
+    @property
+    def reused_requests(self) -> int:
+        """Requests sent over an already open connection."""
+        return max(0, self.total_requests - self.connections_opened)
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests that did not open a connection."""
+        total = self.total_requests
+        return self.reused_requests / total if total else 0.0
+
+    async def trace(self, event: str, info: dict[str, Any]) -> None:  # noqa: ARG002
+        """Count one httpcore trace event; usable as ``trace`` extension."""
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event == "connection.connect_tcp.failed":
+            self.connect_failures += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event.endswith(".send_request_headers.started"):
+            # "http11" or "http2"
+            self.requests[event.partition(".")[0]] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as a plain dictionary."""
+        return {
+            "connections_opened": self.connections_opened,
+            "connect_failures": self.connect_failures,
+            "tls_handshakes": self.tls_handshakes,
+            "requests": dict(self.requests),
+            "reused_requests": self.reused_requests,
+            "reuse_ratio": self.reuse_ratio,
+        }
+
+    def reset(self) -> None:
+        """Set all counters back to zero."""
+        self.connections_opened = 0
+        self.connect_failures = 0
+        self.tls_handshakes = 0
+        self.requests.clear()
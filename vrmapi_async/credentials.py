@@ -0,0 +1,182 @@
+"""Credentials for issuing requests on behalf of several VRM users.
+
+A :class:`Credential` is an access token together with the user it
+belongs to. Pass one to
+:meth:`~vrmapi_async.client.VRMAsyncAPI.with_credential` to make
+namespace calls as that user through a shared client, so that many
+tenants share one connection pool, retry handling and metrics registry.
+
+VRM rate limits apply per token. A :class:`CredentialPool` passed as
+``credential_pool=`` spreads a client's requests over several tokens
+and takes a token out of rotation while it is under a ``Retry-After``
+penalty, so the aggregate throughput grows with the number of tokens.
+
+:func:`token_expiry` reads the expiry of a JWT, which the client uses
+to refresh a login session before it runs out.
+"""
+
+import asyncio
+import base64
+import binascii
+import contextlib
+import itertools
+import json
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Literal
+
+
+@dataclass(frozen=True)
+class Credential:
+    """An access token and the ID of the user it authenticates."""
+
+    token: str = field(repr=False)
+    user_id: int
+    scheme: Literal["Token", "Bearer"] = "Token"
+
+    @property
+    def auth_mode(self) -> str:
+        """Auth mode label used in metrics: ``"token"`` or ``"bearer"``."""
+        return "token" if self.scheme == "Token" else "bearer"
+
+    @property
+    def header(self) -> str:
+        """Value of the ``X-Authorization`` header."""
+        return f"{self.scheme} {self.token}"
+
+
+def token_expiry(token: str) -> float | None:
+    """Return the ``exp`` claim of a JWT as a Unix timestamp.
+
+    The signature is not checked; the claim is only used to schedule a
+    refresh.
+
+    :param token: A bearer token.
+    :returns: The expiry time, or None if ``token`` is not a JWT with
+        a numeric ``exp`` claim.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    if isinstance(exp, bool) or not isinstance(exp, int | float):
+        return None
+    return float(exp)
+
+
+class PoolStrategy(StrEnum):
+    """How a :class:`CredentialPool` picks the credential of a request."""
+
+    LEAST_LOADED = "least_loaded"
+    ROUND_ROBIN = "round_robin"
+
+
+@dataclass
+class CredentialState:
+    """Usage of one credential in a pool."""
+
+    credential: Credential
+    in_flight: int = 0
+    requests: int = 0
+    penalties: int = 0
+    penalized_until: float = 0.0
+
+
+class CredentialPool:
+    """Spread requests over several credentials, skipping rate-limited ones."""
+
+    def __init__(
+        self,
+        credentials: Iterable[Credential | tuple[str, int]],
+        strategy: PoolStrategy | str = PoolStrategy.LEAST_LOADED,
+    ) -> None:
+        """Initialize the pool.
+
+        :param credentials: Credentials, or ``(token, user_id)`` pairs
+            of access tokens.
+        :param strategy: ``least_loaded`` picks the credential with the
+            fewest requests in flight, ``round_robin`` takes turns.
+        :raises ValueError: If there are no credentials or the strategy
+            is unknown.
+        """
+        self.strategy = PoolStrategy(strategy)
+        self.states = [
+            CredentialState(c if isinstance(c, Credential) else Credential(*c))
+            for c in credentials
+        ]
+        if not self.states:
+            msg = "A credential pool needs at least one credential."
+            raise ValueError(msg)
+        self._turn = itertools.count()
+
+    def __len__(self) -> int:
+        """Return the number of credentials in the pool."""
+        return len(self.states)
+
+    def _state(self, credential: Credential) -> CredentialState:
+        for state in self.states:
+            if state.credential == credential:
+                return state
+        msg = f"{credential!r} is not in this pool."
+        raise KeyError(msg)
+
+    def _pick(self, now: float) -> CredentialState | None:
+        # Start at a rotating offset so ties do not always hit the first.
+        start = next(self._turn) % len(self.states)
+        rotated = self.states[start:] + self.states[:start]
+        available = [s for s in rotated if s.penalized_until <= now]
+        if not available:
+            return None
+        if self.strategy is PoolStrategy.ROUND_ROBIN:
+            return available[0]
+        return min(available, key=lambda s: s.in_flight)
+
+    async def acquire(self) -> Credential:
+        """Return a credential for one request, waiting out penalties.
+
+        When every credential is under a penalty, waits until the first
+        one expires. Hand the credential back with :meth:`release`.
+        """
+        while True:
+            now = time.monotonic()
+            state = self._pick(now)
+            if state is not None:
+                state.in_flight += 1
+                state.requests += 1
+                return state.credential
+            await asyncio.sleep(min(s.penalized_until for s in self.states) - now)
+
+    def release(self, credential: Credential) -> None:
+        """Mark a request made with ``credential`` as finished."""
+        self._state(credential).in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncIterator[Credential]:
+        """Acquire a credential for the duration of a ``with`` block."""
+        credential = await self.acquire()
+        try:
+            yield credential
+        finally:
+            self.release(credential)
+
+    def penalize(self, credential: Credential, seconds: float) -> None:
+        """Take ``credential`` out of rotation for ``seconds``.
+
+        :param credential: A rate-limited credential of this pool.
+        :param seconds: Penalty, usually the response's ``Retry-After``.
+        """
+        state = self._state(credential)
+        state.penalties += 1
+        state.penalized_until = max(state.penalized_until, time.monotonic() + seconds)
+
+    def available(self) -> int:
+        """Return the number of credentials not under a penalty."""
+        now = time.monotonic()
+        return sum(s.penalized_until <= now for s in self.states)
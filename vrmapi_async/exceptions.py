@@ -35,3 +35,20 @@ class VRMAPIRequestError(VRMAPIError):
 
 class VRMRateLimitError(VRMAPIRequestError):
     """Raised when rate limit is exceeded and all retries are exhausted."""
+
+
+class VRMCircuitOpenError(VRMAPIRequestError):
+    """Raised without a request while the circuit of a route is open."""
+
+    def __init__(
+        self,
+        message: str,
+        route: str,
+        retry_after: float,
+        status_code: int | None = None,
+        response_text: str | None = None,
+    ) -> None:
+        """Initialize with the route and seconds until the next probe."""
+        super().__init__(message, status_code, response_text)
+        self.route = route
+        self.retry_after = retry_after
@@ -0,0 +1,312 @@
+"""Request instrumentation for the VRM API client.
+
+Pass a :class:`MetricsRegistry` as ``metrics=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI` to record, per route template
+(see :func:`~vrmapi_async.routes.resolve_route`):
+
+* request counts and latency histograms, per HTTP attempt;
+* retries by status code and time spent waiting on 429 responses;
+* response bytes and JSON decode time;
+* pydantic validation time of the response models;
+* event-loop stalls, see :mod:`vrmapi_async.monitoring`;
+* connection warm-ups, see :func:`vrmapi_async.connection.prewarm`.
+
+Read the aggregated values with :meth:`MetricsRegistry.snapshot`, or
+subscribe to the raw events with :meth:`MetricsRegistry.add_callback`.
+Without a registry the client skips all of this bookkeeping.
+"""
+
+import bisect
+import copy
+import logging
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def status_class(status: int | None) -> str:
+    """Return the status class label (``"2xx"``, ...) of a status code.
+
+    :param status: HTTP status code, or None if no response was received.
+    :returns: The class label, or ``"error"`` without a response.
+    """
+    if status is None:
+        return "error"
+    return f"{status // 100}xx"
+
+
+class Histogram:
+    """Cumulative-friendly histogram with fixed upper bounds."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialize an empty histogram.
+
+        :param bounds: Sorted bucket upper bounds; an implicit ``+Inf``
+            bucket is added.
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return ``(upper bound, cumulative count)`` pairs, ending at ``inf``."""
+        pairs = []
+        running = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts, strict=True):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+
+class RequestKey(NamedTuple):
+    """Labels of a request counter."""
+
+    route: str
+    method: str
+    status_class: str
+    auth_mode: str
+
+
+class RetryKey(NamedTuple):
+    """Labels of a retry counter."""
+
+    route: str
+    method: str
+    status: int
+    auth_mode: str
+
+
+class StallKey(NamedTuple):
+    """Labels of an event-loop stall counter."""
+
+    route: str
+    phase: str
+
+
+@dataclass
+class RequestStats:
+    """Aggregated HTTP attempts for one :class:`RequestKey`."""
+
+    latency: Histogram
+    response_bytes: int = 0
+    decode_count: int = 0
+    decode_seconds: float = 0.0
+
+    @property
+    def count(self) -> int:
+        """Number of attempts."""
+        return self.latency.count
+
+
+@dataclass
+class TimingStats:
+    """Count and total duration of a timed operation."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class RequestEvent:
+    """One finished HTTP attempt."""
+
+    route: str
+    method: str
+    status: int | None
+    auth_mode: str
+    attempt: int
+    seconds: float
+    response_bytes: int = 0
+    decode_seconds: float | None = None
+
+
+@dataclass(frozen=True)
+class RetryEvent:
+    """A retry scheduled after a failed attempt."""
+
+    route: str
+    method: str
+    status: int
+    auth_mode: str
+    attempt: int
+    wait: float
+
+
+@dataclass(frozen=True)
+class ValidationEvent:
+    """Validation of a response into a pydantic model."""
+
+    route: str
+    model: str
+    seconds: float
+
+
+@dataclass(frozen=True)
+class StallEvent:
+    """The event loop was blocked for longer than the stall threshold."""
+
+    route: str
+    phase: str
+    seconds: float
+
+
+@dataclass(frozen=True)
+class WarmupEvent:
+    """Pre-warming of the connection pool."""
+
+    connections: int
+    seconds: float
+
+
+MetricsEvent = RequestEvent | RetryEvent | ValidationEvent | StallEvent | WarmupEvent
+MetricsCallback = Callable[[MetricsEvent], None]
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Point-in-time copy of all recorded metrics."""
+
+    requests: dict[RequestKey, RequestStats] = field(default_factory=dict)
+    retries: dict[RetryKey, int] = field(default_factory=dict)
+    rate_limit_wait: dict[str, float] = field(default_factory=dict)
+    validation: dict[str, TimingStats] = field(default_factory=dict)
+    stalls: dict[StallKey, TimingStats] = field(default_factory=dict)
+    warmup: TimingStats = field(default_factory=TimingStats)
+    warmup_connections: int = 0
+
+
+class MetricsRegistry:
+    """In-process store of client metrics with event callbacks."""
+
+    def __init__(
+        self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> None:
+        """Initialize an empty registry.
+
+        :param latency_buckets: Upper bounds (seconds) of the latency
+            histogram buckets.
+        """
+        self.latency_buckets = tuple(latency_buckets)
+        self._callbacks: list[MetricsCallback] = []
+        self._requests: dict[RequestKey, RequestStats] = {}
+        self._retries: dict[RetryKey, int] = {}
+        self._rate_limit_wait: dict[str, float] = {}
+        self._validation: dict[str, TimingStats] = {}
+        self._stalls: dict[StallKey, TimingStats] = {}
+        self._warmup = TimingStats()
+        self._warmup_connections = 0
+
+    def add_callback(self, callback: MetricsCallback) -> None:
+        """Call ``callback`` with every recorded event.
+
+        Exceptions raised by callbacks are logged and swallowed, so a
+        faulty callback never breaks a request.
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: MetricsCallback) -> None:
+        """Stop calling a callback added with :meth:`add_callback`."""
+        self._callbacks.remove(callback)
+
+    def _emit(self, event: MetricsEvent) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Metrics callback %r failed", callback)
+
+    def record_request(self, event: RequestEvent) -> None:
+        """Record a finished HTTP attempt."""
+        key = RequestKey(
+            event.route, event.method, status_class(event.status), event.auth_mode
+        )
+        stats = self._requests.get(key)
+        if stats is None:
+            stats = self._requests[key] = RequestStats(Histogram(self.latency_buckets))
+        stats.latency.observe(event.seconds)
+        stats.response_bytes += event.response_bytes
+        if event.decode_seconds is not None:
+            stats.decode_count += 1
+            stats.decode_seconds += event.decode_seconds
+        self._emit(event)
+
+    def record_retry(self, event: RetryEvent) -> None:
+        """Record a scheduled retry and, for 429s, the wait or pool penalty."""
+        key = RetryKey(event.route, event.method, event.status, event.auth_mode)
+        self._retries[key] = self._retries.get(key, 0) + 1
+        if event.status == 429:
+            self._rate_limit_wait[event.route] = (
+                self._rate_limit_wait.get(event.route, 0.0) + event.wait
+            )
+        self._emit(event)
+
+    def record_validation(self, event: ValidationEvent) -> None:
+        """Record the validation of a response model."""
+        stats = self._validation.setdefault(event.route, TimingStats())
+        stats.count += 1
+        stats.seconds += event.seconds
+        self._emit(event)
+
+    def record_stall(self, event: StallEvent) -> None:
+        """Record an event-loop stall."""
+        stats = self._stalls.setdefault(
+            StallKey(event.route, event.phase), TimingStats()
+        )
+        stats.count += 1
+        stats.seconds += event.seconds
+        self._emit(event)
+
+    def record_warmup(self, event: WarmupEvent) -> None:
+        """Record a pre-warming of the connection pool."""
+        self._warmup.count += 1
+        self._warmup.seconds += event.seconds
+        self._warmup_connections += event.connections
+        self._emit(event)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Return a deep copy of the current metrics."""
+        return MetricsSnapshot(
+            requests=copy.deepcopy(self._requests),
+            retries=dict(self._retries),
+            rate_limit_wait=dict(self._rate_limit_wait),
+            validation=copy.deepcopy(self._validation),
+            stalls=copy.deepcopy(self._stalls),
+            warmup=copy.copy(self._warmup),
+            warmup_connections=self._warmup_connections,
+        )
+
+    def reset(self) -> None:
+        """Drop all recorded metrics; callbacks are kept."""
+        self._requests.clear()
+        self._retries.clear()
+        self._rate_limit_wait.clear()
+        self._validation.clear()
+        self._stalls.clear()
+        self._warmup = TimingStats()
+        self._warmup_connections = 0
@@ -0,0 +1,169 @@
+"""Event-loop stall detection for the VRM API client.
+
+Pass a :class:`LoopStallMonitor` as ``stall_monitor=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI` and the client times every
+synchronous section it runs on the event loop (JSON decoding and model
+validation). A section longer than the threshold blocked all other
+coroutines for that long: it is logged as a warning and recorded as a
+:class:`~vrmapi_async.metrics.StallEvent` labelled with the route and
+phase, which tells which calls are worth offloading.
+
+Started with :meth:`LoopStallMonitor.start` (or ``async with``), the
+monitor also samples the event-loop lag itself. Lag that no client
+section explains is reported with the ``OTHER`` route, since something
+else in the application blocked the loop.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from types import TracebackType
+from typing import Self
+
+from vrmapi_async.metrics import Histogram, MetricsRegistry, StallEvent
+from vrmapi_async.routes import UNMATCHED_ROUTE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _Section:
+    """Context manager timing one synchronous client section."""
+
+    __slots__ = ("_monitor", "_phase", "_route", "_started")
+
+    def __init__(self, monitor: "LoopStallMonitor", route: str, phase: str) -> None:
+        self._monitor = monitor
+        self._route = route
+        self._phase = phase
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.monotonic()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self._monitor.section_done(self._route, self._phase, self._started)
+
+
+class LoopStallMonitor:
+    """Detect event-loop stalls and attribute them to client calls."""
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        metrics: MetricsRegistry | None = None,
+        lag_buckets: tuple[float, ...] = DEFAULT_LAG_BUCKETS,
+    ) -> None:
+        """Initialize the monitor.
+
+        :param threshold: Seconds a section or lag must last to count as
+            a stall.
+        :param interval: Seconds between event-loop lag samples.
+        :param metrics: Registry receiving the stall events.
+        :param lag_buckets: Upper bounds of the :attr:`lag` histogram.
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.metrics = metrics
+        self.lag = Histogram(lag_buckets)
+        self.max_lag = 0.0
+        self.stalls: deque[StallEvent] = deque(maxlen=100)
+        self._recent: deque[tuple[float, float]] = deque(maxlen=32)
+        self._task: asyncio.Task[None] | None = None
+
+    def section(self, route: str, phase: str) -> _Section:
+        """Return a context manager timing a synchronous section.
+
+        :param route: Route name of the call running the section.
+        :param phase: What the section does, e.g. ``"decode"``.
+        """
+        return _Section(self, route, phase)
+
+    def section_done(self, route: str, phase: str, started: float) -> None:
+        """Report a section that started at ``started`` and just ended.
+
+        :param route: Route name of the call that ran the section.
+        :param phase: What the section did.
+        :param started: ``time.monotonic()`` value at its start.
+        """
+        ended = time.monotonic()
+        seconds = ended - started
+        if seconds < self.threshold:
+            return
+        self._recent.append((started, ended))
+        logger.warning(
+            "Event loop blocked for %.0f ms by %s of %s",
+            seconds * 1000,
+            phase,
+            route,
+        )
+        self._report(StallEvent(route, phase, seconds))
+
+    def _report(self, event: StallEvent) -> None:
+        self.stalls.append(event)
+        if self.metrics is not None:
+            self.metrics.record_stall(event)
+
+    def _explained(self, start: float, end: float) -> bool:
+        """Return whether a reported section overlaps ``[start, end]``."""
+        return any(s < end and e > start for s, e in self._recent)
+
+    def observe_lag(self, expected: float, woke: float) -> float:
+        """Record one lag sample of a timer due at ``expected``.
+
+        :param expected: ``time.monotonic()`` value the timer was due at.
+        :param woke: ``time.monotonic()`` value it actually fired at.
+        :returns: The lag in seconds.
+        """
+        lag = max(0.0, woke - expected)
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold and not self._explained(expected, woke):
+            logger.warning(
+                "Event loop blocked for %.0f ms outside the VRM client", lag * 1000
+            )
+            self._report(StallEvent(UNMATCHED_ROUTE.name, "unknown", lag))
+        return lag
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe_lag(expected, time.monotonic())
+
+    def start(self) -> None:
+        """Start sampling the lag of the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> None:
+        """Stop sampling the event-loop lag."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def __aenter__(self) -> Self:
+        """Start sampling and return the monitor."""
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop sampling."""
+        await self.stop()
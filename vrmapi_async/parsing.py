@@ -0,0 +1,261 @@
+"""Executors for validating large responses off the event loop.
+
+Pydantic validation is synchronous, so validating a huge response (an
+extended site list of a big fleet, a year of ``15mins`` stats) blocks
+the event loop while it runs. Pass a :class:`ParseExecutor` as
+``parse_executor=`` to :class:`~vrmapi_async.client.VRMAsyncAPI` to
+hand payloads above a size threshold to a worker:
+
+* ``thread``: a thread pool. Cheap to hand over, but validation holds
+  the GIL most of the time, so the loop only gets the interpreter's
+  switch interval between slices of work. Good for moderate payloads.
+* ``process``: a process pool. The loop stays fully responsive, at the
+  cost of pickling the payload there and the model back.
+* ``cooperative``: validate on the loop, but item by item for
+  list-shaped ``records`` (see :func:`cooperative_validate`), yielding
+  to other tasks whenever a time slice is used up. Bounds the loop lag
+  without any serialization cost.
+* ``inline``: validate on the loop, as without an executor.
+
+Callers get the same model types whatever the mode.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import time
+import types
+from contextvars import ContextVar
+from enum import StrEnum
+from types import TracebackType
+from typing import Any, Self, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+DEFAULT_TIME_SLICE = 0.005
+
+_payload_size: ContextVar[tuple[int, int] | None] = ContextVar(
+    "vrm_payload_size", default=None
+)
+
+
+def note_payload_size(payload: Any, size: int) -> None:
+    """Remember the encoded size of a payload decoded in this task.
+
+    :param payload: The decoded JSON payload.
+    :param size: Size in bytes of the response body it came from.
+    """
+    _payload_size.set((id(payload), size))
+
+
+def payload_size(payload: Any) -> int | None:
+    """Return the size noted for ``payload``, or None if unknown."""
+    noted = _payload_size.get()
+    if noted is None or noted[0] != id(payload):
+        return None
+    return noted[1]
+
+
+class ParseMode(StrEnum):
+    """Where response models are validated."""
+
+    INLINE = "inline"
+    COOPERATIVE = "cooperative"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+def validate(model: type[ModelT], data: dict[str, Any]) -> ModelT:
+    """Validate ``data`` into ``model``; picklable for process pools."""
+    return model(**data)
+
+
+@functools.cache
+def _item_adapter(item_type: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(item_type)
+
+
+def _list_item_type(annotation: Any) -> Any:
+    """Return ``X`` for ``list[X]``, also inside a union, else None."""
+    if get_origin(annotation) is list:
+        return get_args(annotation)[0]
+    if get_origin(annotation) in {Union, types.UnionType}:
+        for arg in get_args(annotation):
+            if get_origin(arg) is list:
+                return get_args(arg)[0]
+    return None
+
+
+class _Slicer:
+    """Yield to the event loop whenever a time slice is used up."""
+
+    __slots__ = ("deadline", "time_slice")
+
+    def __init__(self, time_slice: float) -> None:
+        self.time_slice = time_slice
+        self.deadline = time.perf_counter() + time_slice
+
+    async def tick(self) -> None:
+        if time.perf_counter() >= self.deadline:
+            await asyncio.sleep(0)
+            self.deadline = time.perf_counter() + self.time_slice
+
+
+async def _validate_items(
+    items: list[Any], adapter: TypeAdapter[Any], slicer: _Slicer
+) -> list[Any]:
+    validated = []
+    for item in items:
+        validated.append(adapter.validate_python(item))
+        await slicer.tick()
+    return validated
+
+
+async def cooperative_validate(
+    model: type[ModelT],
+    data: dict[str, Any],
+    time_slice: float = DEFAULT_TIME_SLICE,
+) -> ModelT:
+    """Validate ``data`` into ``model``, yielding to the loop between items.
+
+    Handles models whose ``records`` field is a ``list[X]`` (e.g.
+    :class:`~vrmapi_async.client.base.schema.RecordsListResponse`) or a
+    dict of ``list[X]`` (e.g. ``StatsResponse``): the items are
+    validated one at a time and the loop gets control back every
+    ``time_slice`` seconds. The rest of the model is validated with
+    empty lists, which are then replaced by the validated items. Other
+    models are validated in one go.
+
+    :param model: The response model class.
+    :param data: The decoded JSON payload.
+    :param time_slice: Longest stretch, in seconds, spent validating
+        before yielding (one item can take longer).
+    :returns: The same model instance inline validation would return.
+    :raises pydantic.ValidationError: If the payload is invalid.
+    """
+    field = model.model_fields.get("records")
+    records = data.get("records")
+    if field is None:
+        return model(**data)
+    slicer = _Slicer(time_slice)
+    annotation = field.annotation
+    if isinstance(records, list) and (item := _list_item_type(annotation)):
+        empty: Any = []
+        validated: Any = await _validate_items(records, _item_adapter(item), slicer)
+    elif (
+        isinstance(records, dict)
+        and get_origin(annotation) is dict
+        and (item := _list_item_type(get_args(annotation)[1]))
+    ):
+        adapter = _item_adapter(item)
+        empty = {
+            key: [] if isinstance(val, list) else val for key, val in records.items()
+        }
+        validated = {
+            key: await _validate_items(val, adapter, slicer)
+            if isinstance(val, list)
+            else val
+            for key, val in records.items()
+        }
+    else:
+        return model(**data)
+    # Validate the rest of the model around empty lists, then put the
+    # validated items in place without another pass over them.
+    result = model(**{**data, "records": empty})
+    result.records = validated  # type: ignore[attr-defined]
+    if "_raw" in model.__private_attributes__:
+        # Keep the raw payload as received, not the pre-validated copy.
+        result._raw = data  # type: ignore[attr-defined]  # noqa: SLF001
+    return result
+
+
+class ParseExecutor:
+    """Validate large payloads in a thread or process pool."""
+
+    def __init__(
+        self,
+        mode: ParseMode | str = ParseMode.THREAD,
+        threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+        max_workers: int | None = None,
+        executor: concurrent.futures.Executor | None = None,
+        time_slice: float = DEFAULT_TIME_SLICE,
+    ) -> None:
+        """Initialize the executor.
+
+        :param mode: ``inline``, ``cooperative``, ``thread`` or ``process``.
+        :param threshold: Response body size in bytes from which
+            payloads are offloaded; 0 offloads every payload.
+        :param max_workers: Pool size, defaults to the pool's default.
+        :param executor: Existing pool to use instead of creating one;
+            it is not shut down by :meth:`shutdown`.
+        :param time_slice: Seconds of validation between yields to the
+            event loop in ``cooperative`` mode.
+        :raises ValueError: If ``mode`` is unknown.
+        """
+        self.mode = ParseMode(mode)
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self.time_slice = time_slice
+
+    def should_offload(self, data: Any) -> bool:
+        """Return whether ``data`` is validated in the pool.
+
+        :param data: A decoded payload; its size is known if the client
+            decoded it in the current task.
+        """
+        if self.mode is ParseMode.INLINE:
+            return False
+        return (payload_size(data) or 0) >= self.threshold
+
+    def _pool(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.mode is ParseMode.PROCESS:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="vrm-parse"
+                )
+        return self._executor
+
+    async def run(self, model: type[ModelT], data: dict[str, Any]) -> ModelT:
+        """Validate ``data`` into ``model`` according to the mode.
+
+        :param model: The response model class.
+        :param data: The decoded JSON payload.
+        :returns: The validated model instance.
+        """
+        if self.mode is ParseMode.INLINE:
+            return model(**data)
+        if self.mode is ParseMode.COOPERATIVE:
+            return await cooperative_validate(model, data, self.time_slice)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), validate, model, data)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut the pool down if this executor created it.
+
+        :param wait: Wait for running validations to finish.
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def __enter__(self) -> Self:
+        """Return the executor itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Shut the pool down."""
+        self.shutdown()
@@ -0,0 +1,244 @@
+"""Parse-cost profiling of API responses.
+
+Pass a :class:`ParseProfiler` as ``profiler=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI` to record, per route and
+response model class:
+
+* payload size and JSON decode time;
+* pydantic validation time;
+* the number of objects (models, lists and dicts) in the result;
+* memory retained by the decoded payload and by the validated model,
+  and the validation peak, measured with :mod:`tracemalloc`.
+
+Memory is only measured while :mod:`tracemalloc` is tracing; use the
+profiler as a context manager (or :meth:`ParseProfiler.start`) to turn
+it on. Tracing slows every allocation down, so profile real traffic for
+a while and then stop, rather than leaving it on in production.
+"""
+
+import time
+import tracemalloc
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, NamedTuple, Self, TypeVar
+
+import httpx
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+REPORT_SORT_KEYS = (
+    "total_seconds",
+    "decode_seconds",
+    "validate_seconds",
+    "payload_bytes",
+    "retained_bytes",
+    "objects",
+    "count",
+)
+
+
+class _Decoded(NamedTuple):
+    """Decode measurements of the payload most recently decoded in a task."""
+
+    payload_id: int
+    size: int
+    seconds: float
+    retained: int
+
+
+_last_decode: ContextVar[_Decoded | None] = ContextVar("vrm_last_decode", default=None)
+
+
+class ParseKey(NamedTuple):
+    """Labels of a profiled parse."""
+
+    route: str
+    model: str
+
+
+@dataclass
+class ParseStats:
+    """Accumulated parse costs of one :class:`ParseKey`."""
+
+    count: int = 0
+    payload_bytes: int = 0
+    decode_seconds: float = 0.0
+    decode_retained_bytes: int = 0
+    validate_seconds: float = 0.0
+    objects: int = 0
+    retained_bytes: int = 0
+    peak_bytes: int = 0
+
+    @property
+    def total_seconds(self) -> float:
+        """Decode plus validation time."""
+        return self.decode_seconds + self.validate_seconds
+
+
+def count_objects(value: Any) -> int:
+    """Count the models, lists and dicts reachable from ``value``.
+
+    :param value: A validated model or any nested structure.
+    :returns: The number of container objects, ``value`` included.
+    """
+    count = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, BaseModel):
+            count += 1
+            stack.extend(item.__dict__.values())
+            if item.__pydantic_extra__:
+                stack.extend(item.__pydantic_extra__.values())
+        elif isinstance(item, dict):
+            count += 1
+            stack.extend(item.values())
+        elif isinstance(item, list | tuple):
+            count += 1
+            stack.extend(item)
+    return count
+
+
+class ParseProfiler:
+    """Record decode and validation costs per route and response model."""
+
+    def __init__(self) -> None:
+        """Initialize an empty profiler."""
+        self._stats: dict[ParseKey, ParseStats] = {}
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start :mod:`tracemalloc` if it is not tracing yet."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """Stop :mod:`tracemalloc` if :meth:`start` started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> Self:
+        """Start memory tracing and return the profiler."""
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop memory tracing."""
+        self.stop()
+
+    def decode(self, response: httpx.Response) -> Any:
+        """Decode the JSON body of ``response``, measuring its cost.
+
+        The measurements are attributed to the model that the same
+        task validates the payload into next, see :meth:`validate`.
+
+        :param response: The HTTP response.
+        :returns: The decoded JSON body.
+        """
+        size = len(response.content)
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        started = time.perf_counter()
+        payload = response.json()
+        seconds = time.perf_counter() - started
+        retained = tracemalloc.get_traced_memory()[0] - before if tracing else 0
+        _last_decode.set(_Decoded(id(payload), size, seconds, retained))
+        return payload
+
+    def validate(self, route: str, model: type[ModelT], data: dict[str, Any]) -> ModelT:
+        """Validate ``data`` into ``model``, measuring its cost.
+
+        :param route: Route name of the request, see
+            :func:`~vrmapi_async.routes.resolve_route`.
+        :param model: The response model class.
+        :param data: The decoded JSON payload.
+        :returns: The validated model instance.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = model(**data)
+        seconds = time.perf_counter() - started
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            retained, peak_extra = current - before, peak - before
+        else:
+            retained = peak_extra = 0
+
+        stats = self._stats.setdefault(ParseKey(route, model.__name__), ParseStats())
+        stats.count += 1
+        stats.validate_seconds += seconds
+        stats.objects += count_objects(result)
+        stats.retained_bytes += retained
+        stats.peak_bytes = max(stats.peak_bytes, peak_extra)
+        decoded = _last_decode.get()
+        if decoded is not None and decoded.payload_id == id(data):
+            stats.payload_bytes += decoded.size
+            stats.decode_seconds += decoded.seconds
+            stats.decode_retained_bytes += decoded.retained
+            _last_decode.set(None)
+        return result
+
+    @property
+    def stats(self) -> dict[ParseKey, ParseStats]:
+        """Accumulated stats per route and model."""
+        return self._stats
+
+    def report(
+        self, sort_by: str = "total_seconds"
+    ) -> list[tuple[ParseKey, ParseStats]]:
+        """Return the stats sorted by cost, most expensive first.
+
+        :param sort_by: One of :data:`REPORT_SORT_KEYS`.
+        :returns: ``(key, stats)`` pairs.
+        :raises ValueError: If ``sort_by`` is not a known key.
+        """
+        if sort_by not in REPORT_SORT_KEYS:
+            msg = f"Cannot sort by {sort_by!r}; use one of {REPORT_SORT_KEYS}."
+            raise ValueError(msg)
+        return sorted(
+            self._stats.items(),
+            key=lambda item: getattr(item[1], sort_by),
+            reverse=True,
+        )
+
+    def format_report(self, sort_by: str = "total_seconds") -> str:
+        """Render :meth:`report` as a text table.
+
+        Times are totals in milliseconds, sizes totals in KiB; ``objects``
+        and ``retained`` are per parse on average.
+
+        :param sort_by: One of :data:`REPORT_SORT_KEYS`.
+        :returns: The table, one line per route and model.
+        """
+        header = (
+            f"{'route':<28} {'model':<24} {'n':>6} {'KiB':>10} {'decode ms':>10}"
+            f" {'valid ms':>10} {'objects':>9} {'retained':>10} {'peak':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for key, stats in self.report(sort_by):
+            lines.append(
+                f"{key.route:<28} {key.model:<24} {stats.count:>6}"
+                f" {stats.payload_bytes / 1024:>10.1f}"
+                f" {stats.decode_seconds * 1000:>10.2f}"
+                f" {stats.validate_seconds * 1000:>10.2f}"
+                f" {stats.objects // stats.count:>9}"
+                f" {stats.retained_bytes // stats.count:>10}"
+                f" {stats.peak_bytes:>10}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Drop all recorded stats."""
+        self._stats.clear()
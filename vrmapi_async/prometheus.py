@@ -0,0 +1,263 @@
+"""Prometheus text-format exporter for client metrics.
+
+Renders a :class:`~vrmapi_async.metrics.MetricsRegistry` in the
+Prometheus exposition format (version 0.0.4). Serve it either from an
+existing ASGI application::
+
+    app.mount("/metrics", PrometheusASGIApp(metrics))
+
+or from a tiny standalone endpoint::
+
+    server = await start_http_server(metrics, port=9464)
+
+Neither needs the ``prometheus_client`` package.
+"""
+
+import asyncio
+import logging
+import math
+from collections.abc import Awaitable, Callable, Iterable, MutableMapping
+from typing import Any
+
+from vrmapi_async.metrics import MetricsRegistry, MetricsSnapshot
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Iterable[tuple[str, str]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    body = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+    if not body:
+        return f"{name} {_format_value(value)}"
+    return f"{name}{{{body}}} {_format_value(value)}"
+
+
+class _Family:
+    """Collects the samples of one metric family."""
+
+    def __init__(self, name: str, kind: str, help_text: str) -> None:
+        self.name = name
+        self.lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+    def add(self, labels: Labels, value: float, suffix: str = "") -> None:
+        self.lines.append(_sample(self.name + suffix, labels, value))
+
+
+def render(
+    metrics: MetricsRegistry | MetricsSnapshot, prefix: str = "vrm_client"
+) -> str:
+    """Render client metrics in the Prometheus text format.
+
+    :param metrics: A registry, or a snapshot taken from one.
+    :param prefix: Prefix of all metric names.
+    :returns: The exposition text, ending with a newline.
+    """
+    snap = metrics.snapshot() if isinstance(metrics, MetricsRegistry) else metrics
+
+    requests = _Family(
+        f"{prefix}_requests_total", "counter", "HTTP attempts made by the client."
+    )
+    latency = _Family(
+        f"{prefix}_request_duration_seconds",
+        "histogram",
+        "Duration of HTTP attempts, excluding JSON decoding.",
+    )
+    size = _Family(
+        f"{prefix}_response_bytes_total", "counter", "Bytes of response bodies."
+    )
+    decode = _Family(
+        f"{prefix}_json_decode_seconds_total",
+        "counter",
+        "Time spent decoding JSON response bodies.",
+    )
+    for key, stats in sorted(snap.requests.items()):
+        labels = list(key._asdict().items())
+        requests.add(labels, stats.count)
+        for bound, count in stats.latency.cumulative():
+            latency.add([*labels, ("le", _format_value(bound))], count, "_bucket")
+        latency.add(labels, stats.latency.sum, "_sum")
+        latency.add(labels, stats.latency.count, "_count")
+        size.add(labels, stats.response_bytes)
+        decode.add(labels, stats.decode_seconds)
+
+    retries = _Family(
+        f"{prefix}_retries_total", "counter", "Retries scheduled, by status code."
+    )
+    for retry_key, count in sorted(snap.retries.items()):
+        retries.add([(k, str(v)) for k, v in retry_key._asdict().items()], count)
+
+    wait = _Family(
+        f"{prefix}_rate_limit_wait_seconds_total",
+        "counter",
+        "Time spent waiting before retrying 429 responses.",
+    )
+    for route, seconds in sorted(snap.rate_limit_wait.items()):
+        wait.add([("route", route)], seconds)
+
+    validations = _Family(
+        f"{prefix}_validations_total", "counter", "Response models validated."
+    )
+    validation_time = _Family(
+        f"{prefix}_validation_seconds_total",
+        "counter",
+        "Time spent validating response models.",
+    )
+    for route, timing in sorted(snap.validation.items()):
+        validations.add([("route", route)], timing.count)
+        validation_time.add([("route", route)], timing.seconds)
+
+    stalls = _Family(
+        f"{prefix}_event_loop_stalls_total",
+        "counter",
+        "Event-loop stalls longer than the monitor threshold.",
+    )
+    stall_time = _Family(
+        f"{prefix}_event_loop_stall_seconds_total",
+        "counter",
+        "Time the event loop was blocked by stalls.",
+    )
+    for stall_key, timing in sorted(snap.stalls.items()):
+        labels = list(stall_key._asdict().items())
+        stalls.add(labels, timing.count)
+        stall_time.add(labels, timing.seconds)
+
+    warmups = _Family(
+        f"{prefix}_connection_warmups_total", "counter", "Connection pool warm-ups."
+    )
+    warmup_time = _Family(
+        f"{prefix}_connection_warmup_seconds_total",
+        "counter",
+        "Time spent warming up the connection pool.",
+    )
+    warmup_connections = _Family(
+        f"{prefix}_connection_warmup_connections_total",
+        "counter",
+        "Connections opened by warm-ups.",
+    )
+    if snap.warmup.count:
+        warmups.add([], snap.warmup.count)
+        warmup_time.add([], snap.warmup.seconds)
+        warmup_connections.add([], snap.warmup_connections)
+
+    families = (
+        requests,
+        latency,
+        size,
+        decode,
+        retries,
+        wait,
+        validations,
+        validation_time,
+        stalls,
+        stall_time,
+        warmups,
+        warmup_time,
+        warmup_connections,
+    )
+    return "\n".join(line for family in families for line in family.lines) + "\n"
+
+
+Scope = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+Send = Callable[[MutableMapping[str, Any]], Awaitable[None]]
+
+
+class PrometheusASGIApp:
+    """Minimal ASGI application serving the metrics of a registry."""
+
+    def __init__(self, metrics: MetricsRegistry, prefix: str = "vrm_client") -> None:
+        """Initialize the app.
+
+        :param metrics: The registry to expose.
+        :param prefix: Prefix of all metric names.
+        """
+        self.metrics = metrics
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: ARG002
+        """Answer GET/HEAD requests with the rendered metrics."""
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in {"GET", "HEAD"}:
+            status, body, content_type = 405, b"Method Not Allowed\n", "text/plain"
+        else:
+            status = 200
+            body = render(self.metrics, self.prefix).encode()
+            content_type = CONTENT_TYPE
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        payload = b"" if scope["method"] == "HEAD" else body
+        await send({"type": "http.response.body", "body": payload})
+
+
+async def start_http_server(
+    metrics: MetricsRegistry,
+    host: str = "127.0.0.1",
+    port: int = 9464,
+    path: str = "/metrics",
+    prefix: str = "vrm_client",
+) -> asyncio.Server:
+    """Serve the metrics of a registry over plain HTTP/1.0.
+
+    Intended for scraping from a local Prometheus agent; it answers
+    ``GET path`` and closes every connection after one response.
+
+    :param metrics: The registry to expose.
+    :param host: Interface to listen on.
+    :param port: Port to listen on, 0 for an ephemeral port.
+    :param path: Path that serves the metrics; others answer 404.
+    :param prefix: Prefix of all metric names.
+    :returns: The started server; close it with ``server.close()``.
+    """
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass  # Skip headers.
+            if len(request_line) < 2 or request_line[0] != "GET":
+                status, body, content_type = "405 Method Not Allowed", b"", "text/plain"
+            elif request_line[1].split("?")[0] != path:
+                status, body, content_type = "404 Not Found", b"", "text/plain"
+            else:
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = render(metrics, prefix).encode()
+            head = (
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            )
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.debug("Metrics connection failed: %s", e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Serving client metrics on http://%s:%d%s", host, port, path)
+    return server
@@ -1,6 +1,9 @@
 """VRM API endpoint route definitions."""
 
-from dataclasses import dataclass
+import functools
+import re
+from dataclasses import dataclass, fields
+from typing import NamedTuple
 
 
 @dataclass(frozen=True)
@@ -26,3 +29,40 @@ class VRMRoutes:
     INSTALLATIONS_USERS_LIST: str = "/installations/{site_id}/users"
 
     INSTALLATIONS_WIDGETS: str = "/installations/{site_id}/widgets/{widget_type}"
+
+
+class RouteMatch(NamedTuple):
+    """A route field name together with its path template."""
+
+    name: str
+    template: str
+
+
+# Returned for paths that do not match any known template, so that
+# metrics never get one label value per concrete URL.
+UNMATCHED_ROUTE = RouteMatch("OTHER", "*")
+
+
+@functools.cache
+def _route_patterns(
+    routes: VRMRoutes,
+) -> tuple[tuple[re.Pattern[str], RouteMatch], ...]:
+    patterns = []
+    for item in fields(routes):
+        template = getattr(routes, item.name)
+        regex = re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(template))
+        patterns.append((re.compile(regex), RouteMatch(item.name, template)))
+    return tuple(patterns)
+
+
+def resolve_route(routes: VRMRoutes, url: str) -> RouteMatch:
+    """Map a concrete request path back to its route template.
+
+    :param routes: The routes instance the path was built from.
+    :param url: A concrete path, e.g. ``"/installations/123/stats"``.
+    :returns: The matching route, or :data:`UNMATCHED_ROUTE`.
+    """
+    for pattern, match in _route_patterns(routes):
+        if pattern.fullmatch(url):
+            return match
+    return UNMATCHED_ROUTE
@@ -0,0 +1 @@
+"""Local processing utilities for fetched VRM stats series."""
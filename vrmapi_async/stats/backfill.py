@@ -0,0 +1,341 @@
+"""Checkpointed, resumable bulk backfill of stats for many sites.
+
+A backfill is split into *units*: one valid request chunk (see
+:func:`~vrmapi_async.client.installations.planner.split_range`) for one
+site. Units run under a bounded concurrency budget and every completed
+unit is recorded in a checkpoint, so a restarted backfill skips the
+work that already finished and resumes exactly where it stopped.
+"""
+
+import asyncio
+import inspect
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from vrmapi_async.client.installations.api import InstallationsNamespace
+from vrmapi_async.client.installations.planner import split_range
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsResponse,
+    StatsType,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillUnit(NamedTuple):
+    """A single request chunk of a backfill."""
+
+    site_id: int
+    start: datetime
+    end: datetime
+    stats_type: str
+    interval: str
+    attribute_codes: tuple[str, ...] = ()
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used in checkpoints.
+
+        Includes the request parameters, so a checkpoint shared by
+        backfills of different stats types, intervals or attributes
+        does not skip units of one because the other completed them.
+        """
+        codes = ",".join(sorted(self.attribute_codes))
+        return (
+            f"{self.site_id}:{int(self.start.timestamp())}:{int(self.end.timestamp())}"
+            f":{self.stats_type}:{self.interval}:{codes}"
+        )
+
+
+class BackfillCheckpoint(ABC):
+    """Base class for backfill checkpoint backends."""
+
+    @abstractmethod
+    def completed(self) -> set[str]:
+        """Return the keys of all completed units."""
+
+    @abstractmethod
+    def mark_done(self, key: str) -> None:
+        """Durably record a unit as completed."""
+
+    def close(self) -> None:  # noqa: B027
+        """Release any resources held by the checkpoint."""
+
+
+class MemoryBackfillCheckpoint(BackfillCheckpoint):
+    """Non-persistent checkpoint, mainly useful for testing."""
+
+    def __init__(self) -> None:
+        """Initialize an empty checkpoint."""
+        self.done: set[str] = set()
+
+    def completed(self) -> set[str]:
+        """Return the keys of all completed units."""
+        return set(self.done)
+
+    def mark_done(self, key: str) -> None:
+        """Durably record a unit as completed."""
+        self.done.add(key)
+
+
+class FileBackfillCheckpoint(BackfillCheckpoint):
+    """Checkpoint backed by an append-only text file, one key per line.
+
+    Appending a line is cheap and a crash can at worst leave a partial
+    last line, which is ignored when the file is read back.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (and create if needed) the checkpoint file.
+
+        :param path: Location of the checkpoint file.
+        """
+        self.path = Path(path)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def completed(self) -> set[str]:
+        """Return the keys of all completed units."""
+        lines = self.path.read_text(encoding="utf-8").split("\n")
+        # The last element is either empty or a partially written line.
+        return {line for line in lines[:-1] if line}
+
+    def mark_done(self, key: str) -> None:
+        """Durably record a unit as completed."""
+        self._file.write(key + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        self._file.close()
+
+
+class SQLiteBackfillCheckpoint(BackfillCheckpoint):
+    """Checkpoint backed by an SQLite database."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (and create if needed) the database at ``path``.
+
+        :param path: Database file, or ``":memory:"``.
+        """
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS backfill_done (key TEXT PRIMARY KEY)"
+        )
+        self._conn.commit()
+
+    def completed(self) -> set[str]:
+        """Return the keys of all completed units."""
+        return {row[0] for row in self._conn.execute("SELECT key FROM backfill_done")}
+
+    def mark_done(self, key: str) -> None:
+        """Durably record a unit as completed."""
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO backfill_done VALUES (?)", (key,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+@dataclass
+class BackfillProgress:
+    """Progress of a running backfill."""
+
+    total_units: int
+    done_units: int = 0
+    skipped_units: int = 0
+    points: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    failed: list[tuple[BackfillUnit, BaseException]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the backfill started."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def points_per_second(self) -> float:
+        """Fetched data points per second."""
+        elapsed = self.elapsed
+        return self.points / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def remaining_units(self) -> int:
+        """Units neither completed, skipped nor failed."""
+        return (
+            self.total_units - self.done_units - self.skipped_units - len(self.failed)
+        )
+
+    @property
+    def eta(self) -> timedelta | None:
+        """Estimated time to completion, or None before the first unit."""
+        if not self.done_units:
+            return None
+        per_unit = self.elapsed / self.done_units
+        return timedelta(seconds=per_unit * self.remaining_units)
+
+
+ResultCallback = Callable[[BackfillUnit, StatsResponse], Awaitable[None] | None]
+ProgressCallback = Callable[[BackfillProgress], None]
+
+
+def _count_points(response: StatsResponse) -> int:
+    return sum(len(val) for val in response.records.values() if isinstance(val, list))
+
+
+class BackfillRunner:
+    """Run a checkpointed backfill over many sites."""
+
+    def __init__(
+        self,
+        installations: InstallationsNamespace,
+        checkpoint: BackfillCheckpoint,
+        on_result: ResultCallback | None = None,
+        on_progress: ProgressCallback | None = None,
+        max_concurrency: int = 8,
+    ) -> None:
+        """Initialize the runner.
+
+        :param installations: The client's installations namespace.
+        :param checkpoint: Where completed units are recorded.
+        :param on_result: Called (and awaited, if async) with every
+            fetched unit before it is checkpointed.
+        :param on_progress: Called after every finished unit.
+        :param max_concurrency: Maximum number of units in flight.
+        """
+        self.installations = installations
+        self.checkpoint = checkpoint
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.max_concurrency = max_concurrency
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop picking up new units; in-flight units are finished first."""
+        self._stopping.set()
+
+    @staticmethod
+    def plan_units(
+        site_ids: Iterable[int],
+        start: datetime,
+        end: datetime,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        *,
+        attribute_codes: list[str] | None = None,
+    ) -> list[BackfillUnit]:
+        """Split the backfill into per-site request chunks.
+
+        :param site_ids: The installation IDs to backfill.
+        :param start: Start of the range (UTC if naive).
+        :param end: End of the range (UTC if naive).
+        :param stats_type: Type of stats to fetch.
+        :param interval: Interval to fetch at.
+        :param attribute_codes: Attribute codes for custom type.
+        :returns: All units of the backfill.
+        """
+        chunks = split_range(start, end, interval)
+        codes = tuple(attribute_codes or ())
+        return [
+            BackfillUnit(
+                site_id, chunk_start, chunk_end, str(stats_type), str(interval), codes
+            )
+            for site_id in site_ids
+            for chunk_start, chunk_end in chunks
+        ]
+
+    async def run(
+        self,
+        site_ids: Iterable[int],
+        start: datetime,
+        end: datetime,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        *,
+        attribute_codes: list[str] | None = None,
+    ) -> BackfillProgress:
+        """Run (or resume) a backfill.
+
+        Units already present in the checkpoint are skipped. A failing
+        unit is logged and recorded in :attr:`BackfillProgress.failed`
+        without stopping the others; it is retried on the next run.
+        Cancelling the task running this coroutine cancels in-flight
+        units, which are then simply redone on the next run.
+
+        :param site_ids: The installation IDs to backfill.
+        :param start: Start of the range (UTC if naive).
+        :param end: End of the range (UTC if naive).
+        :param stats_type: Type of stats to fetch.
+        :param interval: Interval to fetch at.
+        :param attribute_codes: Attribute codes for custom type.
+        :returns: The final progress.
+        """
+        self._stopping.clear()
+        units = self.plan_units(
+            site_ids, start, end, stats_type, interval, attribute_codes=attribute_codes
+        )
+        done = self.checkpoint.completed()
+        progress = BackfillProgress(total_units=len(units))
+
+        queue: asyncio.Queue[BackfillUnit] = asyncio.Queue()
+        for unit in units:
+            if unit.key in done:
+                progress.skipped_units += 1
+            else:
+                queue.put_nowait(unit)
+        logger.info(
+            "Backfill of %d unit(s), %d already done",
+            progress.total_units,
+            progress.skipped_units,
+        )
+
+        async def fetch(unit: BackfillUnit) -> StatsResponse:
+            return await self.installations.get_stats(
+                unit.site_id,
+                stats_type=stats_type,
+                interval=interval,
+                start=unit.start,
+                end=unit.end,
+                attribute_codes=attribute_codes,
+            )
+
+        async with asyncio.TaskGroup() as group:
+            for _ in range(min(self.max_concurrency, queue.qsize())):
+                group.create_task(self._worker(queue, fetch, progress))
+        return progress
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue[BackfillUnit],
+        fetch: Callable[[BackfillUnit], Awaitable[StatsResponse]],
+        progress: BackfillProgress,
+    ) -> None:
+        """Process units from ``queue`` until it is empty or stopped."""
+        while not self._stopping.is_set():
+            try:
+                unit = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                response = await fetch(unit)
+                if self.on_result is not None:
+                    result = self.on_result(unit, response)
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Backfill unit %s failed: %s", unit.key, e)
+                progress.failed.append((unit, e))
+            else:
+                self.checkpoint.mark_done(unit.key)
+                progress.done_units += 1
+                progress.points += _count_points(response)
+            if self.on_progress is not None:
+                self.on_progress(progress)
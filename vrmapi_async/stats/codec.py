@@ -0,0 +1,336 @@
+"""Compact encoding of stats series (Gorilla-style).
+
+Holding long series as lists of :class:`StatsRecord` objects costs
+hundreds of bytes per point. :class:`EncodedSeries` packs a series into
+a single bit stream instead:
+
+* timestamps are stored as delta-of-deltas, so a regular cadence costs
+  a single bit per point;
+* ``mean``, ``min`` and ``max`` are each XOR-ed with their previous
+  value and only the meaningful bits are stored, so repeated or slowly
+  changing values cost one or a few bits.
+
+Points are stored record by record, so the series can be iterated
+without decompressing it as a whole. Missing values (``None``) are
+encoded as a reserved NaN bit pattern.
+"""
+
+import struct
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Self
+
+from vrmapi_async.client.installations.schema import StatsRecord
+
+_MAGIC = b"VRMG"
+_VERSION = 1
+_HEADER = struct.Struct(">4sBI")
+_FLOAT = struct.Struct(">d")
+_UINT = struct.Struct(">Q")
+
+# NaN payload reserved for ``None``; the API never sends NaN itself.
+_NONE_BITS = 0x7FF8_0000_0000_0BAD
+_MASK64 = (1 << 64) - 1
+
+# (prefix, prefix length, payload bits) for delta-of-delta buckets.
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b11110, 5, 32))
+_DOD_FALLBACK = (0b11111, 5, 64)
+
+Point = tuple[int, float | None, float | None, float | None]
+
+
+def _float_bits(value: float | None) -> int:
+    if value is None:
+        return _NONE_BITS
+    return _UINT.unpack(_FLOAT.pack(value))[0]
+
+
+def _bits_float(bits: int) -> float | None:
+    if bits == _NONE_BITS:
+        return None
+    return _FLOAT.unpack(_UINT.pack(bits))[0]
+
+
+def _zigzag(value: int) -> int:
+    return -2 * value - 1 if value < 0 else 2 * value
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+class _BitWriter:
+    """Append-only big-endian bit buffer."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, nbits: int) -> None:
+        self._acc = (self._acc << nbits) | value
+        self._bits += nbits
+        if self._bits >= 64:
+            keep = self._bits % 8
+            self.buffer += (self._acc >> keep).to_bytes(self._bits // 8, "big")
+            self._acc &= (1 << keep) - 1
+            self._bits = keep
+
+    def getvalue(self) -> bytes:
+        pad = -self._bits % 8
+        tail = (self._acc << pad).to_bytes((self._bits + pad) // 8, "big")
+        return bytes(self.buffer + tail)
+
+
+class _BitReader:
+    """Sequential reader for buffers produced by :class:`_BitWriter`."""
+
+    def __init__(self, data: bytes, offset: int = 0) -> None:
+        self._data = data
+        self._pos = offset
+        self._acc = 0
+        self._bits = 0
+
+    def read(self, nbits: int) -> int:
+        while self._bits < nbits:
+            chunk = self._data[self._pos : self._pos + 8]
+            if not chunk:
+                msg = "Unexpected end of encoded series."
+                raise ValueError(msg)
+            self._pos += len(chunk)
+            self._acc = (self._acc << (8 * len(chunk))) | int.from_bytes(chunk, "big")
+            self._bits += 8 * len(chunk)
+        self._bits -= nbits
+        value = self._acc >> self._bits
+        self._acc &= (1 << self._bits) - 1
+        return value
+
+
+class _XorEncoder:
+    """Encodes one float column as XOR-ed differences."""
+
+    __slots__ = ("leading", "prev", "trailing")
+
+    def __init__(self) -> None:
+        self.prev: int | None = None
+        self.leading = 65
+        self.trailing = 0
+
+    def write(self, out: _BitWriter, bits: int) -> None:
+        if self.prev is None:
+            out.write(bits, 64)
+            self.prev = bits
+            return
+        xor = bits ^ self.prev
+        self.prev = bits
+        if xor == 0:
+            out.write(0, 1)
+            return
+        leading = min(64 - xor.bit_length(), 31)
+        trailing = (xor & -xor).bit_length() - 1
+        if leading >= self.leading and trailing >= self.trailing:
+            width = 64 - self.leading - self.trailing
+            out.write(0b10, 2)
+            out.write(xor >> self.trailing, width)
+            return
+        width = 64 - leading - trailing
+        out.write(0b11, 2)
+        out.write(leading, 5)
+        out.write(width - 1, 6)
+        out.write(xor >> trailing, width)
+        self.leading, self.trailing = leading, trailing
+
+
+class _XorDecoder:
+    """Decodes a float column written by :class:`_XorEncoder`."""
+
+    __slots__ = ("leading", "prev", "trailing")
+
+    def __init__(self) -> None:
+        self.prev: int | None = None
+        self.leading = 0
+        self.trailing = 0
+
+    def read(self, src: _BitReader) -> int:
+        if self.prev is None:
+            self.prev = src.read(64)
+            return self.prev
+        if not src.read(1):
+            return self.prev
+        if src.read(1):
+            self.leading = src.read(5)
+            width = src.read(6) + 1
+            self.trailing = 64 - self.leading - width
+        width = 64 - self.leading - self.trailing
+        self.prev ^= src.read(width) << self.trailing
+        return self.prev
+
+
+def _write_dod(out: _BitWriter, dod: int) -> None:
+    if dod == 0:
+        out.write(0, 1)
+        return
+    value = _zigzag(dod)
+    for prefix, prefix_len, width in _DOD_BUCKETS:
+        if value < (1 << width):
+            out.write(prefix, prefix_len)
+            out.write(value, width)
+            return
+    prefix, prefix_len, width = _DOD_FALLBACK
+    out.write(prefix, prefix_len)
+    out.write(value & _MASK64, width)
+
+
+def _read_dod(src: _BitReader) -> int:
+    if not src.read(1):
+        return 0
+    for _, _, width in _DOD_BUCKETS:
+        if not src.read(1):
+            return _unzigzag(src.read(width))
+    return _unzigzag(src.read(_DOD_FALLBACK[2]))
+
+
+class EncodedSeries:
+    """An immutable, compressed stats series.
+
+    Build one with :meth:`from_records` or :meth:`from_columns`, iterate
+    it to lazily decode ``(timestamp, mean, min, max)`` tuples, and use
+    :meth:`to_bytes`/:meth:`from_bytes` to persist it.
+    """
+
+    __slots__ = ("_count", "_data")
+
+    def __init__(self, data: bytes, count: int) -> None:
+        """Wrap an already encoded bit stream.
+
+        :param data: The encoded bit stream.
+        :param count: Number of points in the stream.
+        """
+        self._data = data
+        self._count = count
+
+    @classmethod
+    def from_points(cls, points: Iterable[Point]) -> Self:
+        """Encode ``(timestamp, mean, min, max)`` tuples ordered by time.
+
+        :param points: Points with millisecond timestamps.
+        :returns: The encoded series.
+        """
+        out = _BitWriter()
+        columns = (_XorEncoder(), _XorEncoder(), _XorEncoder())
+        count = 0
+        prev_ts = prev_delta = 0
+        for ts, *values in points:
+            if count == 0:
+                out.write(_zigzag(ts) & _MASK64, 64)
+            else:
+                delta = ts - prev_ts
+                _write_dod(out, delta - prev_delta)
+                prev_delta = delta
+            prev_ts = ts
+            for column, value in zip(columns, values, strict=True):
+                column.write(out, _float_bits(value))
+            count += 1
+        return cls(out.getvalue(), count)
+
+    @classmethod
+    def from_records(cls, records: Iterable[StatsRecord]) -> Self:
+        """Encode a list of :class:`StatsRecord`, ordered by timestamp.
+
+        :param records: The records to encode.
+        :returns: The encoded series.
+        """
+        return cls.from_points((r.timestamp, r.mean, r.min, r.max) for r in records)
+
+    @classmethod
+    def from_columns(
+        cls,
+        timestamps: Sequence[int],
+        mean: Sequence[float | None],
+        min_: Sequence[float | None] | None = None,
+        max_: Sequence[float | None] | None = None,
+    ) -> Self:
+        """Encode columnar data, e.g. a :class:`ColumnarSeries` or arrays.
+
+        :param timestamps: Millisecond timestamps, ordered.
+        :param mean: Mean values.
+        :param min_: Minimum values, or None if the series has none.
+        :param max_: Maximum values, or None if the series has none.
+        :returns: The encoded series.
+        """
+        none = [None] * len(timestamps)
+        return cls.from_points(
+            zip(
+                (int(ts) for ts in timestamps),
+                mean,
+                none if min_ is None else min_,
+                none if max_ is None else max_,
+                strict=True,
+            )
+        )
+
+    def __len__(self) -> int:
+        """Return the number of points."""
+        return self._count
+
+    def __iter__(self) -> Iterator[Point]:
+        """Lazily decode ``(timestamp, mean, min, max)`` tuples."""
+        src = _BitReader(self._data)
+        columns = (_XorDecoder(), _XorDecoder(), _XorDecoder())
+        ts = delta = 0
+        for i in range(self._count):
+            if i == 0:
+                ts = _unzigzag(src.read(64))
+            else:
+                delta += _read_dod(src)
+                ts += delta
+            mean, low, high = (_bits_float(column.read(src)) for column in columns)
+            yield ts, mean, low, high
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded bit stream in bytes."""
+        return len(self._data)
+
+    def to_records(self) -> list[StatsRecord]:
+        """Decode the series into a list of :class:`StatsRecord`."""
+        return [
+            StatsRecord(timestamp=ts, mean=mean, min=low, max=high)
+            for ts, mean, low, high in self
+        ]
+
+    def to_columns(
+        self,
+    ) -> tuple[list[int], list[float | None], list[float | None], list[float | None]]:
+        """Decode the series into ``(timestamps, mean, min, max)`` lists."""
+        if not self._count:
+            return [], [], [], []
+        ts, mean, low, high = zip(*self, strict=True)
+        return list(ts), list(mean), list(low), list(high)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the series, including a small header, for storage."""
+        return _HEADER.pack(_MAGIC, _VERSION, self._count) + self._data
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Load a series serialized with :meth:`to_bytes`.
+
+        :param data: The serialized series.
+        :returns: The encoded series.
+        :raises ValueError: If ``data`` is not a serialized series.
+        """
+        magic, version, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            msg = "Not an encoded stats series (bad header)."
+            raise ValueError(msg)
+        return cls(data[_HEADER.size :], count)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two encoded series by content."""
+        if not isinstance(other, EncodedSeries):
+            return NotImplemented
+        return self._count == other._count and self._data == other._data
+
+    def __hash__(self) -> int:
+        """Hash the encoded content."""
+        return hash((self._count, self._data))
@@ -0,0 +1,300 @@
+"""Fleet-wide aggregation of stats over many installations.
+
+:func:`aggregate_fleet` fetches the same window for many sites with a
+bounded number of workers and folds every response into running sums
+as soon as it arrives, so at most ``max_concurrency`` responses are in
+memory at any time. The result is one summed series per attribute plus
+summed ``totals``.
+
+Series are aligned on a common bucket grid. Sub-daily points are
+snapped to the nearest grid bucket start. Daily and coarser points are
+put in the bucket of their calendar date: in the site's timezone when
+it is given, otherwise assuming the point is stamped at a local
+midnight between UTC-10 and UTC+13:45. Daily series of sites in different
+timezones therefore land on the same calendar day. When NumPy is
+installed, folding is vectorized.
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+from typing import Any
+
+from vrmapi_async.client.installations.api import InstallationsNamespace
+from vrmapi_async.client.installations.planner import split_range
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+    StatsType,
+)
+from vrmapi_async.stats.resample import (
+    FIXED_INTERVALS,
+    HAS_NUMPY,
+    bucket_edges,
+    next_bucket_edge,
+    np,
+    resolve_timezone,
+)
+from vrmapi_async.utils import datetime_to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+# Shifted by 13:45 hours, a local midnight anywhere from UTC-10 to
+# UTC+13:45 falls on its own date in UTC. Midnights at UTC-10 and UTC+14
+# of adjacent dates coincide, so one of the two needs the site timezone.
+_EAST_LEAD_MS = (13 * 3600 + 45 * 60) * 1000
+
+
+@dataclass(frozen=True)
+class FleetSeries:
+    """Summed series of one attribute over the fleet, ordered by time."""
+
+    timestamps: list[int]
+    values: list[float]
+    sites: list[int]
+
+    def __len__(self) -> int:
+        """Return the number of buckets."""
+        return len(self.timestamps)
+
+    def to_records(self) -> list[StatsRecord]:
+        """Convert to records whose ``mean`` holds the fleet sum."""
+        return [
+            StatsRecord(timestamp=ts, mean=value)
+            for ts, value in zip(self.timestamps, self.values, strict=True)
+        ]
+
+
+@dataclass
+class FleetAggregate:
+    """Result of :func:`aggregate_fleet`."""
+
+    series: dict[str, FleetSeries]
+    totals: dict[str, float]
+    sites: int
+    failed: dict[int, BaseException] = field(default_factory=dict)
+
+
+class _GridAccumulator:
+    """Running per-bucket sums and contributor counts on a fixed grid."""
+
+    def __init__(
+        self,
+        edges: list[int],
+        stop: int,
+        zone: tzinfo,
+        calendar: bool,
+        vectorized: bool,
+    ) -> None:
+        self.edges = edges
+        self.vectorized = vectorized
+        self.calendar = calendar
+        bounds = [*edges, stop]
+        if calendar:
+            # Bucket bounds as UTC midnights of their local calendar dates,
+            # compared against each point's date shifted to UTC midnight.
+            self.splits = [ts + _offset_ms(ts, zone) for ts in bounds[1:]]
+            self.low = edges[0] + _offset_ms(edges[0], zone)
+        else:
+            # Points are snapped to the nearest edge: split at the midpoints.
+            self.splits = [(a + b) // 2 for a, b in itertools.pairwise(bounds)]
+            self.low = edges[0] - (self.splits[0] - edges[0])
+        self.sums: dict[str, Any] = {}
+        self.counts: dict[str, Any] = {}
+        self.totals: dict[str, float] = {}
+        self.sites = 0
+
+    def _arrays(self, attribute: str) -> tuple[Any, Any]:
+        if attribute not in self.sums:
+            size = len(self.edges)
+            if self.vectorized:
+                assert np is not None  # noqa: S101
+                self.sums[attribute] = np.zeros(size, dtype=np.float64)
+                self.counts[attribute] = np.zeros(size, dtype=np.int64)
+            else:
+                self.sums[attribute] = [0.0] * size
+                self.counts[attribute] = [0] * size
+        return self.sums[attribute], self.counts[attribute]
+
+    def _key(self, ts: int, site_zone: tzinfo | None) -> int:
+        """Return the position of a point on the axis of the splits."""
+        if not self.calendar:
+            return ts
+        if site_zone is None:
+            return _day_ms(ts + _EAST_LEAD_MS)
+        return _day_ms(ts + _offset_ms(ts, site_zone))
+
+    def add_series(
+        self,
+        attribute: str,
+        records: list[StatsRecord],
+        site_zone: tzinfo | None = None,
+    ) -> None:
+        sums, counts = self._arrays(attribute)
+        if self.vectorized:
+            assert np is not None  # noqa: S101
+            keys = np.fromiter(
+                (self._key(r.timestamp, site_zone) for r in records),
+                np.int64,
+                len(records),
+            )
+            values = np.fromiter(
+                (math.nan if r.mean is None else r.mean for r in records),
+                np.float64,
+                len(records),
+            )
+            idx = np.searchsorted(np.asarray(self.splits), keys, "right")
+            keep = (keys >= self.low) & (idx < len(self.edges)) & ~np.isnan(values)
+            np.add.at(sums, idx[keep], values[keep])
+            np.add.at(counts, idx[keep], 1)
+            return
+        for record in records:
+            key = self._key(record.timestamp, site_zone)
+            if record.mean is None or key < self.low:
+                continue
+            i = bisect.bisect_right(self.splits, key)
+            if i < len(self.edges):
+                sums[i] += record.mean
+                counts[i] += 1
+
+    def add_response(
+        self, response: StatsResponse, site_zone: tzinfo | None = None
+    ) -> None:
+        for attribute, val in response.records.items():
+            if isinstance(val, list):
+                self.add_series(attribute, val, site_zone)
+            else:
+                self._arrays(attribute)
+        for key, total in response.totals.items():
+            if not isinstance(total, bool):
+                self.totals[key] = self.totals.get(key, 0.0) + total
+
+    def series(self) -> dict[str, FleetSeries]:
+        result: dict[str, FleetSeries] = {}
+        for attribute in self.sums:
+            sums, counts = self.sums[attribute], self.counts[attribute]
+            if self.vectorized:
+                sums, counts = sums.tolist(), counts.tolist()
+            used = [i for i, count in enumerate(counts) if count]
+            result[attribute] = FleetSeries(
+                timestamps=[self.edges[i] for i in used],
+                values=[sums[i] for i in used],
+                sites=[counts[i] for i in used],
+            )
+        return result
+
+
+def _offset_ms(ts: int, zone: tzinfo) -> int:
+    """Return the UTC offset of ``zone`` at ``ts`` in milliseconds."""
+    offset = datetime.fromtimestamp(ts / 1000, tz=zone).utcoffset()
+    return 0 if offset is None else int(offset.total_seconds() * 1000)
+
+
+def _day_ms(ts: int) -> int:
+    """Return the UTC midnight at or before ``ts``."""
+    return ts // 86_400_000 * 86_400_000
+
+
+async def aggregate_fleet(
+    installations: InstallationsNamespace,
+    site_ids: Iterable[int],
+    start: datetime,
+    end: datetime,
+    *,
+    stats_type: StatsType = StatsType.KWH,
+    interval: StatsInterval = StatsInterval.DAYS,
+    attribute_codes: list[str] | None = None,
+    tz: str | tzinfo | None = None,
+    site_timezones: Mapping[int, str | tzinfo] | None = None,
+    max_concurrency: int = 16,
+    vectorized: bool | None = None,
+) -> FleetAggregate:
+    """Sum a stats window over many sites into one series per attribute.
+
+    The default ``kwh`` type covers consumption, solar yield and grid
+    import/export in one request per site. A site whose request fails
+    is logged, recorded in :attr:`FleetAggregate.failed` and left out
+    of the sums.
+
+    :param installations: The client's installations namespace.
+    :param site_ids: The installation IDs to aggregate.
+    :param start: Start of the window (UTC if naive).
+    :param end: End of the window, exclusive (UTC if naive).
+    :param stats_type: Type of stats to aggregate.
+    :param interval: Interval to fetch and align at.
+    :param attribute_codes: Attribute codes for custom type.
+    :param tz: Timezone of the bucket grid for calendar intervals.
+        Defaults to UTC.
+    :param site_timezones: Timezones of the sites (e.g.
+        :attr:`Site.timezone`), used to put daily and coarser points on
+        their local calendar date. Points of other sites are assumed to
+        be stamped at a local midnight between UTC-10 and UTC+13:45.
+    :param max_concurrency: Maximum number of sites fetched at once.
+    :param vectorized: Force (True) or disable (False) the NumPy code
+        path. Defaults to using NumPy when it is installed.
+    :returns: The fleet aggregate.
+    :raises ImportError: If ``vectorized=True`` but NumPy is missing.
+    :raises ValueError: If the window is empty.
+    """
+    if vectorized and not HAS_NUMPY:
+        msg = "Vectorized aggregation requires numpy to be installed."
+        raise ImportError(msg)
+    start_ms, end_ms = datetime_to_epoch_ms(start), datetime_to_epoch_ms(end)
+    if end_ms <= start_ms:
+        msg = "The aggregation window is empty."
+        raise ValueError(msg)
+
+    zone = resolve_timezone(tz)
+    edges = bucket_edges(start_ms, end_ms - 1, interval, zone)
+    stop = next_bucket_edge(edges[-1], interval, zone)
+    use_numpy = HAS_NUMPY if vectorized is None else vectorized
+    calendar = interval not in FIXED_INTERVALS
+    acc = _GridAccumulator(edges, stop, zone, calendar, use_numpy)
+    site_zones = {
+        site_id: resolve_timezone(site_tz)
+        for site_id, site_tz in (site_timezones or {}).items()
+    }
+    chunks = split_range(start, end, interval)
+    failed: dict[int, BaseException] = {}
+
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for site_id in site_ids:
+        queue.put_nowait(site_id)
+
+    async def worker() -> None:
+        while True:
+            try:
+                site_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                # Fold only complete sites, so a failure leaves no partial sums.
+                responses = [
+                    await installations.get_stats(
+                        site_id,
+                        stats_type=stats_type,
+                        interval=interval,
+                        start=chunk_start,
+                        end=chunk_end,
+                        attribute_codes=attribute_codes,
+                    )
+                    for chunk_start, chunk_end in chunks
+                ]
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Fleet aggregation of site %s failed: %s", site_id, e)
+                failed[site_id] = e
+                continue
+            for response in responses:
+                acc.add_response(response, site_zones.get(site_id))
+            acc.sites += 1
+
+    async with asyncio.TaskGroup() as group:
+        for _ in range(min(max_concurrency, queue.qsize())):
+            group.create_task(worker())
+    return FleetAggregate(acc.series(), acc.totals, acc.sites, failed)
@@ -0,0 +1,191 @@
+"""Gap detection and targeted backfill for stats series.
+
+Connectivity dropouts leave missing buckets in historical series.
+:func:`find_gaps` locates them relative to the expected
+:class:`StatsInterval` cadence, :func:`plan_gap_requests` turns them
+into valid request windows, combining only gaps separated by short
+present stretches, and :func:`backfill_gaps` fetches only those windows.
+
+Timestamps are in milliseconds, as returned by the VRM API.
+"""
+
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import NamedTuple
+
+from vrmapi_async.client.installations.api import InstallationsNamespace
+from vrmapi_async.client.installations.planner import (
+    INTERVAL_DURATIONS,
+    MAX_PERIODS,
+    StatsPlan,
+    merge_stats_responses,
+    split_range,
+)
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+    StatsType,
+)
+from vrmapi_async.stats.resample import (
+    bucket_edges,
+    floor_timestamp,
+    next_bucket_edge,
+    resolve_timezone,
+)
+from vrmapi_async.utils import datetime_to_epoch_ms
+
+
+class Gap(NamedTuple):
+    """A run of missing buckets, ``[start_ms, end_ms)``."""
+
+    start_ms: int
+    end_ms: int
+    missing: int
+
+    @property
+    def start(self) -> datetime:
+        """Start of the gap as an aware UTC datetime."""
+        return datetime.fromtimestamp(self.start_ms / 1000, tz=timezone.utc)
+
+    @property
+    def end(self) -> datetime:
+        """End of the gap as an aware UTC datetime."""
+        return datetime.fromtimestamp(self.end_ms / 1000, tz=timezone.utc)
+
+
+def find_gaps(
+    series: Iterable[StatsRecord | int],
+    interval: StatsInterval,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    tz: str | tzinfo | None = None,
+) -> list[Gap]:
+    """Find runs of missing buckets in a stats series.
+
+    The expected cadence is one point per ``interval`` bucket between
+    ``start`` and ``end`` (defaulting to the first and last point of the
+    series). Points are matched to buckets by flooring, so series whose
+    timestamps are slightly offset from the bucket start are handled.
+
+    :param series: Records or raw millisecond timestamps, in any order.
+    :param interval: The cadence the series was fetched with.
+    :param start: Start of the expected range (UTC if naive).
+    :param end: End of the expected range, exclusive (UTC if naive).
+    :param tz: Timezone for calendar bucket boundaries.
+    :returns: Gaps ordered by time.
+    """
+    zone = resolve_timezone(tz)
+    timestamps = sorted(
+        item.timestamp if isinstance(item, StatsRecord) else item for item in series
+    )
+    if not timestamps and (start is None or end is None):
+        return []
+
+    first = datetime_to_epoch_ms(start) if start is not None else timestamps[0]
+    last = datetime_to_epoch_ms(end) - 1 if end is not None else timestamps[-1]
+    if last < first:
+        return []
+
+    present = {floor_timestamp(ts, interval, zone) for ts in timestamps}
+    edges = bucket_edges(first, last, interval, zone)
+    bounds = [*edges[1:], next_bucket_edge(edges[-1], interval, zone)]
+
+    gaps: list[Gap] = []
+    run_start: int | None = None
+    run_end = missing = 0
+    for edge, bound in zip(edges, bounds, strict=True):
+        if edge in present:
+            if run_start is not None:
+                gaps.append(Gap(run_start, run_end, missing))
+                run_start = None
+            continue
+        if run_start is None:
+            run_start, missing = edge, 0
+        run_end = bound
+        missing += 1
+    if run_start is not None:
+        gaps.append(Gap(run_start, run_end, missing))
+    return gaps
+
+
+def plan_gap_requests(
+    gaps: Iterable[Gap],
+    interval: StatsInterval,
+    max_present: timedelta | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """Turn gaps into valid request windows.
+
+    Neighbouring gaps separated by a present stretch shorter than
+    ``max_present`` are combined into one window, as long as the window
+    stays within the maximum period allowed for ``interval``; this
+    re-fetches the short present stretch to save a request. Gaps longer
+    than the maximum period are split.
+
+    :param gaps: Gaps as returned by :func:`find_gaps`.
+    :param interval: The interval the windows will be requested with.
+    :param max_present: Longest present stretch that is re-fetched to
+        combine two gaps. Defaults to three buckets of ``interval``.
+    :returns: ``(start, end)`` windows ordered by time.
+    """
+    if max_present is None:
+        max_present = INTERVAL_DURATIONS[interval] * 3
+    max_ms = int(MAX_PERIODS[interval].total_seconds() * 1000)
+    present_ms = int(max_present.total_seconds() * 1000)
+    windows: list[tuple[int, int]] = []
+    for gap in sorted(gaps):
+        if (
+            windows
+            and gap.start_ms - windows[-1][1] < present_ms
+            and gap.end_ms - windows[-1][0] <= max_ms
+        ):
+            windows[-1] = (windows[-1][0], gap.end_ms)
+        else:
+            windows.append((gap.start_ms, gap.end_ms))
+
+    requests: list[tuple[datetime, datetime]] = []
+    for start_ms, end_ms in windows:
+        requests.extend(
+            split_range(
+                datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc),
+                datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc),
+                interval,
+            )
+        )
+    return requests
+
+
+async def backfill_gaps(
+    installations: InstallationsNamespace,
+    site_id: int,
+    stats_type: StatsType,
+    interval: StatsInterval,
+    requests: Sequence[tuple[datetime, datetime]],
+    *,
+    attribute_codes: list[str] | None = None,
+    max_concurrency: int = 4,
+) -> StatsResponse:
+    """Fetch the given request windows and merge them into one response.
+
+    :param installations: The client's installations namespace.
+    :param site_id: The installation ID.
+    :param stats_type: Type of stats to fetch.
+    :param interval: The interval of the series.
+    :param requests: Windows as returned by :func:`plan_gap_requests`.
+    :param attribute_codes: Attribute codes for custom type.
+    :param max_concurrency: Maximum number of requests in flight.
+    :returns: The backfilled data, merged into one response.
+    """
+    if not requests:
+        return merge_stats_responses([])
+    chunks = tuple(requests)
+    plan = StatsPlan(
+        site_id=site_id,
+        stats_type=stats_type,
+        interval=interval,
+        start=chunks[0][0],
+        end=chunks[-1][1],
+        chunks=chunks,
+        attribute_codes=tuple(attribute_codes) if attribute_codes else None,
+    )
+    return await installations.execute_stats_plan(plan, max_concurrency)
@@ -0,0 +1,283 @@
+"""Incremental per-site, per-day energy ledger.
+
+:class:`EnergyLedger` keeps daily ``kwh`` stats for many installations
+in a local SQLite database. Days are calendar days in each site's own
+timezone (:attr:`Site.timezone`). Once a day has ended and the settle
+time has passed it is *frozen*: it is never requested again, so a
+nightly sync only fetches the still-open days of every site instead of
+re-requesting a whole month.
+
+Sums per site and month are computed by the database from the stored
+days.
+"""
+
+import asyncio
+import logging
+import sqlite3
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from pathlib import Path
+from types import TracebackType
+from typing import NamedTuple, Self
+
+from vrmapi_async.client.installations.api import InstallationsNamespace
+from vrmapi_async.client.installations.planner import split_range
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsResponse,
+    StatsType,
+)
+from vrmapi_async.client.users.schema import Site
+from vrmapi_async.stats.resample import resolve_timezone
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger_sites (
+    site_id INTEGER PRIMARY KEY,
+    timezone TEXT NOT NULL,
+    frozen_through TEXT
+);
+CREATE TABLE IF NOT EXISTS ledger_days (
+    site_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    attribute TEXT NOT NULL,
+    kwh REAL,
+    final INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (site_id, day, attribute)
+) WITHOUT ROWID;
+"""
+
+
+class LedgerDay(NamedTuple):
+    """Energy of one attribute of a site on one local calendar day."""
+
+    site_id: int
+    day: date
+    attribute: str
+    kwh: float | None
+    final: bool
+
+
+def _month_bounds(year: int, month: int) -> tuple[str, str]:
+    first = date(year, month, 1)
+    after = date(year + month // 12, month % 12 + 1, 1)
+    return first.isoformat(), after.isoformat()
+
+
+def _local_day(ts_ms: int, zone: tzinfo) -> date:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=zone).date()
+
+
+class EnergyLedger:
+    """Keep a daily kWh ledger for many sites, fetching only open days."""
+
+    def __init__(
+        self,
+        installations: InstallationsNamespace,
+        path: str | Path = ":memory:",
+        settle: timedelta = timedelta(hours=2),
+    ) -> None:
+        """Open (and create if needed) the ledger database at ``path``.
+
+        :param installations: The client's installations namespace.
+        :param path: Database file, or ``":memory:"`` for a transient ledger.
+        :param settle: How long after local midnight a day is still
+            re-fetched before it is frozen.
+        """
+        self.installations = installations
+        self.settle = settle
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        """Return the ledger itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the ledger."""
+        self.close()
+
+    def set_timezone(self, site_id: int, tz: str) -> None:
+        """Set the timezone used for the day boundaries of a site.
+
+        :param site_id: The installation ID.
+        :param tz: IANA timezone name, as in :attr:`Site.timezone`.
+        """
+        resolve_timezone(tz)
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO ledger_sites (site_id, timezone) VALUES (?, ?)"
+                " ON CONFLICT (site_id) DO UPDATE SET timezone = excluded.timezone",
+                (site_id, tz),
+            )
+
+    def register_sites(self, sites: Iterable[Site]) -> None:
+        """Set the timezones of several sites from their :class:`Site` models.
+
+        :param sites: Sites, e.g. from ``users.list_installations``.
+        """
+        for site in sites:
+            self.set_timezone(site.site_id, site.timezone)
+
+    def _site_state(self, site_id: int) -> tuple[tzinfo, date | None]:
+        row = self._conn.execute(
+            "SELECT timezone, frozen_through FROM ledger_sites WHERE site_id = ?",
+            (site_id,),
+        ).fetchone()
+        if row is None:
+            msg = f"Unknown timezone for site {site_id}; register the site first."
+            raise ValueError(msg)
+        tz, frozen = row
+        return resolve_timezone(tz), date.fromisoformat(frozen) if frozen else None
+
+    def _frozen_until(self, zone: tzinfo, now: datetime) -> date:
+        """Return the last local day that is frozen at ``now``."""
+        return ((now - self.settle).astimezone(zone) - timedelta(days=1)).date()
+
+    async def sync_site(
+        self,
+        site_id: int,
+        since: date,
+        now: datetime | None = None,
+    ) -> int:
+        """Fetch the open days of one site and freeze the closed ones.
+
+        :param site_id: The installation ID.
+        :param since: First day of the ledger, for sites not synced before.
+        :param now: Current time, defaults to now.
+        :returns: Number of day values written.
+        :raises ValueError: If the timezone of the site is unknown.
+        """
+        now = now or datetime.now(timezone.utc)
+        zone, frozen = self._site_state(site_id)
+        first_open = frozen + timedelta(days=1) if frozen else since
+        start = datetime.combine(first_open, time(), zone)
+        if start >= now:
+            return 0
+
+        responses: list[StatsResponse] = []
+        for chunk_start, chunk_end in split_range(start, now, StatsInterval.DAYS):
+            responses.append(
+                await self.installations.get_stats(
+                    site_id,
+                    stats_type=StatsType.KWH,
+                    interval=StatsInterval.DAYS,
+                    start=chunk_start,
+                    end=chunk_end,
+                )
+            )
+
+        frozen_until = self._frozen_until(zone, now)
+        rows = [
+            (site_id, day.isoformat(), attribute, record.mean, day <= frozen_until)
+            for response in responses
+            for attribute, val in response.records.items()
+            if isinstance(val, list)
+            for record in val
+            if (day := _local_day(record.timestamp, zone)) >= first_open
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ledger_days VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if frozen_until >= first_open:
+                self._conn.execute(
+                    "UPDATE ledger_days SET final = 1"
+                    " WHERE site_id = ? AND day <= ? AND final = 0",
+                    (site_id, frozen_until.isoformat()),
+                )
+                self._conn.execute(
+                    "UPDATE ledger_sites SET frozen_through = ? WHERE site_id = ?",
+                    (frozen_until.isoformat(), site_id),
+                )
+        logger.debug(
+            "Ledger of site %s synced from %s, frozen through %s",
+            site_id,
+            first_open,
+            frozen_until,
+        )
+        return len(rows)
+
+    async def sync(
+        self,
+        site_ids: Iterable[int],
+        since: date,
+        now: datetime | None = None,
+        max_concurrency: int = 8,
+    ) -> dict[int, int]:
+        """Run :meth:`sync_site` for several sites with bounded concurrency.
+
+        :param site_ids: The installation IDs, with registered timezones.
+        :param since: First day of the ledger, for sites not synced before.
+        :param now: Current time, defaults to now.
+        :param max_concurrency: Maximum number of sites synced at once.
+        :returns: ``{site_id: day values written}`` for every site.
+        """
+        now = now or datetime.now(timezone.utc)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(site_id: int) -> tuple[int, int]:
+            async with semaphore:
+                return site_id, await self.sync_site(site_id, since, now)
+
+        return dict(await asyncio.gather(*(run(site_id) for site_id in site_ids)))
+
+    def days(self, site_id: int, start: date, end: date) -> list[LedgerDay]:
+        """Return the ledger entries of a site for days in ``[start, end)``.
+
+        :param site_id: The installation ID.
+        :param start: First day, inclusive.
+        :param end: Last day, exclusive.
+        :returns: Entries ordered by day and attribute.
+        """
+        rows = self._conn.execute(
+            "SELECT day, attribute, kwh, final FROM ledger_days"
+            " WHERE site_id = ? AND day >= ? AND day < ? ORDER BY day, attribute",
+            (site_id, start.isoformat(), end.isoformat()),
+        )
+        return [
+            LedgerDay(site_id, date.fromisoformat(day), attribute, kwh, bool(final))
+            for day, attribute, kwh, final in rows
+        ]
+
+    def month_totals(self, site_id: int, year: int, month: int) -> dict[str, float]:
+        """Return ``{attribute: kWh}`` summed over a month of a site.
+
+        :param site_id: The installation ID.
+        :param year: The year.
+        :param month: The month, 1-12.
+        :returns: Totals per attribute.
+        """
+        rows = self._conn.execute(
+            "SELECT attribute, TOTAL(kwh) FROM ledger_days"
+            " WHERE site_id = ? AND day >= ? AND day < ? GROUP BY attribute",
+            (site_id, *_month_bounds(year, month)),
+        )
+        return dict(rows.fetchall())
+
+    def fleet_month_totals(self, year: int, month: int) -> dict[int, dict[str, float]]:
+        """Return ``{site_id: {attribute: kWh}}`` for every site in a month.
+
+        :param year: The year.
+        :param month: The month, 1-12.
+        :returns: Totals per site and attribute.
+        """
+        totals: dict[int, dict[str, float]] = {}
+        rows = self._conn.execute(
+            "SELECT site_id, attribute, TOTAL(kwh) FROM ledger_days"
+            " WHERE day >= ? AND day < ? GROUP BY site_id, attribute",
+            _month_bounds(year, month),
+        )
+        for site_id, attribute, kwh in rows:
+            totals.setdefault(site_id, {})[attribute] = kwh
+        return totals
@@ -0,0 +1,285 @@
+"""Local resampling of fetched stats series into coarser buckets.
+
+A single fine-grained fetch (e.g. ``15mins``) can serve every coarser
+view of the same data without extra API calls. Bucket boundaries are
+computed in the site's local timezone (see ``Site.timezone``), so days,
+weeks (starting on Monday), months and years follow local midnight.
+
+Timestamps are expected in milliseconds, as returned by the VRM API.
+When NumPy is installed, aggregation is vectorized.
+"""
+
+import bisect
+import math
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta, timezone, tzinfo
+from types import ModuleType
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from vrmapi_async.client.installations.planner import INTERVAL_DURATIONS
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+)
+from vrmapi_async.utils import datetime_to_epoch_ms
+
+np: ModuleType | None
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised without numpy installed
+    np = None
+
+HAS_NUMPY = np is not None
+
+MS_PER_SECOND = 1000
+
+FIXED_INTERVALS = frozenset(
+    {StatsInterval.FIFTEEN_MINS, StatsInterval.HOURS, StatsInterval.TWO_HOURS}
+)
+
+
+def resolve_timezone(tz: str | tzinfo | None) -> tzinfo:
+    """Resolve an IANA timezone name (e.g. ``Site.timezone``) to a tzinfo.
+
+    :param tz: Timezone name, tzinfo instance or None for UTC.
+    :returns: The corresponding tzinfo.
+    """
+    if tz is None:
+        return timezone.utc
+    if isinstance(tz, str):
+        return ZoneInfo(tz)
+    return tz
+
+
+def _to_local(ts_ms: int, tz: tzinfo) -> datetime:
+    return datetime.fromtimestamp(ts_ms / MS_PER_SECOND, tz=tz)
+
+
+def floor_timestamp(ts_ms: int, interval: StatsInterval, tz: tzinfo) -> int:
+    """Return the start of the bucket containing ``ts_ms``.
+
+    :param ts_ms: Timestamp in milliseconds.
+    :param interval: Bucket size.
+    :param tz: Timezone the bucket boundaries are aligned to.
+    :returns: Bucket start in milliseconds.
+    """
+    local = _to_local(ts_ms, tz)
+    if interval in FIXED_INTERVALS:
+        step = int(INTERVAL_DURATIONS[interval].total_seconds()) * MS_PER_SECOND
+        offset = local.utcoffset() or timedelta(0)
+        offset_ms = int(offset.total_seconds()) * MS_PER_SECOND
+        return ts_ms - ((ts_ms + offset_ms) % step)
+
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0, fold=0)
+    if interval == StatsInterval.WEEKS:
+        day -= timedelta(days=day.weekday())
+    elif interval == StatsInterval.MONTHS:
+        day = day.replace(day=1)
+    elif interval == StatsInterval.YEARS:
+        day = day.replace(month=1, day=1)
+    return datetime_to_epoch_ms(day)
+
+
+def next_bucket_edge(edge_ms: int, interval: StatsInterval, tz: tzinfo) -> int:
+    """Return the start of the bucket following the one starting at ``edge_ms``.
+
+    :param edge_ms: Bucket start in milliseconds.
+    :param interval: Bucket size.
+    :param tz: Timezone the bucket boundaries are aligned to.
+    :returns: Start of the next bucket in milliseconds.
+    """
+    if interval in FIXED_INTERVALS:
+        step = int(INTERVAL_DURATIONS[interval].total_seconds()) * MS_PER_SECOND
+        return floor_timestamp(edge_ms + step + step // 2, interval, tz)
+
+    local = _to_local(edge_ms, tz).replace(tzinfo=None)
+    if interval == StatsInterval.DAYS:
+        nxt = local + timedelta(days=1)
+    elif interval == StatsInterval.WEEKS:
+        nxt = local + timedelta(weeks=1)
+    elif interval == StatsInterval.MONTHS:
+        year, month = divmod(local.month, 12)
+        nxt = local.replace(year=local.year + year, month=month + 1)
+    else:
+        nxt = local.replace(year=local.year + 1)
+    return datetime_to_epoch_ms(nxt.replace(tzinfo=tz))
+
+
+def bucket_edges(
+    start_ms: int, end_ms: int, interval: StatsInterval, tz: tzinfo
+) -> list[int]:
+    """Return the starts of all buckets overlapping ``[start_ms, end_ms]``.
+
+    :param start_ms: First timestamp in milliseconds.
+    :param end_ms: Last timestamp in milliseconds.
+    :param interval: Bucket size.
+    :param tz: Timezone the bucket boundaries are aligned to.
+    :returns: Sorted bucket start timestamps in milliseconds.
+    """
+    edges = [floor_timestamp(start_ms, interval, tz)]
+    while True:
+        nxt = next_bucket_edge(edges[-1], interval, tz)
+        if nxt > end_ms:
+            return edges
+        edges.append(nxt)
+
+
+def _fallback(value: float | None, default: float | None) -> float:
+    if value is not None:
+        return value
+    return default if default is not None else math.nan
+
+
+def _columns(
+    records: Sequence[StatsRecord],
+) -> tuple[list[int], list[float], list[float], list[float]]:
+    ordered = sorted(records, key=lambda r: r.timestamp)
+    ts = [r.timestamp for r in ordered]
+    means = [_fallback(r.mean, None) for r in ordered]
+    mins = [_fallback(r.min, r.mean) for r in ordered]
+    maxs = [_fallback(r.max, r.mean) for r in ordered]
+    return ts, means, mins, maxs
+
+
+def _optional(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def _resample_python(
+    ts: list[int],
+    means: list[float],
+    mins: list[float],
+    maxs: list[float],
+    edges: list[int],
+) -> list[StatsRecord]:
+    sums = [0.0] * len(edges)
+    counts = [0] * len(edges)
+    lows = [math.nan] * len(edges)
+    highs = [math.nan] * len(edges)
+    seen = [False] * len(edges)
+
+    for t, mean, low, high in zip(ts, means, mins, maxs, strict=True):
+        i = bisect.bisect_right(edges, t) - 1
+        seen[i] = True
+        if not math.isnan(mean):
+            sums[i] += mean
+            counts[i] += 1
+        if not math.isnan(low) and not low >= lows[i]:
+            lows[i] = low
+        if not math.isnan(high) and not high <= highs[i]:
+            highs[i] = high
+
+    return [
+        StatsRecord(
+            timestamp=edges[i],
+            mean=sums[i] / counts[i] if counts[i] else None,
+            min=_optional(lows[i]),
+            max=_optional(highs[i]),
+        )
+        for i in range(len(edges))
+        if seen[i]
+    ]
+
+
+def _resample_numpy(
+    ts: list[int],
+    means: list[float],
+    mins: list[float],
+    maxs: list[float],
+    edges: list[int],
+) -> list[StatsRecord]:
+    assert np is not None  # noqa: S101
+    ts_arr = np.asarray(ts, dtype=np.int64)
+    mean_arr = np.asarray(means, dtype=np.float64)
+    idx = np.searchsorted(np.asarray(edges, dtype=np.int64), ts_arr, "right") - 1
+    # ``idx`` is non-decreasing, so groups are contiguous runs.
+    starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+
+    valid = ~np.isnan(mean_arr)
+    sums = np.add.reduceat(np.where(valid, mean_arr, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    lows = np.fmin.reduceat(np.asarray(mins, dtype=np.float64), starts)
+    highs = np.fmax.reduceat(np.asarray(maxs, dtype=np.float64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avgs = sums / counts
+
+    return [
+        StatsRecord(
+            timestamp=edges[bucket],
+            mean=_optional(avg),
+            min=_optional(low),
+            max=_optional(high),
+        )
+        for bucket, avg, low, high in zip(
+            idx[starts].tolist(),
+            avgs.tolist(),
+            lows.tolist(),
+            highs.tolist(),
+            strict=True,
+        )
+    ]
+
+
+def resample(
+    records: Iterable[StatsRecord],
+    interval: StatsInterval,
+    tz: str | tzinfo | None = None,
+    vectorized: bool | None = None,
+) -> list[StatsRecord]:
+    """Aggregate a stats series into coarser buckets.
+
+    Each output record is stamped with its bucket start. ``mean`` is
+    the mean of the input means, ``min``/``max`` are the extremes of the
+    input ``min``/``max`` (falling back to ``mean`` where the input has
+    no extremes). Empty buckets are omitted.
+
+    :param records: Input records with millisecond timestamps.
+    :param interval: Target bucket size.
+    :param tz: Timezone for bucket boundaries, e.g. ``site.timezone``.
+        Defaults to UTC.
+    :param vectorized: Force (True) or disable (False) the NumPy code
+        path. Defaults to using NumPy when it is installed.
+    :returns: Resampled records ordered by timestamp.
+    :raises ImportError: If ``vectorized=True`` but NumPy is missing.
+    """
+    if vectorized and not HAS_NUMPY:
+        msg = "Vectorized resampling requires numpy to be installed."
+        raise ImportError(msg)
+    records = list(records)
+    if not records:
+        return []
+
+    zone = resolve_timezone(tz)
+    ts, means, mins, maxs = _columns(records)
+    edges = bucket_edges(ts[0], ts[-1], interval, zone)
+    use_numpy = HAS_NUMPY if vectorized is None else vectorized
+    impl = _resample_numpy if use_numpy else _resample_python
+    return impl(ts, means, mins, maxs, edges)
+
+
+def resample_response(
+    response: StatsResponse,
+    interval: StatsInterval,
+    tz: str | tzinfo | None = None,
+    vectorized: bool | None = None,
+) -> StatsResponse:
+    """Resample every attribute of a :class:`StatsResponse`.
+
+    Attributes without data (``False``) and ``totals`` are carried over
+    unchanged, since totals do not depend on the bucket size.
+
+    :param response: A fetched stats response.
+    :param interval: Target bucket size.
+    :param tz: Timezone for bucket boundaries. Defaults to UTC.
+    :param vectorized: See :func:`resample`.
+    :returns: A new StatsResponse with resampled records.
+    """
+    records: dict[str, Any] = {
+        key: resample(val, interval, tz, vectorized) if isinstance(val, list) else val
+        for key, val in response.records.items()
+    }
+    return StatsResponse(
+        success=response.success, records=records, totals=response.totals
+    )
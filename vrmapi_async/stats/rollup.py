@@ -0,0 +1,330 @@
+"""Incrementally maintained hourly and daily rollups of stats series.
+
+:class:`RollupMaintainer` consumes freshly fetched stats responses and
+keeps point count/``sum``/``min``/``max`` aggregates per site, attribute
+and hour or day bucket up to date. Reading a month of daily totals is
+then a scan over ~30 rollup rows instead of thousands of raw points.
+
+Raw points are only retained while their day is still open, so
+re-fetched (overlapping) points replace earlier values instead of being
+counted twice. A bucket is marked *final* once data at least the settle
+time past its end has been ingested for the same series, or when
+:meth:`RollupMaintainer.finalize` is called after the settle time has
+passed. A final bucket's aggregate no longer changes and late points
+for it are ignored. Finalizing by the data rather than the wall clock
+keeps a past day fetched in several chunks open until all of them are
+in.
+
+Timestamps are in milliseconds, as returned by the VRM API.
+"""
+
+import logging
+import sqlite3
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from types import TracebackType
+from typing import NamedTuple, Self
+
+from vrmapi_async.client.installations.schema import (
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+)
+from vrmapi_async.stats.resample import (
+    floor_timestamp,
+    next_bucket_edge,
+    resolve_timezone,
+)
+from vrmapi_async.utils import datetime_to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_INTERVALS = (StatsInterval.HOURS, StatsInterval.DAYS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_pending (
+    site_id INTEGER NOT NULL,
+    attribute TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    mean REAL,
+    min REAL,
+    max REAL,
+    PRIMARY KEY (site_id, attribute, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    site_id INTEGER NOT NULL,
+    attribute TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    bucket_end INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL,
+    min REAL,
+    max REAL,
+    final INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (site_id, attribute, interval, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_open_idx ON rollups (final, bucket_end);
+"""
+
+
+class Rollup(NamedTuple):
+    """Aggregate of one attribute over one hour or day bucket."""
+
+    bucket_ms: int
+    points: int
+    sum: float | None
+    min: float | None
+    max: float | None
+    final: bool
+
+    @property
+    def bucket(self) -> datetime:
+        """Start of the bucket as an aware UTC datetime."""
+        return datetime.fromtimestamp(self.bucket_ms / 1000, tz=timezone.utc)
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the bucket's values, or None if it has none."""
+        if not self.points or self.sum is None:
+            return None
+        return self.sum / self.points
+
+
+class RollupMaintainer:
+    """Keep hourly and daily rollups up to date as stats are fetched."""
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        tz: str | tzinfo | None = None,
+        settle: timedelta = timedelta(hours=1),
+    ) -> None:
+        """Open (and create if needed) the rollup database at ``path``.
+
+        :param path: Database file, or ``":memory:"`` for transient rollups.
+        :param tz: Timezone for day boundaries, defaults to UTC.
+        :param settle: How long after a bucket ends late data may still
+            arrive before the bucket is marked final.
+        """
+        self.tz = resolve_timezone(tz)
+        self.settle = settle
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        """Return the maintainer itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the maintainer."""
+        self.close()
+
+    def ingest(self, site_id: int, response: StatsResponse) -> int:
+        """Fold every series of a fetched response into the rollups.
+
+        :param site_id: The installation ID the response belongs to.
+        :param response: A stats response, at any interval finer than
+            an hour.
+        :returns: Number of points folded in.
+        """
+        ingested = 0
+        for attribute, val in response.records.items():
+            if isinstance(val, list):
+                ingested += self.ingest_records(site_id, attribute, val)
+        return ingested
+
+    def ingest_records(
+        self,
+        site_id: int,
+        attribute: str,
+        records: Iterable[StatsRecord],
+    ) -> int:
+        """Fold the records of one attribute into the rollups.
+
+        Points falling into an already final hour or day are dropped.
+        Afterwards, buckets of the series that ended at least ``settle``
+        before the latest ingested hour are finalized.
+
+        :param site_id: The installation ID.
+        :param attribute: The attribute code of the records.
+        :param records: The records, in any order.
+        :returns: Number of points folded in.
+        """
+        touched: dict[tuple[StatsInterval, int], int] = {}
+        final: dict[tuple[StatsInterval, int], bool] = {}
+        rows = []
+        for record in records:
+            buckets = [
+                (interval, floor_timestamp(record.timestamp, interval, self.tz))
+                for interval in ROLLUP_INTERVALS
+            ]
+            for bucket_key in buckets:
+                if bucket_key not in final:
+                    final[bucket_key] = self._is_final(site_id, attribute, *bucket_key)
+            if any(final[bucket_key] for bucket_key in buckets):
+                logger.debug(
+                    "Dropping late point %s/%s@%d in a final bucket",
+                    site_id,
+                    attribute,
+                    record.timestamp,
+                )
+                continue
+            for interval, bucket in buckets:
+                if (interval, bucket) not in touched:
+                    touched[interval, bucket] = next_bucket_edge(
+                        bucket, interval, self.tz
+                    )
+            rows.append(
+                (
+                    site_id,
+                    attribute,
+                    record.timestamp,
+                    record.mean,
+                    record.min,
+                    record.max,
+                )
+            )
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rollup_pending VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            for (interval, bucket), bucket_end in touched.items():
+                self._recompute(site_id, attribute, interval, bucket, bucket_end)
+        (latest,) = self._conn.execute(
+            "SELECT MAX(bucket) FROM rollups"
+            " WHERE site_id = ? AND attribute = ? AND interval = ?",
+            (site_id, attribute, str(StatsInterval.HOURS)),
+        ).fetchone()
+        if latest is not None:
+            cutoff = latest - int(self.settle.total_seconds() * 1000)
+            self._finalize(cutoff, (site_id, attribute))
+        return len(rows)
+
+    def _is_final(
+        self, site_id: int, attribute: str, interval: StatsInterval, bucket: int
+    ) -> bool:
+        row = self._conn.execute(
+            "SELECT final FROM rollups"
+            " WHERE site_id = ? AND attribute = ? AND interval = ? AND bucket = ?",
+            (site_id, attribute, str(interval), bucket),
+        ).fetchone()
+        return bool(row and row[0])
+
+    def _recompute(
+        self,
+        site_id: int,
+        attribute: str,
+        interval: StatsInterval,
+        bucket: int,
+        bucket_end: int,
+    ) -> None:
+        count, total, low, high = self._conn.execute(
+            "SELECT COUNT(mean), SUM(mean),"
+            " MIN(COALESCE(min, mean)), MAX(COALESCE(max, mean))"
+            " FROM rollup_pending"
+            " WHERE site_id = ? AND attribute = ? AND ts >= ? AND ts < ?",
+            (site_id, attribute, bucket, bucket_end),
+        ).fetchone()
+        # A final bucket keeps its aggregate even if its raw points are gone.
+        self._conn.execute(
+            "INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)"
+            " ON CONFLICT (site_id, attribute, interval, bucket) DO UPDATE SET"
+            " count = excluded.count, sum = excluded.sum,"
+            " min = excluded.min, max = excluded.max"
+            " WHERE rollups.final = 0",
+            (
+                site_id,
+                attribute,
+                str(interval),
+                bucket,
+                bucket_end,
+                count,
+                total,
+                low,
+                high,
+            ),
+        )
+
+    def finalize(self, now: datetime | None = None) -> int:
+        """Mark every bucket that ended at least ``settle`` ago as final.
+
+        Raw points of finalized days are discarded.
+
+        :param now: Current time, defaults to now.
+        :returns: Number of buckets finalized.
+        """
+        return self._finalize(
+            datetime_to_epoch_ms((now or datetime.now(timezone.utc)) - self.settle)
+        )
+
+    def _finalize(self, cutoff: int, series: tuple[int, str] | None = None) -> int:
+        """Finalize buckets ending by ``cutoff``, only of ``series`` if given."""
+        site_id, attribute = series or (None, None)
+        params = {"cutoff": cutoff, "site_id": site_id, "attribute": attribute}
+        with self._conn:
+            days = self._conn.execute(
+                "SELECT site_id, attribute, bucket, bucket_end FROM rollups"
+                " WHERE final = 0 AND interval = :interval AND bucket_end <= :cutoff"
+                " AND (:site_id IS NULL OR site_id = :site_id)"
+                " AND (:attribute IS NULL OR attribute = :attribute)",
+                {**params, "interval": str(StatsInterval.DAYS)},
+            ).fetchall()
+            cursor = self._conn.execute(
+                "UPDATE rollups SET final = 1 WHERE final = 0 AND bucket_end <= :cutoff"
+                " AND (:site_id IS NULL OR site_id = :site_id)"
+                " AND (:attribute IS NULL OR attribute = :attribute)",
+                params,
+            )
+            self._conn.executemany(
+                "DELETE FROM rollup_pending"
+                " WHERE site_id = ? AND attribute = ? AND ts >= ? AND ts < ?",
+                days,
+            )
+        return cursor.rowcount
+
+    def query(
+        self,
+        site_id: int,
+        attribute: str,
+        interval: StatsInterval,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Rollup]:
+        """Return the rollups of an attribute with bucket start in ``[start, end)``.
+
+        :param site_id: The installation ID.
+        :param attribute: The attribute code.
+        :param interval: :attr:`StatsInterval.HOURS` or
+            :attr:`StatsInterval.DAYS`.
+        :param start: Inclusive lower bound (UTC if naive).
+        :param end: Exclusive upper bound (UTC if naive).
+        :returns: Rollups ordered by bucket.
+        :raises ValueError: If ``interval`` is not a rollup interval.
+        """
+        if interval not in ROLLUP_INTERVALS:
+            msg = f"No rollups are maintained for interval {interval!r}."
+            raise ValueError(msg)
+        lo = datetime_to_epoch_ms(start) if start is not None else -(2**63)
+        hi = datetime_to_epoch_ms(end) if end is not None else 2**63 - 1
+        rows = self._conn.execute(
+            "SELECT bucket, count, sum, min, max, final FROM rollups"
+            " WHERE site_id = ? AND attribute = ? AND interval = ?"
+            " AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (site_id, attribute, str(interval), lo, hi),
+        )
+        return [
+            Rollup(bucket, count, total, low, high, bool(final))
+            for bucket, count, total, low, high, final in rows
+        ]
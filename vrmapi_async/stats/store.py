@@ -0,0 +1,503 @@
+"""Embedded local time-series store for fetched stats.
+
+:class:`StatsStore` appends fetched :class:`StatsRecord` series to a
+local SQLite file, one series per ``(site, stats type, attribute,
+instance, interval)``. Points are clustered by ``(series, timestamp)``, so range
+queries are index seeks returning columnar slices rather than scans.
+
+:class:`ReadThroughStats` puts the store in front of
+:meth:`InstallationsNamespace.get_stats`: only the parts of a requested
+range that were never fetched before go to the API, everything else is
+served locally.
+
+Timestamps are in milliseconds, as returned by the VRM API.
+"""
+
+import logging
+import sqlite3
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import Any, NamedTuple, Self
+
+from vrmapi_async.client.installations.api import InstallationsNamespace
+from vrmapi_async.client.installations.planner import split_range
+from vrmapi_async.client.installations.schema import (
+    InstancedStatsResponse,
+    StatsInterval,
+    StatsRecord,
+    StatsResponse,
+    StatsType,
+)
+from vrmapi_async.utils import datetime_to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+# Instance column value for series fetched without ``show_instance``.
+_NO_INSTANCE = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    site_id INTEGER NOT NULL,
+    stats_type TEXT NOT NULL,
+    attribute TEXT NOT NULL,
+    instance INTEGER NOT NULL,
+    interval TEXT NOT NULL,
+    UNIQUE (site_id, stats_type, attribute, instance, interval)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    mean REAL,
+    min REAL,
+    max REAL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    site_id INTEGER NOT NULL,
+    stats_type TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_idx
+    ON coverage (site_id, stats_type, interval, start_ms);
+CREATE TABLE IF NOT EXISTS type_attributes (
+    site_id INTEGER NOT NULL,
+    stats_type TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    attribute TEXT NOT NULL,
+    PRIMARY KEY (site_id, stats_type, interval, attribute)
+);
+"""
+
+
+class SeriesKey(NamedTuple):
+    """Identifies a stored series."""
+
+    site_id: int
+    stats_type: str
+    attribute: str
+    interval: str
+    instance: int | None = None
+
+
+@dataclass(frozen=True)
+class ColumnarSeries:
+    """A columnar slice of a stored series, ordered by timestamp."""
+
+    timestamps: list[int]
+    mean: list[float | None]
+    min: list[float | None]
+    max: list[float | None]
+
+    def __len__(self) -> int:
+        """Return the number of points in the slice."""
+        return len(self.timestamps)
+
+    def to_records(self) -> list[StatsRecord]:
+        """Convert the slice back to a list of :class:`StatsRecord`."""
+        return [
+            StatsRecord(timestamp=ts, mean=mean, min=low, max=high)
+            for ts, mean, low, high in zip(
+                self.timestamps, self.mean, self.min, self.max, strict=True
+            )
+        ]
+
+
+def _from_ms(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+
+
+def _coverage_type(stats_type: StatsType, attribute_codes: Sequence[str] | None) -> str:
+    # A request for a given set of attribute codes only covers those
+    # codes, so the set is part of the coverage key.
+    if not attribute_codes:
+        return str(stats_type)
+    return f"{stats_type}[{','.join(sorted(set(attribute_codes)))}]"
+
+
+class StatsStore:
+    """File-backed store of stats series with an indexed time axis."""
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        """Open (and create if needed) the store at ``path``.
+
+        :param path: Database file, or ``":memory:"`` for a transient store.
+        """
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(_SCHEMA)
+        self._series_ids: dict[SeriesKey, int] = {}
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        """Return the store itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the store."""
+        self.close()
+
+    def _series_id(self, key: SeriesKey, create: bool) -> int | None:
+        cached = self._series_ids.get(key)
+        if cached is not None:
+            return cached
+        instance = _NO_INSTANCE if key.instance is None else key.instance
+        params = (key.site_id, key.stats_type, key.attribute, instance, key.interval)
+        row = self._conn.execute(
+            "SELECT id FROM series WHERE site_id = ? AND stats_type = ?"
+            " AND attribute = ? AND instance = ? AND interval = ?",
+            params,
+        ).fetchone()
+        if row is None:
+            if not create:
+                return None
+            cursor = self._conn.execute(
+                "INSERT INTO series"
+                " (site_id, stats_type, attribute, instance, interval)"
+                " VALUES (?, ?, ?, ?, ?)",
+                params,
+            )
+            row = (cursor.lastrowid,)
+        self._series_ids[key] = row[0]
+        return row[0]
+
+    def append_records(self, key: SeriesKey, records: Iterable[StatsRecord]) -> int:
+        """Upsert records into a series.
+
+        :param key: The series to write to.
+        :param records: Records to store; existing timestamps are replaced.
+        :returns: Number of records written.
+        """
+        with self._conn:
+            series_id = self._series_id(key, create=True)
+            rows = [(series_id, r.timestamp, r.mean, r.min, r.max) for r in records]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def append(
+        self,
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        response: StatsResponse | InstancedStatsResponse,
+    ) -> int:
+        """Store every series of a fetched stats response.
+
+        :param site_id: The installation ID the response belongs to.
+        :param stats_type: The type of stats the response was fetched for.
+        :param interval: The interval the response was fetched with.
+        :param response: A plain or per-instance stats response.
+        :returns: Total number of records written.
+        """
+        written = 0
+        series = self._iter_series(site_id, stats_type, interval, response)
+        for key, records in series:
+            written += self.append_records(key, records)
+        return written
+
+    @staticmethod
+    def _iter_series(
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        response: StatsResponse | InstancedStatsResponse,
+    ) -> Iterator[tuple[SeriesKey, list[StatsRecord]]]:
+        groups: list[tuple[int | None, dict[str, list[StatsRecord] | bool]]]
+        if isinstance(response, InstancedStatsResponse):
+            groups = [(item.instance, item.stats) for item in response.records]
+        else:
+            groups = [(None, response.records)]
+        for instance, stats in groups:
+            for attribute, val in stats.items():
+                if isinstance(val, list):
+                    key = SeriesKey(
+                        site_id, str(stats_type), attribute, str(interval), instance
+                    )
+                    yield key, val
+
+    def query(
+        self,
+        key: SeriesKey,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> ColumnarSeries:
+        """Return the points of a series in ``[start, end)``.
+
+        :param key: The series to read.
+        :param start: Inclusive lower bound (UTC if naive).
+        :param end: Exclusive upper bound (UTC if naive).
+        :returns: A columnar slice, empty if the series does not exist.
+        """
+        series_id = self._series_id(key, create=False)
+        if series_id is None:
+            return ColumnarSeries([], [], [], [])
+        lo = datetime_to_epoch_ms(start) if start is not None else -(2**63)
+        hi = datetime_to_epoch_ms(end) if end is not None else 2**63 - 1
+        rows = self._conn.execute(
+            "SELECT ts, mean, min, max FROM points"
+            " WHERE series_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (series_id, lo, hi),
+        ).fetchall()
+        if not rows:
+            return ColumnarSeries([], [], [], [])
+        ts, mean, low, high = (list(col) for col in zip(*rows, strict=True))
+        return ColumnarSeries(ts, mean, low, high)
+
+    def series(self, site_id: int | None = None) -> list[SeriesKey]:
+        """List stored series, optionally restricted to one site.
+
+        :param site_id: Only list series of this installation.
+        :returns: Keys of the stored series.
+        """
+        sql = "SELECT site_id, stats_type, attribute, interval, instance FROM series"
+        params: tuple[Any, ...] = ()
+        if site_id is not None:
+            sql += " WHERE site_id = ?"
+            params = (site_id,)
+        return [
+            SeriesKey(s, t, a, i, None if inst == _NO_INSTANCE else inst)
+            for s, t, a, i, inst in self._conn.execute(sql, params)
+        ]
+
+    def mark_covered(
+        self,
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        start_ms: int,
+        end_ms: int,
+        *,
+        attribute_codes: Sequence[str] | None = None,
+    ) -> None:
+        """Record that ``[start_ms, end_ms)`` has been fetched completely.
+
+        Overlapping or adjacent covered ranges are merged. Coverage is kept
+        separately per set of ``attribute_codes``.
+
+        :param site_id: The installation ID.
+        :param stats_type: Type of stats that was fetched.
+        :param interval: Interval the range was fetched with.
+        :param start_ms: Start of the range in milliseconds.
+        :param end_ms: End of the range in milliseconds.
+        :param attribute_codes: Attribute codes the range was fetched with.
+        """
+        group = (site_id, _coverage_type(stats_type, attribute_codes), str(interval))
+        with self._conn:
+            overlapping = self._conn.execute(
+                "SELECT start_ms, end_ms FROM coverage"
+                " WHERE site_id = ? AND stats_type = ? AND interval = ?"
+                " AND start_ms <= ? AND end_ms >= ?",
+                (*group, end_ms, start_ms),
+            ).fetchall()
+            for lo, hi in overlapping:
+                start_ms, end_ms = min(start_ms, lo), max(end_ms, hi)
+            self._conn.execute(
+                "DELETE FROM coverage"
+                " WHERE site_id = ? AND stats_type = ? AND interval = ?"
+                " AND start_ms >= ? AND end_ms <= ?",
+                (*group, start_ms, end_ms),
+            )
+            self._conn.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?)",
+                (*group, start_ms, end_ms),
+            )
+
+    def add_attributes(
+        self,
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        attributes: Iterable[str],
+        *,
+        attribute_codes: Sequence[str] | None = None,
+    ) -> None:
+        """Record attributes returned for a stats type of a site.
+
+        :param site_id: The installation ID.
+        :param stats_type: Type of stats.
+        :param interval: Interval of the series.
+        :param attributes: Attribute codes present in a response.
+        :param attribute_codes: Attribute codes the response was requested with.
+        """
+        group = (site_id, _coverage_type(stats_type, attribute_codes), str(interval))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO type_attributes VALUES (?, ?, ?, ?)",
+                [(*group, attribute) for attribute in attributes],
+            )
+
+    def missing_ranges(
+        self,
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        start_ms: int,
+        end_ms: int,
+        *,
+        attribute_codes: Sequence[str] | None = None,
+    ) -> list[tuple[int, int]]:
+        """Return the parts of ``[start_ms, end_ms)`` not yet covered.
+
+        :param site_id: The installation ID.
+        :param stats_type: Type of stats.
+        :param interval: Interval of the series.
+        :param start_ms: Start of the range in milliseconds.
+        :param end_ms: End of the range in milliseconds.
+        :param attribute_codes: Attribute codes the range would be fetched with.
+        :returns: Uncovered ``(start_ms, end_ms)`` ranges ordered by time.
+        """
+        group = (site_id, _coverage_type(stats_type, attribute_codes), str(interval))
+        covered = self._conn.execute(
+            "SELECT start_ms, end_ms FROM coverage"
+            " WHERE site_id = ? AND stats_type = ? AND interval = ?"
+            " AND start_ms < ? AND end_ms > ? ORDER BY start_ms",
+            (*group, end_ms, start_ms),
+        ).fetchall()
+        missing: list[tuple[int, int]] = []
+        cursor = start_ms
+        for lo, hi in covered:
+            if lo > cursor:
+                missing.append((cursor, lo))
+            cursor = max(cursor, hi)
+        if cursor < end_ms:
+            missing.append((cursor, end_ms))
+        return missing
+
+    def attributes(
+        self,
+        site_id: int,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        *,
+        attribute_codes: Sequence[str] | None = None,
+    ) -> list[str]:
+        """Return the attributes seen for a stats type of a site.
+
+        :param site_id: The installation ID.
+        :param stats_type: Type of stats.
+        :param interval: Interval of the series.
+        :param attribute_codes: Attribute codes the stats were requested with.
+        :returns: Attribute codes recorded by :meth:`add_attributes`.
+        """
+        group = (site_id, _coverage_type(stats_type, attribute_codes), str(interval))
+        rows = self._conn.execute(
+            "SELECT attribute FROM type_attributes"
+            " WHERE site_id = ? AND stats_type = ? AND interval = ?",
+            group,
+        )
+        return [row[0] for row in rows]
+
+
+class ReadThroughStats:
+    """Serve :meth:`InstallationsNamespace.get_stats` from a local store.
+
+    Ranges are only marked as covered up to ``now - settle``, so recent
+    data that may still change is always re-fetched.
+    """
+
+    def __init__(
+        self,
+        installations: InstallationsNamespace,
+        store: StatsStore,
+        settle: timedelta = timedelta(hours=1),
+    ) -> None:
+        """Initialize the read-through source.
+
+        :param installations: The client's installations namespace.
+        :param store: The local store to read from and write to.
+        :param settle: How long after the fact data is considered final.
+        """
+        self.installations = installations
+        self.store = store
+        self.settle = settle
+
+    async def get_stats(
+        self,
+        site_id: int,
+        *,
+        stats_type: StatsType,
+        interval: StatsInterval,
+        start: datetime,
+        end: datetime,
+        attribute_codes: Sequence[str] | None = None,
+    ) -> StatsResponse:
+        """Fetch stats, hitting the API only for never fetched ranges.
+
+        :param site_id: The installation ID.
+        :param stats_type: Type of stats to fetch.
+        :param interval: Time interval between data points.
+        :param start: Start datetime (UTC if naive).
+        :param end: End datetime (UTC if naive).
+        :param attribute_codes: Attribute codes for custom type.
+        :returns: A StatsResponse assembled from the store. ``totals`` is
+            always empty, as totals cannot be derived from stored points.
+        """
+        start_ms, end_ms = datetime_to_epoch_ms(start), datetime_to_epoch_ms(end)
+        final_ms = datetime_to_epoch_ms(datetime.now(timezone.utc) - self.settle)
+        missing = self.store.missing_ranges(
+            site_id,
+            stats_type,
+            interval,
+            start_ms,
+            end_ms,
+            attribute_codes=attribute_codes,
+        )
+        for lo, hi in missing:
+            for chunk_start, chunk_end in split_range(
+                _from_ms(lo), _from_ms(hi), interval
+            ):
+                response = await self.installations.get_stats(
+                    site_id,
+                    stats_type=stats_type,
+                    interval=interval,
+                    start=chunk_start,
+                    end=chunk_end,
+                    attribute_codes=list(attribute_codes) if attribute_codes else None,
+                )
+                self.store.append(site_id, stats_type, interval, response)
+                self.store.add_attributes(
+                    site_id,
+                    stats_type,
+                    interval,
+                    response.records,
+                    attribute_codes=attribute_codes,
+                )
+                covered_end = min(datetime_to_epoch_ms(chunk_end), final_ms)
+                if covered_end > datetime_to_epoch_ms(chunk_start):
+                    self.store.mark_covered(
+                        site_id,
+                        stats_type,
+                        interval,
+                        datetime_to_epoch_ms(chunk_start),
+                        covered_end,
+                        attribute_codes=attribute_codes,
+                    )
+        logger.debug(
+            "Read-through stats for site %s: %d range(s) fetched from the API",
+            site_id,
+            len(missing),
+        )
+
+        attributes = list(attribute_codes or ()) or self.store.attributes(
+            site_id, stats_type, interval
+        )
+        records: dict[str, list[StatsRecord] | bool] = {}
+        for attribute in attributes:
+            key = SeriesKey(site_id, str(stats_type), attribute, str(interval))
+            points = self.store.query(key, start, end).to_records()
+            records[attribute] = points or False
+        return StatsResponse(success=True, records=records, totals={})
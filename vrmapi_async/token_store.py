@@ -0,0 +1,151 @@
+"""Persistence of login sessions across process restarts.
+
+Short-lived processes (CLI jobs, serverless functions) that log in on
+every start pay an extra round trip and add load to ``/auth/login``.
+Pass a :class:`TokenStore` as ``token_store=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI`: the session token, user ID
+and expiry are saved after each login, and
+:meth:`~vrmapi_async.client.VRMAsyncAPI.connect` reuses a stored token
+that is still valid instead of logging in.
+"""
+
+import contextlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+try:
+    import keyring
+    from keyring.errors import PasswordDeleteError
+except ImportError:  # pragma: no cover - only runs without keyring
+    keyring = None
+
+
+@dataclass(frozen=True)
+class StoredToken:
+    """A saved session token."""
+
+    token: str = field(repr=False)
+    user_id: int
+    expires_at: float | None = None
+
+    def is_valid(self, margin: float = 0.0, now: float | None = None) -> bool:
+        """Return whether the token is still usable for ``margin`` seconds.
+
+        Tokens of unknown expiry count as valid; if the API rejects one,
+        the client logs in again.
+
+        :param margin: Seconds the token must remain valid.
+        :param now: Current Unix time, defaults to :func:`time.time`.
+        """
+        if self.expires_at is None:
+            return True
+        return self.expires_at - margin > (time.time() if now is None else now)
+
+
+class TokenStore(ABC):
+    """Base class for session token persistence backends."""
+
+    @abstractmethod
+    def load(self, key: str) -> StoredToken | None:
+        """Return the token saved under ``key``, if any."""
+
+    @abstractmethod
+    def save(self, key: str, token: StoredToken) -> None:
+        """Save ``token`` under ``key``, replacing an older one."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Forget the token saved under ``key``, if any."""
+
+
+class MemoryTokenStore(TokenStore):
+    """Non-persistent token store, mainly useful for testing."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.tokens: dict[str, StoredToken] = {}
+
+    def load(self, key: str) -> StoredToken | None:
+        """Return the token saved under ``key``, if any."""
+        return self.tokens.get(key)
+
+    def save(self, key: str, token: StoredToken) -> None:
+        """Save ``token`` under ``key``, replacing an older one."""
+        self.tokens[key] = token
+
+    def delete(self, key: str) -> None:
+        """Forget the token saved under ``key``, if any."""
+        self.tokens.pop(key, None)
+
+
+class JSONFileTokenStore(MemoryTokenStore):
+    """Token store backed by a JSON file readable only by its owner.
+
+    The file is rewritten atomically on every change, so it is never
+    left half-written by a crash.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize the store, loading existing tokens from ``path``.
+
+        :param path: Location of the JSON file; ``~`` is expanded.
+        """
+        super().__init__()
+        self.path = Path(path).expanduser()
+        if self.path.exists():
+            for key, entry in json.loads(self.path.read_text()).items():
+                self.tokens[key] = StoredToken(**entry)
+
+    def save(self, key: str, token: StoredToken) -> None:
+        """Save ``token`` under ``key``, replacing an older one."""
+        super().save(key, token)
+        self._write()
+
+    def delete(self, key: str) -> None:
+        """Forget the token saved under ``key``, if any."""
+        if key in self.tokens:
+            super().delete(key)
+            self._write()
+
+    def _write(self) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({key: asdict(token) for key, token in self.tokens.items()}, f)
+        tmp.replace(self.path)
+
+
+class KeyringTokenStore(TokenStore):
+    """Token store in the system keyring, via the ``keyring`` package."""
+
+    def __init__(self, service: str = "vrmapi-async") -> None:
+        """Initialize the store.
+
+        :param service: Keyring service name the tokens are saved under.
+        :raises ImportError: If keyring is not installed.
+        """
+        if keyring is None:
+            msg = (
+                "The keyring token store requires keyring; "
+                "install vrmapi-async[keyring]."
+            )
+            raise ImportError(msg)
+        self.service = service
+
+    def load(self, key: str) -> StoredToken | None:
+        """Return the token saved under ``key``, if any."""
+        raw = keyring.get_password(self.service, key)
+        return None if raw is None else StoredToken(**json.loads(raw))
+
+    def save(self, key: str, token: StoredToken) -> None:
+        """Save ``token`` under ``key``, replacing an older one."""
+        keyring.set_password(self.service, key, json.dumps(asdict(token)))
+
+    def delete(self, key: str) -> None:
+        """Forget the token saved under ``key``, if any."""
+        with contextlib.suppress(PasswordDeleteError):
+            keyring.delete_password(self.service, key)
@@ -0,0 +1,304 @@
+"""Tracing spans for client operations.
+
+Pass a :class:`Tracer` as ``tracer=`` to
+:class:`~vrmapi_async.client.VRMAsyncAPI` to get nested spans for:
+
+* ``vrm.connect``, with ``vrm.login`` or ``vrm.login_as_demo`` inside;
+* ``vrm.request`` per API call, with one ``vrm.attempt`` per HTTP
+  attempt and a ``vrm.retry_sleep`` per backoff sleep;
+* ``http.*`` spans inside each attempt for the connection phases
+  reported by httpcore (``connect_tcp`` including DNS, ``start_tls``,
+  sending the request and receiving the response);
+* ``vrm.validate`` per response model validation.
+
+:class:`OpenTelemetryTracer` forwards the spans to OpenTelemetry
+(``pip install vrmapi-async[otel]``); :class:`InMemoryTracer` keeps
+them in a list, e.g. for tests. The base :class:`Tracer` is a no-op;
+:func:`auto_tracer` picks :class:`OpenTelemetryTracer` when
+OpenTelemetry is installed and falls back to the no-op one.
+"""
+
+import itertools
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - only runs without opentelemetry
+    otel_context = None
+    otel_trace = None
+
+HAS_OPENTELEMETRY = otel_trace is not None
+
+Attributes = Mapping[str, Any]
+
+
+class Span:
+    """A span being recorded; the base class ignores everything."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Mark the span as failed with ``exc``."""
+
+    def end(self) -> None:
+        """Finish the span."""
+
+
+_NOOP_SPAN = Span()
+
+
+class _SpanContext:
+    """Context manager making a span current for its duration."""
+
+    __slots__ = ("_span", "_token", "_tracer")
+
+    def __init__(self, tracer: "Tracer", span: Span) -> None:
+        self._tracer = tracer
+        self._span = span
+        self._token: Any = None
+
+    def __enter__(self) -> Span:
+        self._token = self._tracer.activate(self._span)
+        return self._span
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if exc_val is not None:
+            self._span.record_exception(exc_val)
+        self._tracer.deactivate(self._token)
+        self._span.end()
+
+
+class _NoopSpanContext:
+    __slots__ = ()
+
+    def __enter__(self) -> Span:
+        return _NOOP_SPAN
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NOOP_CONTEXT = _NoopSpanContext()
+
+
+class Tracer:
+    """Tracer interface; this base implementation records nothing."""
+
+    enabled = False
+
+    def start_span(self, name: str, attributes: Attributes | None = None) -> Span:  # noqa: ARG002
+        """Start a span, child of the current one, without making it current.
+
+        :param name: Span name.
+        :param attributes: Initial attributes.
+        :returns: The started span; call :meth:`Span.end` to finish it.
+        """
+        return _NOOP_SPAN
+
+    def activate(self, span: Span) -> Any:  # noqa: ARG002
+        """Make ``span`` the current span; returns a token for :meth:`deactivate`."""
+        return None
+
+    def deactivate(self, token: Any) -> None:
+        """Restore the current span from before :meth:`activate`."""
+
+    def span(
+        self, name: str, attributes: Attributes | None = None
+    ) -> "_SpanContext | _NoopSpanContext":
+        """Return a context manager running its body in a new current span.
+
+        An exception escaping the body is recorded on the span.
+
+        :param name: Span name.
+        :param attributes: Initial attributes.
+        """
+        if not self.enabled:
+            return _NOOP_CONTEXT
+        return _SpanContext(self, self.start_span(name, attributes))
+
+    def httpcore_trace(self) -> Callable[[str, dict[str, Any]], Awaitable[None]]:
+        """Return a callback for httpx's ``trace`` request extension.
+
+        Each ``<phase>.started`` event opens an ``http.<phase>`` span
+        that the matching ``.complete``/``.failed`` event closes.
+        """
+        open_spans: dict[str, Span] = {}
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            phase, _, stage = event.rpartition(".")
+            if stage == "started":
+                open_spans[phase] = self.start_span(f"http.{phase}")
+                return
+            span = open_spans.pop(phase, None)
+            if span is None:
+                return
+            if stage == "failed" and isinstance(info.get("exception"), BaseException):
+                span.record_exception(info["exception"])
+            span.end()
+
+        return trace
+
+
+NOOP_TRACER = Tracer()
+
+
+@dataclass
+class FinishedSpan:
+    """A span recorded by :class:`InMemoryTracer`."""
+
+    name: str
+    span_id: int
+    parent_id: int | None
+    start: float
+    end: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: BaseException | None = None
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds."""
+        return self.end - self.start
+
+
+class _InMemorySpan(Span):
+    __slots__ = ("_record", "_tracer")
+
+    def __init__(self, tracer: "InMemoryTracer", record: FinishedSpan) -> None:
+        self._tracer = tracer
+        self._record = record
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._record.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self._record.error = exc
+
+    def end(self) -> None:
+        self._record.end = time.perf_counter()
+        self._tracer.spans.append(self._record)
+
+
+class InMemoryTracer(Tracer):
+    """Tracer keeping finished spans in :attr:`spans`, in finishing order."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        """Initialize an empty tracer."""
+        self.spans: list[FinishedSpan] = []
+        self._ids = itertools.count(1)
+        self._current: ContextVar[int | None] = ContextVar(
+            f"vrm_span_{id(self)}", default=None
+        )
+
+    def start_span(self, name: str, attributes: Attributes | None = None) -> Span:
+        """Start a span, child of the current one, without making it current."""
+        now = time.perf_counter()
+        record = FinishedSpan(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=self._current.get(),
+            start=now,
+            end=now,
+            attributes=dict(attributes or {}),
+        )
+        return _InMemorySpan(self, record)
+
+    def activate(self, span: Span) -> Token[int | None]:
+        """Make ``span`` the current span."""
+        assert isinstance(span, _InMemorySpan)  # noqa: S101
+        return self._current.set(span._record.span_id)  # noqa: SLF001
+
+    def deactivate(self, token: Token[int | None]) -> None:
+        """Restore the current span from before :meth:`activate`."""
+        self._current.reset(token)
+
+    def find(self, name: str) -> list[FinishedSpan]:
+        """Return all finished spans called ``name``."""
+        return [span for span in self.spans if span.name == name]
+
+    def children(self, parent: FinishedSpan) -> list[FinishedSpan]:
+        """Return the finished direct children of ``parent``."""
+        return [span for span in self.spans if span.parent_id == parent.span_id]
+
+    def clear(self) -> None:
+        """Drop all finished spans."""
+        self.spans.clear()
+
+
+class _OTelSpan(Span):
+    __slots__ = ("otel_span",)
+
+    def __init__(self, otel_span: Any) -> None:
+        self.otel_span = otel_span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.otel_span.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        assert otel_trace is not None  # noqa: S101
+        self.otel_span.record_exception(exc)
+        self.otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+
+    def end(self) -> None:
+        self.otel_span.end()
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer forwarding spans to the OpenTelemetry API."""
+
+    enabled = True
+
+    def __init__(self, tracer: Any = None) -> None:
+        """Initialize the adapter.
+
+        :param tracer: An ``opentelemetry.trace.Tracer``; defaults to the
+            global tracer provider's tracer for ``vrmapi_async``.
+        :raises ImportError: If OpenTelemetry is not installed.
+        """
+        if otel_trace is None:
+            msg = (
+                "OpenTelemetry tracing requires opentelemetry-api; "
+                "install vrmapi-async[otel]."
+            )
+            raise ImportError(msg)
+        self.tracer = tracer or otel_trace.get_tracer("vrmapi_async")
+
+    def start_span(self, name: str, attributes: Attributes | None = None) -> Span:
+        """Start a span, child of the current one, without making it current."""
+        return _OTelSpan(self.tracer.start_span(name, attributes=attributes))
+
+    def activate(self, span: Span) -> Any:
+        """Make ``span`` the current span."""
+        assert otel_trace is not None  # noqa: S101
+        assert otel_context is not None  # noqa: S101
+        assert isinstance(span, _OTelSpan)  # noqa: S101
+        return otel_context.attach(otel_trace.set_span_in_context(span.otel_span))
+
+    def deactivate(self, token: Any) -> None:
+        """Restore the current span from before :meth:`activate`."""
+        assert otel_context is not None  # noqa: S101
+        otel_context.detach(token)
+
+
+def auto_tracer() -> Tracer:
+    """Return an OpenTelemetry tracer if available, else :data:`NOOP_TRACER`.
+
+    An :class:`InMemoryTracer` is never picked: it keeps every span, so a
+    long-running client would grow it without bound.
+    """
+    if HAS_OPENTELEMETRY:
+        return OpenTelemetryTracer()
+    return NOOP_TRACER
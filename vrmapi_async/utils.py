@@ -23,6 +23,24 @@ def datetime_to_epoch(dt: datetime) -> int:
     return math.ceil(dt.timestamp())
 
 
+def as_utc(dt: datetime) -> datetime:
+    """Return ``dt`` as an aware datetime, assuming UTC if naive.
+
+    :param dt: The datetime to convert.
+    :returns: ``dt`` itself if aware, else ``dt`` in UTC.
+    """
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def datetime_to_epoch_ms(dt: datetime) -> int:
+    """Convert a datetime to epoch milliseconds, as used by stats records.
+
+    :param dt: The datetime to convert (UTC if naive).
+    :returns: Milliseconds since the epoch.
+    """
+    return int(as_utc(dt).timestamp() * 1000)
+
+
 def to_snake_case(s: str) -> str:
     """Convert a string from various casings to snake_case.
 